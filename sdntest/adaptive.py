@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+import os
+import logging
+from threading import Lock
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sdntest.scheduler import expand_jobs
+from sdntest.results import ResultStore, METRICS, parse_file, job_row, t95
+from sdntest.convergence import analyze
+from sdntest.output import find_output
+
+class AdaptiveRepeat(object):
+    """
+    Repeat each argument until a metric has converged.
+
+    Configured by a "repeat" object in the testcase configuration:
+
+        "repeat": {"min": 3, "max": 20, "metric": "throughput",
+                   "target": 0.05, "relative": true}
+
+    Every argument runs at least `min` repeats. After that, a finished
+    repeat is replaced by a new one until the half width of the 95%
+    confidence interval of the metric mean is at most `target` (a
+    fraction of the mean if `relative`), or `max` repeats have been run.
+    """
+
+    def __init__(self, configs, manifest=None):
+        """
+        Args:
+            configs (dict): json object of testcase configuration file.
+            manifest (RunManifest): completed jobs, whose results are reused.
+        """
+        if np is None:
+            raise ImportError("NumPy is required by adaptive repeat: pip install numpy")
+        options = configs['repeat']
+        self.logger = logging.getLogger("Adaptive")
+        self.minimum = int(options.get('min', 2))
+        self.maximum = int(options['max'])
+        self.metric = options['metric']
+        if self.metric not in METRICS:
+            raise ValueError("Unknown metric of adaptive repeat: %s" % self.metric)
+        self.target = float(options['target'])
+        self.relative = options.get('relative', True)
+        self.outputdir = os.path.join(configs['workspace'], 'output')
+        self.manifest = manifest
+        self.lock = Lock()
+        self.candidates = {}
+        self.values = {}
+        self.started = {}
+        self.finished = {}
+        for job in expand_jobs(configs):
+            self.candidates.setdefault(job.argindex, []).append(job)
+            self.values.setdefault(job.argindex, [])
+            self.started.setdefault(job.argindex, 0)
+            self.finished.setdefault(job.argindex, 0)
+
+    def measure(self, job):
+        """
+        Parse the output of a finished job and compute its metric.
+
+        returns: metric value of the run, or None if it has no data
+        """
+        path = find_output(os.path.join(self.outputdir, job.outputfile))
+        if path is None:
+            return None
+        _, rows = parse_file((0, path, os.path.join(self.outputdir, job.meshfile),
+                              os.path.join(self.outputdir, job.statsfile)))
+        store = ResultStore()
+        store.add('jobs', [job_row(0, job)])
+        for table, table_rows in rows.items():
+            store.add(table, table_rows)
+        if METRICS[self.metric][0] == 'convergence':
+            analyze(store)
+        _, values = store.run_values(self.metric)
+        return float(values[0]) if len(values) else None
+
+    def converged(self, argindex):
+        """
+        Whether an argument needs no more repeats.
+        """
+        values = self.values[argindex]
+        n = len(values)
+        if self.started[argindex] >= self.maximum:
+            return True
+        if n < max(self.minimum, 2):
+            return False
+        width = t95(n - 1) * np.std(values, ddof=1) / np.sqrt(n)
+        target = self.target * abs(np.mean(values)) if self.relative else self.target
+        return width <= target
+
+    def take(self, argindex, count):
+        """
+        Start up to `count` new repeats of an argument.
+        """
+        jobs = []
+        while len(jobs) < count and self.candidates[argindex] \
+                and self.started[argindex] < self.maximum:
+            jobs.append(self.candidates[argindex].pop(0))
+            self.started[argindex] += 1
+        return jobs
+
+    def initial(self):
+        """
+        Get the first jobs to run. Repeats completed by a previous run are
+        measured instead of run again.
+
+        returns: list of Job
+        """
+        jobs = []
+        with self.lock:
+            for argindex in sorted(self.candidates):
+                if self.manifest is not None:
+                    completed = [job for job in self.candidates[argindex]
+                                 if self.manifest.completed(job)]
+                    for job in completed:
+                        self.candidates[argindex].remove(job)
+                        self.started[argindex] += 1
+                        self.finished[argindex] += 1
+                        value = self.measure(job)
+                        if value is not None:
+                            self.values[argindex].append(value)
+                if not self.converged(argindex):
+                    missing = max(self.minimum - len(self.values[argindex]), 1)
+                    jobs.extend(self.take(argindex, missing))
+        return jobs
+
+    def next(self, job, value):
+        """
+        Record the metric of a finished job and decide the repeats to add.
+
+        Args:
+            job (Job): the finished job.
+            value (float): its metric value, None if it failed or has no data.
+
+        returns: list of Job
+        """
+        argindex = job.argindex
+        with self.lock:
+            self.finished[argindex] += 1
+            if value is not None:
+                self.values[argindex].append(value)
+            if self.converged(argindex):
+                self.logger.debug("Argument %d done after %d repeats", argindex,
+                                  self.started[argindex])
+                return []
+            missing = self.minimum - len(self.values[argindex])
+            if missing > 0:
+                # repeats still running may complete the minimum
+                running = self.started[argindex] - self.finished[argindex]
+                return self.take(argindex, missing - running)
+            return self.take(argindex, 1)
+
+    def summary(self):
+        """
+        returns: dict mapping argument index to (repeats, mean, ci95 half width)
+        """
+        summary = {}
+        with self.lock:
+            for argindex, values in self.values.items():
+                n = len(values)
+                mean = float(np.mean(values)) if n else float('nan')
+                width = float(t95(n - 1) * np.std(values, ddof=1) / np.sqrt(n)) \
+                    if n > 1 else float('nan')
+                summary[argindex] = (self.started[argindex], mean, width)
+        return summary
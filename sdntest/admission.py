@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+import os
+import json
+import math
+import logging
+from threading import Lock, Condition
+
+# Default footprint of each kind of container: (memory MB, cpus).
+FOOTPRINTS = {
+    'odl': (3072, 2),
+    'onos': (2048, 2),
+    'mininet': (1024, 1)
+}
+
+def available_memory():
+    """
+    Get the memory available on the local host, in MB.
+
+    returns: MB, or None if unknown (e.g. not Linux)
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024.
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+class FootprintHistory(object):
+    """
+    Peak memory and mean cpu usage of previous runs per kind of container,
+    recorded in the output directory.
+    """
+
+    FILENAME = 'footprints.json'
+    # number of recent runs an estimate is based on
+    WINDOW = 20
+
+    def __init__(self, outputdir, margin=1.2):
+        """
+        Args:
+            outputdir (str): output directory of the testcase.
+            margin (float): factor applied to the recorded peaks.
+        """
+        self.path = os.path.join(outputdir, self.FILENAME)
+        self.margin = margin
+        self.lock = Lock()
+        self.footprints = {}
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                self.footprints = json.load(f)
+
+    def estimate(self, kind):
+        """
+        Estimate the footprint of a kind of container.
+
+        returns: (memory MB, cpus)
+        """
+        with self.lock:
+            records = self.footprints.get(kind, {})
+            memory = records.get('memory', [])[-self.WINDOW:]
+            cpu = records.get('cpu', [])[-self.WINDOW:]
+        default_memory, default_cpu = FOOTPRINTS.get(kind, FOOTPRINTS['mininet'])
+        return (max(memory) * self.margin if memory else default_memory,
+                max(cpu) * self.margin if cpu else default_cpu)
+
+    def record(self, kind, memory, cpu):
+        """
+        Record the peak memory (MB) and mean cpu (cores) of a container.
+        """
+        if memory != memory or cpu != cpu:
+            # NaN, the container could not be sampled
+            return
+        with self.lock:
+            records = self.footprints.setdefault(kind, {'memory': [], 'cpu': []})
+            records['memory'] = (records['memory'] + [memory])[-self.WINDOW:]
+            records['cpu'] = (records['cpu'] + [cpu])[-self.WINDOW:]
+
+    def save(self):
+        """
+        Atomically write the recorded footprints back to the output directory.
+        """
+        with self.lock:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            tmpfile = self.path + '.tmp'
+            with open(tmpfile, 'w') as f:
+                json.dump(self.footprints, f, indent=2, sort_keys=True)
+            os.rename(tmpfile, self.path)
+
+class AdmissionController(object):
+    """
+    Admit a controller/mininet pair only when the docker host has room for
+    it, and give each admitted pair its own cpus and a memory limit.
+
+    Capacity is the cpus and memory of the docker host minus a reserve for
+    the runner itself. When the runner shares the host with the docker
+    daemon, the memory currently available is checked too, so that load
+    from outside the testcase delays admission; the memory of a remote
+    host is only bounded by its capacity. At least one pair is always
+    admitted.
+    """
+
+    def __init__(self, client, history, platform='odl', reserve_memory=1024,
+                 reserve_cpus=1, pin=True, limit_factor=1.5, poll=5, local=True):
+        """
+        Args:
+            client: docker client.
+            history (FootprintHistory): footprints of previous runs.
+            platform (str): 'odl' or 'onos'.
+            reserve_memory (int): MB of memory left to the host.
+            reserve_cpus (int): cpus left to the host, the first ones.
+            pin (bool): pin the containers of each pair to dedicated cpus.
+            limit_factor (float): memory limit of a container relative to
+                its estimated footprint.
+            poll (float): seconds between two checks of available memory.
+            local (bool): the docker daemon runs on this machine, whose
+                available memory is then checked.
+        """
+        self.logger = logging.getLogger("Admission")
+        self.history = history
+        self.platform = platform
+        self.pin = pin
+        self.limit_factor = limit_factor
+        self.poll = poll
+        self.local = local
+        info = client.info()
+        self.cpus = int(info['NCPU'])
+        self.memory = info['MemTotal'] / 2. ** 20 - reserve_memory
+        self.free_cpus = list(range(min(reserve_cpus, self.cpus - 1), self.cpus))
+        self.capacity_cpus = len(self.free_cpus)
+        self.used_memory = 0.
+        self.admitted = 0
+        self.cond = Condition()
+
+    def footprint(self):
+        """
+        Estimate the footprint of one controller/mininet pair.
+
+        returns: dict mapping kind to (memory MB, cpus)
+        """
+        return {
+            'controller': self.history.estimate(self.platform),
+            'mininet': self.history.estimate('mininet')
+        }
+
+    def auto_parallel(self):
+        """
+        Get the number of pairs the host can run concurrently.
+        """
+        footprint = self.footprint()
+        memory = sum(m for m, _ in footprint.values())
+        cpus = sum(int(math.ceil(c)) for _, c in footprint.values())
+        parallel = max(1, int(min(self.memory // memory, self.capacity_cpus // cpus)))
+        self.logger.info("Host has %d cpus and %.0f MB for testcases, a pair needs "
+                         "%d cpus and %.0f MB: running %d in parallel",
+                         self.capacity_cpus, self.memory, cpus, memory, parallel)
+        return parallel
+
+    def pool_limit(self, parallel):
+        """
+        Get the number of controllers a pool may keep alive, booted ahead or
+        in use, so that they fit in memory next to the mininets of the
+        workers. Controllers booted ahead are not bound to a job, so they
+        are not admitted one by one.
+
+        Args:
+            parallel (int): number of workers of the host.
+        """
+        footprint = self.footprint()
+        memory = self.memory - parallel * footprint['mininet'][0]
+        return max(parallel, int(memory // footprint['controller'][0]))
+
+    def fits(self, memory, cpus):
+        if not self.admitted:
+            return True
+        if self.used_memory + memory > self.memory:
+            return False
+        if self.pin and cpus > len(self.free_cpus):
+            return False
+        if not self.local:
+            return True
+        available = available_memory()
+        return available is None or available >= memory
+
+    def acquire(self):
+        """
+        Wait until a new pair fits on the host and reserve its resources.
+
+        returns: dict mapping kind ('controller', 'mininet') to the docker
+                 run options limiting the container
+        """
+        footprint = self.footprint()
+        memory = sum(m for m, _ in footprint.values())
+        with self.cond:
+            while not self.fits(memory, sum(int(math.ceil(c)) for _, c in footprint.values())):
+                self.cond.wait(self.poll)
+            slot = {}
+            for kind, (kind_memory, kind_cpus) in footprint.items():
+                options = {'mem_limit': '%dm' % int(kind_memory * self.limit_factor)}
+                count = min(int(math.ceil(kind_cpus)), len(self.free_cpus))
+                if self.pin and count:
+                    cpus, self.free_cpus = self.free_cpus[:count], self.free_cpus[count:]
+                    options['cpuset_cpus'] = ','.join('%d' % cpu for cpu in cpus)
+                slot[kind] = options
+            self.used_memory += memory
+            self.admitted += 1
+            slot['memory'] = memory
+            return slot
+
+    def release(self, slot):
+        """
+        Give back the resources of a pair.
+        """
+        with self.cond:
+            for kind in ('controller', 'mininet'):
+                cpus = slot[kind].get('cpuset_cpus')
+                if cpus:
+                    self.free_cpus = sorted(self.free_cpus + [int(cpu) for cpu in cpus.split(',')])
+            self.used_memory -= slot['memory']
+            self.admitted -= 1
+            self.cond.notify_all()
+
+    def record(self, usage):
+        """
+        Learn the footprint of a pair from its sampled usage.
+
+        Args:
+            usage (dict): kind to (peak memory MB, mean cpu cores).
+        """
+        for kind, (memory, cpu) in usage.items():
+            self.history.record(self.platform if kind == 'controller' else kind, memory, cpu)
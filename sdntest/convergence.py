@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def job_slices(jobs):
+    """
+    Map each job id to the (start, stop) slice of its rows in a job-sorted array.
+    """
+    ids, starts = np.unique(jobs, return_index=True)
+    stops = np.append(starts[1:], len(jobs))
+    return dict((int(job), (start, stop)) for job, start, stop in zip(ids, starts, stops))
+
+def ping_outage(times, seqs, start, stop, factor=5.):
+    """
+    Measure the largest interruption of a ping stream after an event.
+
+    Args:
+        times (array): reply timestamps of the run, sorted.
+        seqs (array): icmp sequence numbers of the replies.
+        start (float): time of the link event.
+        stop (float): time of the next event of the run.
+        factor (float): a gap counts as an outage when it is longer than
+            factor times the median inter-reply gap of the run.
+
+    returns: (outage seconds, lost packets, seconds from event to recovery)
+    """
+    lo = max(np.searchsorted(times, start) - 1, 0)
+    hi = np.searchsorted(times, stop, 'right')
+    window, seq = times[lo:hi], seqs[lo:hi]
+    if len(window) < 2:
+        return stop - start, -1, float('nan')
+    gaps = np.diff(window)
+    k = int(np.argmax(gaps))
+    if gaps[k] <= factor * np.median(np.diff(times)):
+        return 0., 0, 0.
+    return gaps[k], int(seq[k + 1] - seq[k] - 1), window[k + 1] - start
+
+def iperf_outage(ends, lengths, bandwidth, start, stop, threshold=.5):
+    """
+    Measure the interruption of an iperf stream after an event, at the
+    granularity of the iperf report interval.
+
+    Args:
+        ends (array): time each interval report was logged, sorted.
+        lengths (array): length of each interval in seconds.
+        bandwidth (array): throughput of each interval.
+        start (float): time of the link event.
+        stop (float): time of the next event of the run.
+        threshold (float): an interval is degraded below this fraction of
+            the median throughput before the event.
+
+    returns: (outage seconds, -1 as losses are unknown, seconds from event to recovery)
+    """
+    before = bandwidth[ends <= start]
+    if not len(before):
+        return float('nan'), -1, float('nan')
+    baseline = np.median(before)
+    window = (ends > start) & (ends - lengths < stop)
+    degraded = window & (bandwidth < threshold * baseline)
+    if not degraded.any():
+        return 0., -1, 0.
+    last = ends[degraded].max()
+    return lengths[degraded].sum(), -1, last - start
+
+def analyze(store, factor=5., threshold=.5):
+    """
+    Compute outage duration, lost packets and time-to-recovery around every
+    recorded link event, for all runs of a result store, and add them to
+    its 'convergence' table.
+
+    Args:
+        store (ResultStore): parsed results, with 'link' events.
+        factor (float): ping gap factor, see ping_outage().
+        threshold (float): iperf degradation threshold, see iperf_outage().
+
+    returns: number of analyzed events
+    """
+    if np is None:
+        raise ImportError("NumPy is required to analyze results: pip install numpy")
+    links = store.table('link')
+    if not len(links['job']):
+        return 0
+
+    ping = store.table('ping')
+    order = np.lexsort((ping['time'].astype(float), ping['job'].astype(int)))
+    ping_jobs = ping['job'][order].astype(int)
+    ping_times = ping['time'][order].astype(float)
+    ping_seqs = ping['seq'][order].astype(int)
+    ping_slices = job_slices(ping_jobs)
+
+    iperf = store.table('iperf')
+    keep = iperf['report'] == 0 if len(iperf['job']) else np.array([], dtype=bool)
+    order = np.lexsort((iperf['time'][keep].astype(float), iperf['job'][keep].astype(int)))
+    iperf_jobs = iperf['job'][keep][order].astype(int)
+    iperf_ends = iperf['time'][keep][order].astype(float)
+    iperf_lengths = (iperf['end'][keep] - iperf['start'][keep])[order].astype(float)
+    iperf_bandwidth = iperf['bandwidth'][keep][order].astype(float)
+    iperf_slices = job_slices(iperf_jobs)
+
+    order = np.lexsort((links['time'].astype(float), links['job'].astype(int)))
+    jobs = links['job'][order].astype(int)
+    times = links['time'][order].astype(float)
+    actions = links['action'][order]
+    # an event is analyzed until the next event of the same run
+    stops = np.append(times[1:], np.inf)
+    stops[np.append(jobs[1:] != jobs[:-1], True)] = np.inf
+
+    rows = []
+    for job, start, stop, action in zip(jobs, times, stops, actions):
+        if job in ping_slices:
+            lo, hi = ping_slices[job]
+            outage, lost, recovery = ping_outage(ping_times[lo:hi], ping_seqs[lo:hi],
+                                                 start, min(stop, ping_times[hi - 1]), factor)
+        elif job in iperf_slices:
+            lo, hi = iperf_slices[job]
+            outage, lost, recovery = iperf_outage(iperf_ends[lo:hi], iperf_lengths[lo:hi],
+                                                  iperf_bandwidth[lo:hi], start,
+                                                  min(stop, iperf_ends[hi - 1]), threshold)
+        else:
+            continue
+        rows.append((int(job), str(action), float(start), float(outage), int(lost), float(recovery)))
+    store.add('convergence', rows)
+    return len(rows)
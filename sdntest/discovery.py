@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+
+"""
+Host discovery and reachability helpers shared by network workflows.
+
+This module only depends on the standard library, so that workflows can
+import it from inside the mininet container. Hosts are mininet nodes.
+"""
+
+from time import time, sleep
+from subprocess import PIPE
+
+# File a workflow saves the reachability matrix of a job in, inside the
+# output directory.
+REACH_FILE = 'reach.%s.npz'
+
+def known_hosts(client):
+    """
+    Get the MAC addresses of the hosts known by the controller.
+
+    Args:
+        client (RestClient): REST client of the controller.
+
+    returns: set of lower-case MAC addresses
+    """
+    if 'onos' == client.platform:
+        content = client.get('/onos/v1/hosts')
+        return set(host.get('mac', '').lower() for host in content.get('hosts', []))
+
+    status, content = client.request(
+        'GET', '/restconf/operational/network-topology:network-topology/topology/flow:1')
+    if status != 200 or not isinstance(content, dict):
+        return set()
+    macs = set()
+    for topology in content.get('topology', []):
+        for node in topology.get('node', []):
+            node_id = node.get('node-id', '')
+            if node_id.startswith('host:'):
+                macs.add(node_id[len('host:'):].lower())
+    return macs
+
+def run_batched(commands, batch):
+    """
+    Run (host, command) pairs with at most `batch` processes at a time.
+
+    returns: list of the standard outputs, in the order of the commands
+    """
+    outputs = [None] * len(commands)
+    running = []
+
+    def collect():
+        index, proc = running.pop(0)
+        outputs[index] = proc.communicate()[0]
+
+    for index, (host, command) in enumerate(commands):
+        running.append((index, host.popen(command, stdout=PIPE, stderr=PIPE,
+                                          universal_newlines=True)))
+        if len(running) >= batch:
+            collect()
+    while running:
+        collect()
+    return outputs
+
+def announce(hosts, neighbors, batch=64, wait=1):
+    """
+    Make hosts send traffic, so that the controller learns them from the
+    ARP requests they broadcast.
+
+    Args:
+        hosts (list): hosts to announce.
+        neighbors (list): hosts the announced ones send a probe to.
+        batch (int): maximum number of concurrent probes.
+        wait (int): seconds a probe waits for a reply.
+    """
+    position = dict((host.name, i) for i, host in enumerate(neighbors))
+    commands = []
+    for host in hosts:
+        target = neighbors[(position[host.name] + 1) % len(neighbors)]
+        commands.append((host, ['ping', '-n', '-c1', '-W%d' % wait, target.IP()]))
+    run_batched(commands, batch)
+
+def discover(client, hosts, timeout=30, interval=0.5, batch=64):
+    """
+    Announce hosts until the controller knows all of them.
+
+    Hosts are announced in bounded-parallel batches; every round only
+    announces the hosts still missing from the host table.
+
+    Args:
+        client (RestClient): REST client of the controller.
+        hosts (list): hosts of the network.
+        timeout (float): maximum seconds to wait.
+        interval (float): seconds between two lookups of the host table.
+        batch (int): maximum number of concurrent probes.
+
+    returns: list of the hosts unknown to the controller
+    """
+    deadline = time() + timeout
+    missing = list(hosts)
+    while True:
+        announce(missing, hosts, batch)
+        try:
+            known = known_hosts(client)
+        except Exception:
+            known = set()
+        missing = [host for host in missing if host.MAC().lower() not in known]
+        if not missing or time() >= deadline:
+            return missing
+        sleep(interval)
+
+def has_fping(host):
+    """
+    Whether fping is available on the host.
+    """
+    return bool(host.cmd('which fping').strip())
+
+def probe_command(targets, wait=1, fping=False):
+    """
+    Build a command probing targets at once and printing the alive ones,
+    one '<ip> <rtt ms>' line each.
+    """
+    if fping:
+        return ['fping', '-a', '-e', '-r0', '-t%d' % (wait * 1000)] + list(targets)
+    script = ('for ip in %s; do '
+              '(rtt=$(ping -n -c1 -W%d $ip 2>/dev/null | '
+              'sed -n "s/.*time=\\([0-9.]*\\) ms.*/\\1/p"); '
+              '[ -n "$rtt" ] && echo $ip $rtt) & '
+              'done; wait' % (' '.join(targets), wait))
+    return ['sh', '-c', script]
+
+def parse_alive(out):
+    """
+    Parse the output of a probe command.
+
+    returns: dict mapping alive ip to rtt in ms
+    """
+    alive = {}
+    for line in out.splitlines():
+        # fping -e prints '<ip> (<rtt> ms)'
+        fields = line.replace('(', ' ').split()
+        if not fields:
+            continue
+        try:
+            alive[fields[0]] = float(fields[1])
+        except (IndexError, ValueError):
+            alive[fields[0]] = float('nan')
+    return alive
+
+def probe(hosts, targets, batch=32, wait=1):
+    """
+    Probe the targets of every host once.
+
+    Args:
+        hosts (list): source hosts.
+        targets (list): list of target ips of each source host.
+        batch (int): maximum number of source hosts probing at a time.
+        wait (int): seconds a probe waits for a reply.
+
+    returns: list of dicts mapping the alive targets of each host to rtt in ms
+    """
+    fping = has_fping(hosts[0]) if hosts else False
+    commands = [(host, probe_command(ips, wait, fping))
+                for host, ips in zip(hosts, targets)]
+    return [parse_alive(out) for out in run_batched(commands, batch)]
+
+class Reachability(object):
+    """
+    All-pairs reachability matrix, one byte per (source, target) pair.
+    """
+
+    def __init__(self, sources, targets):
+        self.sources = sources
+        self.targets = targets
+        self.matrix = bytearray(len(sources) * len(targets))
+
+    def set(self, i, j):
+        self.matrix[i * len(self.targets) + j] = 1
+
+    def get(self, i, j):
+        return self.matrix[i * len(self.targets) + j] == 1
+
+    def row(self, i):
+        """
+        Reachability of the targets from source i, as a bytearray.
+        """
+        size = len(self.targets)
+        return self.matrix[i * size:(i + 1) * size]
+
+    @property
+    def reachable(self):
+        return self.matrix.count(b'\x01')
+
+    @property
+    def total(self):
+        return len(self.matrix)
+
+    def save(self, path):
+        """
+        Save the matrix as an NPZ archive with 'reachable' (source x target,
+        1 if reachable) and 'src' and 'dst' arrays.
+        """
+        # sdntest.mesh builds on this module
+        from sdntest.mesh import npy, strings, save_npz
+        save_npz(path, {
+            'reachable': npy('|u1', (len(self.sources), len(self.targets)), bytes(self.matrix)),
+            'src': strings(self.sources),
+            'dst': strings(self.targets)
+        })
+
+def reachability(hosts, batch=32, wait=1):
+    """
+    Measure all-pairs reachability between hosts. Every host probes all
+    others at once, with at most `batch` hosts probing at a time.
+
+    returns: Reachability, a host always reaches itself
+    """
+    ips = [host.IP() for host in hosts]
+    result = Reachability(ips, ips)
+    targets = [[ip for ip in ips if ip != own] for own in ips]
+    index = dict((ip, j) for j, ip in enumerate(ips))
+    for i, alive in enumerate(probe(hosts, targets, batch, wait)):
+        result.set(i, i)
+        for ip in alive:
+            if ip in index:
+                result.set(i, index[ip])
+    return result
@@ -6,45 +6,38 @@ Test host-to-host intent and link failure recovery.
 
 import os
 import sys
-import json
 import logging
 
 from mininet.net import Mininet
-from mininet.node import Node, RemoteController
+from mininet.node import RemoteController
 from triangle import TriangleStarTopo
 from mininet.log import info, output, setLogLevel, lg
-
-from select import poll, POLLIN
-from time import time, sleep
-from subprocess import Popen, PIPE
-from threading import Thread
-
-class linkconfig(Thread):
-    def __init__(self, net, src, dst, action, timeout):
-        Thread.__init__(self)
-        self.net = net
-        self.src = src
-        self.dst = dst
-        self.action = action
-        self.timeout = timeout
-
-    def run(self):
-        info( '*** Create a future task: config link between %s and %s %s after %.2f sec\n' % (self.src, self.dst, self.action, self.timeout) )
-        sleep(self.timeout)
-        info( '*** Config link (%s, %s) %s\n' % (self.src, self.dst, self.action.upper()) )
-        self.net.configLinkStatus( self.src, self.dst, self.action )
-
-def hostdiscovery( net ):
-    "Start quick ping between pairs to make controller discover hosts"
-    hosts = net.hosts
-    hostNum = len(hosts)
-    pings = []
-
-    for i in range( (hostNum + 1)/2 ):
-        ping_cmd = ['ping', '-n', '-i0.001', '-c4', hosts[(2*i+1)%hostNum].IP()]
-        pings.append( hosts[2*i].popen( ping_cmd, stdout=PIPE, stderr=PIPE ) )
-    for ping in pings:
-        ping.wait()
+from sdntest.rest import RestClient
+from sdntest.intents import onos_h2h_intent, odl_h2h_intent, submit_intents, watch_intents
+from sdntest.discovery import discover, reachability, REACH_FILE
+from sdntest.timeline import Timeline, load_timeline
+
+from time import time, gmtime
+from subprocess import PIPE
+
+def hostdiscovery( client, net, timeout=30 ):
+    "Announce hosts until the controller has discovered all of them"
+    started = time()
+    missing = discover( client, net.hosts, timeout )
+    output( '*** Discovered %d/%d hosts in %.3f s\n' %
+            ( len(net.hosts) - len(missing), len(net.hosts), time() - started ) )
+    return not missing
+
+def checkreachability( net ):
+    "Measure all-pairs reachability between hosts and save the matrix"
+    started = time()
+    result = reachability( net.hosts )
+    output( '*** Reachable %d/%d host pairs in %.3f s\n' %
+            ( result.reachable, result.total, time() - started ) )
+    if 'SDNTEST_OUTPUT' in os.environ:
+        result.save( os.path.join( os.environ[ 'SDNTEST_OUTPUT' ],
+                                   REACH_FILE % os.environ.get( 'SDNTEST_JOB', '0' ) ) )
+    return result
 
 def startping( host, targetip, timeout ):
     "Tell host to repeatedly ping targets"
@@ -53,8 +46,8 @@ def startping( host, targetip, timeout ):
     # time_for_hostprovider = 10
     # timeout += time_for_hostprovider
 
-    # Simple ping loop
-    cmd = ['ping', '-n', '-i0.001', '-w%d' % timeout, targetip]
+    # Simple ping loop, with reply timestamps for convergence analysis
+    cmd = ['ping', '-D', '-n', '-i0.001', '-w%d' % timeout, targetip]
 
     info( '*** Host %s (%s) will be pinging ips: %s\n' %
             ( host.name, host.IP(), targetip ) )
@@ -93,68 +86,53 @@ def startiperf( server, client, timeout, rate ):
 
     return server_proc, client_proc
 
-def h2hintent( controller, host1, host2, platform="odl" ):
-    "Add host-to-host intent."
-    # TODO: use urllib to replace popen curl
-
-    intent = ""
-    cmd = ""
-
+def h2hintent( host1, host2, platform="odl" ):
+    "Build host-to-host intent."
     if "odl" == platform:
-        mac1 = host1.MAC().split(':')
-        mac2 = host2.MAC().split(':')
-        uuid = ''.join(mac1[:4]) + '-' + ''.join(mac1[4:]) \
-               + '-0000-0000-' + ''.join(mac2)
-
-        intent = json.dumps({
-            'intent:intent': {
-                'intent:id': uuid,
-                'intent:actions': [{'order': 2, 'allow': {}}],
-                'intent:subjects': [
-                    {'order': 1, 'end-point-group': {'name': host1.IP()}},
-                    {'order': 2, 'end-point-group': {'name': host2.IP()}}
-                ]
-            }
-        })
-        cmd = ( 'curl -v -u admin:admin -X PUT '
-                '-H "Content-type: application/json" '
-                '-d \'%s\' ' % intent.strip() +
-                'http://%s:8181/restconf/config/intent:intents/intent/%s' % (controller, uuid) )
+        return odl_h2h_intent( host1.MAC(), host2.MAC(), host1.IP(), host2.IP() )
     elif "onos" == platform:
-        intent = json.dumps({
-            'type': 'HostToHostIntent',
-            'id': '0x0',
-            'appId': 'org.onosproject.cli',
-            'one': host1.MAC() + '/-1',
-            'two': host2.MAC() + '/-1'
-        })
-        cmd = ( 'curl -v -u onos:rocks -X POST '
-                '-H "Content-type: application/json" '
-                '-d \'%s\' ' % intent.strip() +
-                'http://%s:8181/onos/v1/intents' % controller )
-    else:
-        return None
-
-    info( '*** Create intent: %s\n' % intent.strip() )
+        return onos_h2h_intent( host1.MAC(), host2.MAC() )
+    return None
 
-    # os.system( cmd )
-    return Popen( cmd.split(), stdout=PIPE, stderr=PIPE )
-
-def h2hintents( controller, hostGroup1, hostGroup2, platform="odl" ):
-    for host1 in hostGroup1:
-        for host2 in hostGroup2:
-            success = h2hintent( controller, host1, host2, platform )
-            if not success:
-                return success
-    return True
-
-def test( controller, branch=1, hop=1, seconds=10, intentNum=1, method='ping', platform='odl', rate=100 ):
+def h2hintents( client, hostGroup1, hostGroup2, platform="odl" ):
+    "Submit host-to-host intents between two host groups through the REST API."
+    if platform not in ( "odl", "onos" ):
+        return None
+    intents = [ h2hintent( host1, host2, platform )
+                for host1 in hostGroup1 for host2 in hostGroup2 ]
+    started = time()
+    submit_intents( client, intents )
+    failed = [ intent for intent in intents if not intent.ok ]
+    output( '*** Submitted %d intents in %.3f s, %d failed\n' %
+            ( len(intents), time() - started, len(failed) ) )
+    return None if failed else intents
+
+def waitintents( client, intents, timeout=60 ):
+    "Wait for intents to be installed and report their latencies."
+    started = time()
+    success = watch_intents( client, intents, timeout )
+    elapsed = time() - started
+    for intent in intents:
+        install = intent.install_latency
+        output( '*** Intent %s %s: status %s, submitted in %.3f ms, installed in %s ms\n' %
+                ( intent.key, intent.state, intent.status, intent.latency * 1000,
+                  '%.3f' % ( install * 1000 ) if install is not None else 'nan' ) )
+    installed = [ intent for intent in intents if intent.installed is not None ]
+    output( '*** Installed %d/%d intents in %.3f s\n' %
+            ( len(installed), len(intents),
+              max( intent.install_latency for intent in installed ) if installed else elapsed ) )
+    return success
+
+def test( controller, branch=1, hop=1, seconds=10, intentNum=1, method='ping', platform='odl', rate=100,
+          intentTimeout=60, checkReach=0 ):
     "Add host-to-host intent from controller and keep ping hosts."
     branch = int(branch)
     hop = int(hop)
     seconds = int(seconds)
     intentNum = int(intentNum)
     rate = int(rate)
+    intentTimeout = float(intentTimeout)
+    checkReach = int(checkReach)
 
     # Create network
     topo = TriangleStarTopo( branch, hop )
@@ -176,19 +154,24 @@ def test( controller, branch=1, hop=1, seconds=10, intentNum=1, method='ping', p
     core2 = net.get('s2')
 
     # Add host-to-host intent
-    success = h2hintents( controller, hostGroup1, hostGroup2, platform )
-    if not success:
-        info( '*** Unknown test platform. End up the test...\n')
+    client = RestClient( platform, controller, connections=8 )
+    intents = h2hintents( client, hostGroup1, hostGroup2, platform )
+    if not intents:
+        info( '*** Unknown test platform or intents rejected. End up the test...\n')
+        client.close()
         net.stop()
         return
 
-    # TODO: This is just a temporal solution. Need to be refined.
-    # Waiting for feature loaded
-    # sleep( 3 )
-
-    hostdiscovery( net )
-    # Platform may need some time to discover hosts
-    sleep( 10 )
+    if not hostdiscovery( client, net ):
+        info( '*** Some hosts are not discovered by the controller\n' )
+    # Platform compiles intents once it has discovered the hosts
+    if not waitintents( client, intents, intentTimeout ):
+        info( '*** Some intents are not installed after %.1f sec\n' % intentTimeout )
+    client.close()
+    # All-pairs pings take long on large topologies and add traffic before
+    # the measurement, only check reachability when asked to
+    if checkReach:
+        checkreachability( net )
 
     # Start ping
     if 'ping' == method:
@@ -205,18 +188,13 @@ def test( controller, branch=1, hop=1, seconds=10, intentNum=1, method='ping', p
         net.stop()
         return
 
-    timeout = seconds / 3.
-    # Emulate link failure
-    linkconfig( net, core1.name, core2.name, 'down', seconds/3. ).start()
-    # output( '*** Create a future task: config link between %s and %s %s after %.2f sec\n' % (core1.name, core2.name, 'down', timeout) )
-    # sleep( timeout )
-    # net.configLinkStatus( core1.name, core2.name, 'down' )
-
-    # Recover link
-    linkconfig( net, core1.name, core2.name, 'up', 2*seconds/3. ).start()
-    # output( '*** Create a future task: config link between %s and %s %s after %.2f sec\n' % (core1.name, core2.name, 'up', timeout) )
-    # sleep( timeout )
-    # net.configLinkStatus( core1.name, core2.name, 'up' )
+    # Emulate faults, by default a failure and recovery of a core link
+    events = load_timeline( [
+        { 'at': seconds/3., 'action': 'link', 'src': core1.name, 'dst': core2.name, 'state': 'down' },
+        { 'at': 2*seconds/3., 'action': 'link', 'src': core1.name, 'dst': core2.name, 'state': 'up' }
+    ] )
+    timeline = Timeline( net, events, controller, output )
+    timeline.start()
 
     # Monitor output
     for line in iter(proc.stdout.readline, ""):
@@ -226,12 +204,15 @@ def test( controller, branch=1, hop=1, seconds=10, intentNum=1, method='ping', p
 
     # Stop pings
     proc.kill()
+    timeline.join()
 
     net.stop()
 
 
 if __name__ == '__main__':
     formatter = logging.Formatter('%(asctime)s | %(message)s')
+    # UTC timestamps, comparable with the epoch times of link events
+    formatter.converter = gmtime
     lg.handlers[-1].setFormatter( formatter )
     setLogLevel( 'output' )
     assert len(sys.argv) > 1
@@ -4,12 +4,14 @@
 Fork from mininet/examples/multiping.py
 """
 
+import os
 import sys
 
 from mininet.net import Mininet
 from mininet.node import Node, RemoteController
 from mininet.topo import SingleSwitchTopo
 from mininet.log import info, setLogLevel
+from sdntest.mesh import PingMesh, MESH_FILE
 
 from select import poll, POLLIN
 from time import time
@@ -37,8 +39,11 @@ def startpings( host, targetips ):
 
     host.cmd( cmd )
 
-def multiping( controller, netsize, chunksize, seconds):
+def multiping( controller, netsize=12, chunksize=4, seconds=10, mode='text' ):
     "Ping subsets of size chunksize in net of size netsize"
+    netsize = int(netsize)
+    chunksize = int(chunksize)
+    seconds = int(seconds)
 
     # Create network and identify subnets
     topo = SingleSwitchTopo( netsize )
@@ -50,6 +55,27 @@ def multiping( controller, netsize, chunksize, seconds):
     hosts = net.hosts
     subnets = chunks( hosts, chunksize )
 
+    # Each host pings the hosts of its subnet
+    targets = []
+    for subnet in subnets:
+        ips = [ host.IP() for host in subnet ]
+        #adding bogus to generate packet loss
+        ips.append( '10.0.0.200' )
+        targets.extend( [ ips ] * len( subnet ) )
+
+    if 'mesh' == mode:
+        # Keep results in arrays and save them, instead of logging every probe
+        mesh = PingMesh( hosts, targets )
+        mesh.run( seconds )
+        path = os.path.join( os.environ.get( 'SDNTEST_OUTPUT', '.' ),
+                             MESH_FILE % os.environ.get( 'SDNTEST_JOB', '0' ) )
+        mesh.save( path )
+        probes, lost = mesh.summary()
+        info( '*** Ping mesh: %d rounds, %d probes, %d lost, saved in %s\n' %
+              ( mesh.rounds, probes, lost, path ) )
+        net.stop()
+        return
+
     # Create polling object
     fds = [ host.stdout.fileno() for host in hosts ]
     poller = poll()
@@ -57,12 +83,8 @@ def multiping( controller, netsize, chunksize, seconds):
         poller.register( fd, POLLIN )
 
     # Start pings
-    for subnet in subnets:
-        ips = [ host.IP() for host in subnet ]
-        #adding bogus to generate packet loss
-        ips.append( '10.0.0.200' )
-        for host in subnet:
-            startpings( host, ips )
+    for host, ips in zip( hosts, targets ):
+        startpings( host, ips )
 
     # Monitor output
     endTime = time() + seconds
@@ -81,5 +103,5 @@ def multiping( controller, netsize, chunksize, seconds):
 
 if __name__ == '__main__':
     setLogLevel( 'info' )
-    assert len(sys.argv) == 2
-    multiping( sys.argv[1], netsize=12, chunksize=4, seconds=10 )
+    assert len(sys.argv) > 1
+    multiping( sys.argv[1], *sys.argv[2:] )
@@ -33,3 +33,75 @@ class WorkspaceException(Exception):
                 return "Unknown reason exception occurred in workspace %s" % self.workspace
         else:
             return "Missing workspace. You need to set a experiment workspace directory to run the testcase."
+
+class ReadinessException(Exception):
+    """
+    When the controller does not become ready before the deadline,
+    this exception will be raised.
+    """
+    def __init__(self, what, timeout):
+        self.what = what
+        self.timeout = timeout
+
+    def __str__(self):
+        return "%s is not ready after %.1f seconds." % (self.what, self.timeout)
+
+class PoolException(Exception):
+    """
+    When the controller pool is unable to provide a container,
+    this exception will be raised.
+    """
+    def __init__(self, key, reason):
+        self.key = key
+        self.reason = reason
+
+    def __str__(self):
+        return "No controller available for %s: %s" % (self.key, self.reason)
+
+class ImageException(Exception):
+    """
+    When a docker image required by the testcase cannot be prepared,
+    this exception will be raised.
+    """
+    def __init__(self, image, reason):
+        self.image = image
+        self.reason = reason
+
+    def __str__(self):
+        return "Unable to prepare image %s: %s" % (self.image, self.reason)
+
+class WorkflowException(Exception):
+    """
+    When the network workflow exits with a non-zero status,
+    this exception will be raised.
+    """
+    def __init__(self, command, exit_code):
+        self.command = command
+        self.exit_code = exit_code
+
+    def __str__(self):
+        return "Workflow '%s' exited with status %d" % (self.command, self.exit_code)
+
+class AbortException(Exception):
+    """
+    When the testcase is interrupted while a job is running,
+    this exception will be raised.
+    """
+    def __init__(self, job):
+        self.job = job
+
+    def __str__(self):
+        return "Job %s has been aborted." % (self.job.name if self.job is not None else '')
+
+class RestException(Exception):
+    """
+    When the controller answers a REST request with an unexpected status,
+    this exception will be raised.
+    """
+    def __init__(self, method, path, status):
+        self.method = method
+        self.path = path
+        self.status = status
+
+    def __str__(self):
+        return "%s %s failed with status %d" % (self.method, self.path, self.status)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+import os
+import io
+import tarfile
+import logging
+import docker
+
+from sdntest.preflight import ImagePreparer
+
+class DockerHost(object):
+    """
+    A docker daemon jobs are run on. Each host has its own image preparer,
+    and optionally its own controller pool and admission controller, so
+    that the controller and the mininet of a job always run on the same
+    host and the controller address stays reachable from mininet.
+
+    Remote hosts cannot bind mount the local workspace: the workflow files
+    are copied into each mininet container, and the result files the
+    workflow writes are copied back into the local output directory.
+    Controllers of remote hosts are probed through their container, and
+    pooled ones are used once instead of being reset through their REST API.
+    """
+
+    def __init__(self, name, client, parallel=1, local=True):
+        """
+        Args:
+            name (str): name of the host, used in logs.
+            client: docker client of the host.
+            parallel (int or 'auto'): number of jobs run concurrently.
+            local (bool): the daemon runs on this machine and shares its
+                filesystem.
+        """
+        self.name = name
+        self.client = client
+        self.parallel = parallel
+        self.local = local
+        self.images = ImagePreparer(client)
+        self.pool = None
+        self.admission = None
+
+    def __repr__(self):
+        return 'DockerHost(%s)' % self.name
+
+def connect(entry):
+    """
+    Build the docker client of a host entry.
+
+    Args:
+        entry (dict): host entry of the testcase configuration.
+    """
+    tls = entry.get('tls', False)
+    if isinstance(tls, dict):
+        tls_configs = dict(tls)
+        if 'client_cert' in tls_configs:
+            tls_configs['client_cert'] = tuple(tls_configs['client_cert'])
+        tls = docker.tls.TLSConfig(**tls_configs)
+    return docker.DockerClient(base_url=entry['url'], tls=tls,
+                               timeout=entry.get('timeout', 120))
+
+def load_hosts(configs, connect=connect):
+    """
+    Build the docker hosts of a testcase from its "hosts" list, e.g.
+
+        "hosts": [
+            {"url": "unix:///var/run/docker.sock", "parallel": 2},
+            {"url": "tcp://10.0.0.2:2376", "parallel": 4, "name": "rack2",
+             "tls": {"ca_cert": "ca.pem", "client_cert": ["cert.pem", "key.pem"]}}
+        ]
+
+    Args:
+        configs (dict): json object of testcase configuration file.
+        connect (callable): builds the docker client of a host entry, may
+            be replaced by fake clients in tests.
+
+    returns: list of DockerHost, the local daemon alone when the testcase
+             has no "hosts"
+    """
+    if not configs.get('hosts'):
+        return [DockerHost('local', docker.from_env(), configs.get('parallel', 1))]
+    hosts = []
+    for index, entry in enumerate(configs['hosts'], 1):
+        if not isinstance(entry, dict):
+            entry = {'url': entry}
+        url = entry.get('url') or ''
+        local = entry.get('local', not url or url.startswith('unix://'))
+        hosts.append(DockerHost(entry.get('name', url or 'host%d' % index),
+                                connect(entry) if url else docker.from_env(),
+                                entry.get('parallel', 1), local))
+    return hosts
+
+def archive_workspace(workspace, package_dir):
+    """
+    Pack the workspace and the sdntest package for a remote container.
+    The output directory of the workspace is created empty.
+
+    Args:
+        workspace (str): workspace of the testcase, extracted to /data.
+        package_dir (str): sdntest package, extracted to /opt/sdntest/sdntest.
+
+    returns: tar archive, to be extracted at / of the container
+    """
+    buf = io.BytesIO()
+    tar = tarfile.open(fileobj=buf, mode='w')
+    try:
+        tar.add(workspace, arcname='data',
+                filter=lambda info: None if info.name == 'data/output' or
+                info.name.startswith('data/output/') else info)
+        output = tarfile.TarInfo('data/output')
+        output.type = tarfile.DIRTYPE
+        output.mode = 0o777
+        tar.addfile(output)
+        tar.add(package_dir, arcname='opt/sdntest/sdntest',
+                filter=lambda info: None if '__pycache__' in info.name or
+                info.name.endswith('.pyc') else info)
+    finally:
+        tar.close()
+    return buf.getvalue()
+
+def collect_outputs(container, outputdir):
+    """
+    Copy the result files a workflow saved in /data/output of a remote
+    container into the local output directory.
+
+    returns: names of the copied files
+    """
+    data, _ = container.get_archive('/data/output')
+    buf = io.BytesIO(data.read() if hasattr(data, 'read') else b''.join(data))
+    names = []
+    tar = tarfile.open(fileobj=buf)
+    try:
+        for member in tar.getmembers():
+            if not member.isfile():
+                continue
+            name = os.path.basename(member.name)
+            source = tar.extractfile(member)
+            tmpfile = os.path.join(outputdir, name + '.tmp')
+            with open(tmpfile, 'wb') as f:
+                f.write(source.read())
+            os.rename(tmpfile, os.path.join(outputdir, name))
+            names.append(name)
+    finally:
+        tar.close()
+    logging.getLogger("DockerHost").debug("Collected %s", ', '.join(names) or 'no file')
+    return names
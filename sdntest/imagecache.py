@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+import logging
+import hashlib
+from time import time
+from threading import Lock
+from docker.errors import ImageNotFound, APIError
+
+from sdntest.utils import green
+
+REPOSITORY = 'sdntest/%s'
+LABEL = 'sdntest.cache'
+
+# One lock per cached tag, shared by all test suites of the process,
+# so that a (release, apps) pair is provisioned only once.
+_locks = {}
+_locks_guard = Lock()
+
+def _lock(tag):
+    with _locks_guard:
+        return _locks.setdefault(tag, Lock())
+
+class ImageCache(object):
+    """
+    Cache of pre-provisioned controller images.
+
+    On first use of a (platform, release, apps) triple, a controller is
+    booted from the vanilla image, the apps/features are installed once and
+    the container is committed to a local tag such as
+    sdntest/odl:4.4.0-1a2b3c4d5e6f. Later runs start directly from it.
+    """
+
+    def __init__(self, client, max_images=0, max_size=0):
+        """
+        Args:
+            client: docker client.
+            max_images (int): maximum number of cached images, 0 for unbounded.
+            max_size (int): maximum total size of cached images in MB, 0 for unbounded.
+        """
+        self.logger = logging.getLogger("ImageCache")
+        self.docker = client
+        self.max_images = max_images
+        self.max_size = max_size
+
+    @staticmethod
+    def tag(platform, release, apps):
+        """
+        Get the local image tag of a (platform, release, apps) triple.
+        """
+        digest = hashlib.sha1(' '.join(sorted(apps)).encode('utf-8')).hexdigest()[:12]
+        return '%s:%s-%s' % (REPOSITORY % platform, release, digest)
+
+    def ensure(self, platform, release, apps, provision):
+        """
+        Get a cached image, provisioning it first if it does not exist yet.
+
+        Args:
+            platform (str): 'odl' or 'onos'.
+            release (str): release tag of the vanilla image.
+            apps (list): apps/features installed in the image.
+            provision (callable): provision(repository, tag, changes) boots a
+                controller, installs the apps and commits it.
+
+        returns: the cached image tag
+        """
+        image_tag = self.tag(platform, release, apps)
+        with _lock(image_tag):
+            try:
+                self.docker.images.get(image_tag)
+                self.logger.debug("Cached image %s found", image_tag)
+                return image_tag
+            except ImageNotFound:
+                pass
+            self.logger.info("Provisioning cached image %s...", image_tag)
+            repository, tag = image_tag.split(':', 1)
+            provision(repository, tag, [
+                'LABEL %s=%s' % (LABEL, platform),
+                'LABEL %s.release=%s' % (LABEL, release),
+                'LABEL %s.apps=%s' % (LABEL, ','.join(sorted(apps))),
+                'LABEL %s.created=%d' % (LABEL, time())
+            ])
+            self.logger.info(green(u"\u2714") + " Cached image %s created", image_tag)
+        self.evict(keep=image_tag)
+        return image_tag
+
+    def list(self):
+        """
+        List cached images, oldest first.
+
+        returns: list of dicts with tag, platform, release, apps, created and size (MB)
+        """
+        images = []
+        for image in self.docker.images.list(filters={'label': LABEL}):
+            labels = image.labels or {}
+            for tag in image.tags:
+                images.append({
+                    'tag': tag,
+                    'platform': labels.get(LABEL, ''),
+                    'release': labels.get(LABEL + '.release', ''),
+                    'apps': labels.get(LABEL + '.apps', ''),
+                    'created': int(labels.get(LABEL + '.created', 0)),
+                    'size': image.attrs.get('Size', 0) / 1024. / 1024.
+                })
+        return sorted(images, key=lambda image: image['created'])
+
+    def invalidate(self, platform=None, release=None):
+        """
+        Remove cached images, optionally only those of a platform/release.
+
+        returns: list of removed tags
+        """
+        removed = []
+        for image in self.list():
+            if platform and image['platform'] != platform:
+                continue
+            if release and image['release'] != release:
+                continue
+            if self.remove(image['tag']):
+                removed.append(image['tag'])
+        return removed
+
+    def evict(self, keep=None):
+        """
+        Remove the oldest cached images until the cache fits in its bounds.
+
+        Args:
+            keep (str): tag which must not be evicted.
+        """
+        cached = self.list()
+        images = [image for image in cached if image['tag'] != keep]
+        kept = len(cached) - len(images)
+        total = sum(image['size'] for image in cached)
+        while images and ((self.max_images and len(images) + kept > self.max_images) or
+                          (self.max_size and total > self.max_size)):
+            image = images.pop(0)
+            if self.remove(image['tag']):
+                total -= image['size']
+
+    def remove(self, tag):
+        """
+        Remove a cached image tag.
+
+        returns: True if it has been removed
+        """
+        try:
+            self.docker.images.remove(tag)
+        except (ImageNotFound, APIError) as e:
+            self.logger.warning("Failed to remove cached image %s: %s", tag, e)
+            return False
+        self.logger.info("Cached image %s removed", tag)
+        return True
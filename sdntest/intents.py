@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+"""
+Host-to-host intent helpers shared by network workflows.
+
+This module only depends on the standard library, so that workflows can
+import it from inside the mininet container.
+"""
+
+import sys
+from time import time, sleep
+from threading import Thread
+if sys.version[0] == '2':
+    import Queue as queue
+else:
+    import queue
+
+class Intent(object):
+    """
+    A host-to-host intent and the outcome of its submission.
+    """
+
+    def __init__(self, key, method, path, body):
+        self.key = key
+        self.method = method
+        self.path = path
+        self.body = body
+        self.status = None
+        self.submitted = None
+        self.latency = None
+        self.error = None
+        self.state = None
+        self.installed = None
+
+    @property
+    def ok(self):
+        """
+        Whether the controller accepted the intent.
+        """
+        return self.status in (200, 201, 204)
+
+    @property
+    def install_latency(self):
+        """
+        Seconds from submission until the intent was seen installed, or None.
+        """
+        if self.installed is None or self.submitted is None:
+            return None
+        return self.installed - self.submitted
+
+def odl_h2h_intent(mac1, mac2, ip1, ip2):
+    """
+    Build a NIC host-to-host intent for OpenDaylight.
+    """
+    mac1 = mac1.split(':')
+    mac2 = mac2.split(':')
+    uuid = ''.join(mac1[:4]) + '-' + ''.join(mac1[4:]) \
+           + '-0000-0000-' + ''.join(mac2)
+    body = {
+        'intent:id': uuid,
+        'intent:actions': [{'order': 2, 'allow': {}}],
+        'intent:subjects': [
+            {'order': 1, 'end-point-group': {'name': ip1}},
+            {'order': 2, 'end-point-group': {'name': ip2}}
+        ]
+    }
+    return Intent(uuid, 'PUT', '/restconf/config/intent:intents/intent/%s' % uuid,
+                  {'intent:intent': body})
+
+def onos_h2h_intent(mac1, mac2):
+    """
+    Build a HostToHostIntent for ONOS.
+    """
+    body = {
+        'type': 'HostToHostIntent',
+        'id': '0x0',
+        'appId': 'org.onosproject.cli',
+        'one': mac1 + '/-1',
+        'two': mac2 + '/-1'
+    }
+    return Intent(None, 'POST', '/onos/v1/intents', body)
+
+def submit_one(client, intent):
+    """
+    Submit a single intent and record its status and latency.
+    """
+    intent.submitted = time()
+    try:
+        status, _, headers = client.send(intent.method, intent.path, intent.body)
+    except Exception as e:
+        intent.error = e
+        status, headers = None, {}
+    intent.latency = time() - intent.submitted
+    intent.status = status
+    location = headers.get('location')
+    if location and intent.key is None:
+        # ONOS answers with .../intents/<appId>/<decimal id>, while the
+        # intent list reports ids in hexadecimal
+        key = location.rstrip('/').rsplit('/', 1)[-1]
+        intent.key = '0x%x' % int(key) if key.isdigit() else key
+
+def submit_bulk(client, intents):
+    """
+    Submit all ODL intents in one request, which adds them to the intents
+    container without replacing the intents already configured.
+
+    returns: True if the controller accepted the batch
+    """
+    started = time()
+    body = {'intent:intent': [intent.body['intent:intent'] for intent in intents]}
+    try:
+        status, _, _ = client.send('POST', '/restconf/config/intent:intents', body)
+        error = None
+    except Exception as e:
+        status, error = None, e
+    latency = time() - started
+    for intent in intents:
+        intent.submitted = started
+        intent.latency = latency
+        intent.status = status
+        intent.error = error
+    return intents[0].ok
+
+def submit_intents(client, intents, concurrency=None, bulk=True):
+    """
+    Submit intents through a shared REST client with bounded concurrency.
+    On OpenDaylight, intents are submitted in one bulk request when
+    possible, and one by one if the batch is refused (e.g. some of them
+    already exist); ONOS has no bulk intent endpoint.
+
+    Args:
+        client (RestClient): REST client of the controller.
+        intents (list): Intent objects built for the client platform.
+        concurrency (int): number of concurrent requests, defaults to the
+            number of pooled connections of the client.
+        bulk (bool): use the bulk endpoint where the platform has one.
+
+    returns: the list of intents, with status and latency filled in
+    """
+    if not intents:
+        return intents
+    if bulk and 'odl' == client.platform and submit_bulk(client, intents):
+        return intents
+
+    pending = queue.Queue()
+    for intent in intents:
+        pending.put(intent)
+
+    def worker():
+        while True:
+            try:
+                intent = pending.get(block=False)
+            except queue.Empty:
+                return
+            submit_one(client, intent)
+
+    workers = [Thread(target=worker)
+               for _ in range(min(concurrency or client.connections, len(intents)))]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return intents
+
+INSTALLED = 'INSTALLED'
+FAILED = 'FAILED'
+
+def onos_states(client):
+    """
+    Get the compilation state of all intents of an ONOS controller.
+
+    returns: dict mapping intent id to state
+    """
+    content = client.get('/onos/v1/intents')
+    states = {}
+    for intent in content.get('intents', []):
+        states[intent.get('id')] = intent.get('state')
+        states[intent.get('key')] = intent.get('state')
+    return states
+
+def odl_states(client):
+    """
+    Get the state of all intents of an OpenDaylight controller.
+
+    NIC does not report a compilation state; an intent is considered
+    installed once it shows up in the operational datastore.
+
+    returns: dict mapping intent id to state
+    """
+    status, content = client.request('GET', '/restconf/operational/intent:intents')
+    if status == 404 or not isinstance(content, dict):
+        return {}
+    intents = content.get('intents', content.get('intent:intents', {})).get('intent', [])
+    return dict((intent.get('id'), INSTALLED) for intent in intents)
+
+def watch_intents(client, intents, timeout=60, interval=0.2, settle=2):
+    """
+    Poll the controller until the submitted intents are installed.
+
+    Polling stops when every intent is INSTALLED, when every intent is
+    either INSTALLED or FAILED and no state changed for `settle` seconds
+    (failed intents may be recompiled once hosts are discovered), or when
+    the timeout expires.
+
+    Args:
+        client (RestClient): REST client of the controller.
+        intents (list): submitted Intent objects; their state and
+            installed time are updated.
+        timeout (float): maximum seconds to wait.
+        interval (float): seconds between two polls.
+        settle (float): seconds terminal states must hold before giving
+            up on failed intents.
+
+    returns: True if all intents are installed
+    """
+    states = odl_states if 'odl' == client.platform else onos_states
+    watched = [intent for intent in intents if intent.ok and intent.key is not None]
+    deadline = time() + timeout
+    changed = time()
+    while True:
+        try:
+            current = states(client)
+        except Exception:
+            current = {}
+        now = time()
+        for intent in watched:
+            state = current.get(intent.key, intent.state)
+            if state != intent.state:
+                intent.state = state
+                changed = now
+            if state == INSTALLED and intent.installed is None:
+                intent.installed = now
+        if all(intent.state == INSTALLED for intent in watched):
+            break
+        if all(intent.state in (INSTALLED, FAILED) for intent in watched) \
+                and now - changed >= settle:
+            break
+        if now >= deadline:
+            break
+        sleep(interval)
+    return len(watched) == len(intents) and \
+        all(intent.state == INSTALLED for intent in intents)
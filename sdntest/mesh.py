@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+"""
+All-pairs ping mesh shared by network workflows.
+
+This module only depends on the standard library, so that workflows can
+import it from inside the mininet container. Results are written as an
+NPZ archive readable with numpy.load().
+"""
+
+import sys
+import zipfile
+from array import array
+from time import time, sleep
+
+from sdntest.discovery import probe
+
+# File a workflow saves the mesh of a job in, inside the output directory.
+MESH_FILE = 'mesh.%s.npz'
+
+# Values of the loss array.
+RECEIVED = 0
+LOST = 1
+NOT_PROBED = 255
+
+def npy(descr, shape, data):
+    """
+    Serialize an array in the .npy format (version 1.0).
+
+    Args:
+        descr (str): NumPy type descriptor, e.g. '<f4'.
+        shape (tuple): shape of the array.
+        data (bytes): raw little-endian content, in C order.
+    """
+    dims = ', '.join('%d' % n for n in shape) + (',' if len(shape) == 1 else '')
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%s), }" % (descr, dims)
+    # magic, version and length take 10 bytes; data starts 64-byte aligned
+    header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+    return (b'\x93NUMPY\x01\x00' + bytearray((len(header) & 0xff, len(header) >> 8)) +
+            header.encode('latin-1') + data)
+
+def raw(values):
+    """
+    Get the little-endian content of an array.array.
+    """
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tostring() if sys.version[0] == '2' else values.tobytes()
+
+def strings(values):
+    """
+    Serialize a list of ascii strings as a NumPy unicode array.
+    """
+    width = max([len(value) for value in values] + [1])
+    data = b''.join(value.ljust(width, '\0').encode('utf-32-le') for value in values)
+    return npy('<U%d' % width, (len(values),), data)
+
+def save_npz(path, arrays):
+    """
+    Write serialized arrays into a compressed NPZ archive.
+
+    Args:
+        path (str): destination file.
+        arrays (dict): name to .npy content.
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as f:
+        for name, content in arrays.items():
+            f.writestr(name + '.npy', bytes(content))
+
+class PingMesh(object):
+    """
+    Ping mesh measuring loss and RTT between every host and its targets.
+
+    Every round probes all (host, target) pairs once; rounds are driven by
+    a single scheduler which keeps at most `batch` probing processes. The
+    results form time x src x dst arrays, with dst indexing the union of
+    all targets.
+    """
+
+    def __init__(self, hosts, targets, interval=1, batch=32, wait=1):
+        """
+        Args:
+            hosts (list): source hosts.
+            targets (list): list of target ips of each source host.
+            interval (float): seconds between the start of two rounds.
+            batch (int): maximum number of hosts probing at a time.
+            wait (int): seconds a probe waits for a reply.
+        """
+        self.hosts = hosts
+        self.targets = targets
+        self.interval = interval
+        self.batch = batch
+        self.wait = wait
+        self.sources = [host.IP() for host in hosts]
+        self.destinations = []
+        for ips in targets:
+            for ip in ips:
+                if ip not in self.destinations:
+                    self.destinations.append(ip)
+        self.index = dict((ip, j) for j, ip in enumerate(self.destinations))
+        self.times = array('d')
+        self.rtt = array('f')
+        self.loss = array('B')
+
+    @property
+    def rounds(self):
+        return len(self.times)
+
+    def round(self):
+        """
+        Probe all pairs once and append the results.
+        """
+        size = len(self.destinations)
+        nan = float('nan')
+        started = time()
+        results = probe(self.hosts, self.targets, self.batch, self.wait)
+        rtt = array('f', [nan]) * (len(self.hosts) * size)
+        loss = array('B', [NOT_PROBED]) * (len(self.hosts) * size)
+        for i, (ips, alive) in enumerate(zip(self.targets, results)):
+            for ip in ips:
+                k = i * size + self.index[ip]
+                if ip in alive:
+                    loss[k] = RECEIVED
+                    rtt[k] = alive[ip]
+                else:
+                    loss[k] = LOST
+        self.times.append(started)
+        self.rtt.extend(rtt)
+        self.loss.extend(loss)
+
+    def run(self, seconds):
+        """
+        Run rounds until `seconds` elapsed.
+        """
+        end = time() + seconds
+        while time() < end:
+            started = time()
+            self.round()
+            sleep(max(0, self.interval - (time() - started)))
+
+    def summary(self):
+        """
+        returns: (probes, lost probes)
+        """
+        probes = len(self.loss) - self.loss.count(NOT_PROBED)
+        return probes, self.loss.count(LOST)
+
+    def save(self, path):
+        """
+        Save the mesh as an NPZ archive with 'time' (rounds), 'rtt' (ms,
+        NaN unless received), 'loss' (0 received, 1 lost, 255 not probed),
+        'src' and 'dst' arrays.
+        """
+        shape = (self.rounds, len(self.sources), len(self.destinations))
+        save_npz(path, {
+            'time': npy('<f8', (self.rounds,), raw(self.times)),
+            'rtt': npy('<f4', shape, raw(self.rtt)),
+            'loss': npy('|u1', shape, raw(self.loss)),
+            'src': strings(self.sources),
+            'dst': strings(self.destinations)
+        })
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+
+import io
+import os
+import json
+import zlib
+import logging
+from time import time
+
+# Suffixes of chunked output files: compressed data and chunk index.
+CHUNKED_SUFFIX = '.gz'
+INDEX_SUFFIX = '.idx'
+
+class ChunkedFile(object):
+    """
+    Write a stream as a series of gzip members, each one independently
+    decompressible, and index them. The file as a whole is still a valid
+    gzip file, readable by zcat.
+
+    A chunk ends on a line boundary once it holds `chunk_size` bytes of
+    output. The index, saved next to the file when it is closed, records
+    the byte offset and size of every chunk and the wall-clock time range
+    its output was received in, so that a time window of the output can
+    be read without decompressing the whole file. The index is saved each
+    time a chunk is completed, so that it survives an interrupted writer.
+    """
+
+    def __init__(self, path, chunk_size=256, level=6):
+        """
+        Args:
+            path (str): compressed output file.
+            chunk_size (int): uncompressed size of a chunk in KB.
+            level (int): zlib compression level.
+        """
+        self.path = path
+        self.chunk_size = int(chunk_size * 1024)
+        self.level = level
+        self.file = io.open(path, 'wb')
+        self.chunks = []
+        # output not compressed yet
+        self.pending = []
+        self.pending_size = 0
+        self.compressor = None
+        self.offset = 0
+        self.raw = 0
+        self.started = None
+        self.received = None
+
+    def write(self, data):
+        now = time()
+        if self.compressor is None:
+            # gzip header and trailer around each chunk
+            self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            self.started = now
+        self.received = now
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.raw + self.pending_size < self.chunk_size or b'\n' not in data:
+            return
+        pending = b''.join(self.pending)
+        end = pending.rfind(b'\n') + 1
+        self.compress(pending[:end])
+        self.pending = [pending[end:]] if end < len(pending) else []
+        self.pending_size = len(pending) - end
+        self.end_chunk()
+
+    def compress(self, data):
+        self.file.write(self.compressor.compress(data))
+        self.raw += len(data)
+
+    def compress_pending(self):
+        self.compress(b''.join(self.pending))
+        self.pending = []
+        self.pending_size = 0
+
+    def end_chunk(self):
+        """
+        Complete the current chunk and index it.
+        """
+        self.file.write(self.compressor.flush(zlib.Z_FINISH))
+        offset = self.file.tell()
+        self.chunks.append({
+            'offset': self.offset,
+            'size': offset - self.offset,
+            'raw': self.raw,
+            'start': self.started,
+            'end': self.received
+        })
+        self.offset = offset
+        self.raw = 0
+        self.compressor = None
+        self.save_index()
+        if self.pending:
+            self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            self.started = self.received
+
+    def flush(self):
+        """
+        Make the output received so far readable on disk, without ending
+        the current chunk.
+        """
+        if self.compressor is not None:
+            self.compress_pending()
+            self.file.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.file.flush()
+
+    def close(self):
+        """
+        Complete the last chunk, and atomically save the index.
+        """
+        if self.compressor is not None:
+            self.compress_pending()
+            self.end_chunk()
+        self.file.close()
+
+    def save_index(self):
+        """
+        Atomically save the index of the completed chunks.
+        """
+        self.file.flush()
+        tmpfile = self.path + INDEX_SUFFIX + '.tmp'
+        with open(tmpfile, 'w') as f:
+            json.dump({'run': os.path.basename(self.path)[:-len(CHUNKED_SUFFIX)],
+                       'chunks': self.chunks}, f)
+        os.rename(tmpfile, self.path + INDEX_SUFFIX)
+
+class OutputWriter(object):
+    """
+    Write a workflow output stream to disk incrementally.
+
+    Data is buffered in a bounded buffer and flushed at least every
+    `flush_interval` seconds. When the file grows over `max_size`, it is
+    rotated to <file>.1 ... <file>.<rotate>, or further output is dropped
+    if no rotation is configured.
+
+    With the 'chunked' format, the output is compressed into <file>.gz in
+    indexed chunks (see ChunkedFile), and `max_size` bounds the output
+    before compression. Chunked output is not rotated.
+    """
+
+    def __init__(self, path, flush_interval=1.0, buffer_size=64, max_size=0,
+                 rotate=0, tail=False, format='text', chunk_size=256, level=6):
+        """
+        Args:
+            path (str): output file.
+            flush_interval (float): maximum seconds between two flushes.
+            buffer_size (int): size of the write buffer in KB.
+            max_size (float): maximum size of the output file in MB, 0 for unbounded.
+            rotate (int): number of rotated files to keep.
+            tail (bool): echo the output to the console while it is written.
+            format (str): 'text', or 'chunked' for compressed indexed output.
+            chunk_size (int): uncompressed size of a chunk in KB.
+            level (int): compression level of chunks.
+        """
+        self.logger = logging.getLogger("Output")
+        self.chunked = 'chunked' == format
+        self.path = path + CHUNKED_SUFFIX if self.chunked else path
+        self.flush_interval = flush_interval
+        self.buffer_size = int(buffer_size * 1024)
+        self.max_size = int(max_size * 1024 * 1024)
+        self.chunk_size = chunk_size
+        self.level = level
+        if self.chunked and rotate:
+            self.logger.warning("Chunked output is not rotated, dropping output over max_size")
+            rotate = 0
+        self.rotate = rotate
+        self.tail = tail
+        self.size = 0
+        self.written = 0
+        self.truncated = False
+        self.partial = b''
+        self.last_flush = time()
+        self.file = self.open()
+
+    def open(self):
+        """
+        Open the output file.
+        """
+        if self.chunked:
+            return ChunkedFile(self.path, self.chunk_size, self.level)
+        return io.open(self.path, 'wb', buffering=self.buffer_size)
+
+    def write(self, data):
+        """
+        Append a chunk of the output stream.
+
+        Args:
+            data (bytes): raw chunk read from the stream.
+        """
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        if self.tail:
+            self.echo(data)
+        if self.max_size and self.size + len(data) > self.max_size:
+            if self.rotate:
+                self.rollover()
+            elif not self.truncated:
+                self.truncated = True
+                self.logger.warning("%s reached %d bytes, dropping further output",
+                                    self.path, self.max_size)
+        if not self.truncated:
+            self.file.write(data)
+            self.size += len(data)
+            self.written += len(data)
+        if time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def echo(self, data):
+        """
+        Log complete lines of the stream to the console.
+        """
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self.logger.info("%s | %s", os.path.basename(self.path),
+                             line.rstrip(b'\r').decode('utf-8', 'replace'))
+
+    def flush(self):
+        """
+        Flush buffered output to disk.
+        """
+        self.file.flush()
+        self.last_flush = time()
+
+    def rollover(self):
+        """
+        Rotate the output file: <file> becomes <file>.1, <file>.1 becomes
+        <file>.2, and so on.
+        """
+        self.file.close()
+        for i in range(self.rotate - 1, 0, -1):
+            src = '%s.%d' % (self.path, i)
+            if os.path.exists(src):
+                os.rename(src, '%s.%d' % (self.path, i + 1))
+        os.rename(self.path, self.path + '.1')
+        self.file = self.open()
+        self.size = 0
+
+    def close(self):
+        """
+        Flush and close the output file.
+        """
+        if self.tail and self.partial:
+            self.echo(b'\n')
+        self.file.close()
+
+def find_output(path):
+    """
+    Find the file a workflow output has been saved in, plain or chunked.
+
+    Args:
+        path (str): plain output file.
+
+    returns: path of the existing file, or None
+    """
+    for candidate in (path, path + CHUNKED_SUFFIX):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def load_index(path):
+    """
+    Load the chunk index of a chunked output file.
+
+    returns: list of chunks, or None if the file has no index (e.g. its
+             writer was interrupted)
+    """
+    try:
+        with open(path + INDEX_SUFFIX) as f:
+            return json.load(f)['chunks']
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+def read_members(f):
+    """
+    Decompress the gzip members of a file from its current position, up
+    to the end of the file. A truncated last member, left by an
+    interrupted writer, yields the output synced before the interruption.
+    """
+    decompressor = zlib.decompressobj(31)
+    while True:
+        data = f.read(1 << 20)
+        if not data:
+            return
+        while data:
+            output = decompressor.decompress(data)
+            if output:
+                yield output
+            # data after the end of a member starts the next one
+            data = decompressor.unused_data
+            if data:
+                decompressor = zlib.decompressobj(31)
+
+def read_chunks(path, start=None, end=None):
+    """
+    Iterate over the decompressed chunks of a chunked output file which
+    were received in a time window. Output written after the last indexed
+    chunk (all of it without index) is read sequentially.
+    """
+    chunks = load_index(path) or []
+    with io.open(path, 'rb') as f:
+        for chunk in chunks:
+            if start is not None and chunk['end'] < start:
+                continue
+            if end is not None and chunk['start'] > end:
+                return
+            f.seek(chunk['offset'])
+            yield zlib.decompressobj(31).decompress(f.read(chunk['size']))
+        f.seek(chunks[-1]['offset'] + chunks[-1]['size'] if chunks else 0)
+        for data in read_members(f):
+            yield data
+
+def read_lines(path, start=None, end=None):
+    """
+    Iterate over the lines of a workflow output file without loading it
+    whole, with line endings stripped.
+
+    For chunked output, a wall-clock time window skips the chunks received
+    outside of it; lines of the chunks overlapping the window are all
+    returned. Lines are timestamped by the workflow shortly before they
+    are received, so the window should allow for some slack. The window
+    is ignored for plain output.
+
+    Args:
+        path (str): output file, plain or chunked.
+        start (float): beginning of the time window.
+        end (float): end of the time window.
+    """
+    if path.endswith(CHUNKED_SUFFIX):
+        partial = b''
+        for data in read_chunks(path, start, end):
+            lines = (partial + data).split(b'\n')
+            partial = lines.pop()
+            for line in lines:
+                yield line.rstrip(b'\r').decode('utf-8', 'replace')
+        if partial:
+            yield partial.rstrip(b'\r').decode('utf-8', 'replace')
+        return
+    with io.open(path, 'rb') as f:
+        for line in f:
+            yield line.rstrip(b'\r\n').decode('utf-8', 'replace')
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+
+import sys
+import logging
+from time import time, sleep
+from threading import Thread, Condition
+if sys.version[0] == '2':
+    from urllib2 import quote
+else:
+    from urllib.parse import quote
+
+from sdntest.exception import PoolException, RestException
+from sdntest.utils import green
+
+def reset_onos(client, apps):
+    """
+    Purge intents, flows, hosts and devices from an ONOS controller and
+    reactivate the requested apps.
+
+    Args:
+        client (RestClient): REST client bound to the controller.
+        apps (list): ONOS apps which must stay active.
+
+    returns: True if the controller has been reset cleanly
+    """
+    clean = True
+    for intent in client.get('/onos/v1/intents').get('intents', []):
+        clean &= client.delete('/onos/v1/intents/%s/%s' % (quote(intent['appId'], ''),
+                                                           quote(intent['key'], '')))
+    for flow in client.get('/onos/v1/flows').get('flows', []):
+        if flow.get('appId') != 'org.onosproject.core':
+            clean &= client.delete('/onos/v1/flows/%s/%s' % (quote(flow['deviceId'], ''),
+                                                             quote(str(flow['id']), '')))
+    for device in client.get('/onos/v1/devices').get('devices', []):
+        clean &= client.delete('/onos/v1/devices/%s' % quote(device['id'], ''))
+    for host in client.get('/onos/v1/hosts').get('hosts', []):
+        clean &= client.delete('/onos/v1/hosts/%s/%s' % (quote(host['mac'], ''),
+                                                         quote(str(host['vlan']), '')))
+    for app in apps:
+        name = app if app.startswith('org.') else 'org.onosproject.' + app
+        status, _ = client.request('POST', '/onos/v1/applications/%s/active' % name)
+        clean &= status in (200, 204)
+    return clean and not client.get('/onos/v1/intents').get('intents', [])
+
+def odl_leftovers(client):
+    """
+    Count the switches, with their flows, and the learned hosts an
+    OpenDaylight controller still reports in its operational datastore.
+
+    returns: number of nodes of the operational inventory and topology
+    """
+    count = 0
+    path = '/restconf/operational/opendaylight-inventory:nodes'
+    status, content = client.request('GET', path)
+    if status == 200 and isinstance(content, dict):
+        count += len(content.get('nodes', {}).get('node', []))
+    elif status != 404:
+        raise RestException('GET', path, status)
+    path = '/restconf/operational/network-topology:network-topology/topology/flow:1'
+    status, content = client.request('GET', path)
+    if status == 200 and isinstance(content, dict):
+        for topology in content.get('topology', []):
+            count += len(topology.get('node', []))
+    elif status != 404:
+        raise RestException('GET', path, status)
+    return count
+
+def reset_odl(client, timeout=30, interval=0.5):
+    """
+    Purge intents, flows, inventory nodes and learned hosts from an
+    OpenDaylight controller.
+
+    The operational datastore cannot be written through RESTCONF: once the
+    configuration is deleted and the switches of the previous job are
+    gone, the controller removes their flows and the hosts learned behind
+    them. The reset waits until it has done so.
+
+    Args:
+        client (RestClient): REST client bound to the controller.
+        timeout (float): maximum seconds to wait for the operational
+            datastore to be empty.
+        interval (float): seconds between two checks.
+
+    returns: True if the controller has been reset cleanly
+    """
+    clean = client.delete('/restconf/config/intent:intents')
+    clean &= client.delete('/restconf/config/opendaylight-inventory:nodes')
+    clean &= client.delete('/restconf/config/network-topology:network-topology')
+    if not clean:
+        return False
+    deadline = time() + timeout
+    while odl_leftovers(client):
+        if time() >= deadline:
+            return False
+        sleep(interval)
+    return True
+
+class ControllerPool(object):
+    """
+    Keep pre-booted controller containers warm between repeats.
+
+    Containers are grouped by a key (platform, release, apps). Each key owns
+    up to `size` idle containers; replacements are booted in the background.
+    A released container is reset before being handed out again, and is
+    retired after `recycle` uses or as soon as its reset fails. Retired
+    containers are stopped and removed in the background.
+
+    With recycle=1 the pool acts as a pipeline: the controller of the next
+    repeat boots while the current workflow runs, and teardown happens off
+    the critical path.
+    """
+
+    def __init__(self, size=1, recycle=0, health_timeout=30, limit=0):
+        """
+        Args:
+            size (int): number of warm containers kept per key.
+            recycle (int): retire a container after this many uses, 0 for never.
+            health_timeout (float): deadline for a reset container to be ready again.
+            limit (int): maximum number of controller containers alive at the
+                same time, including those in use and being removed, 0 for unbounded.
+        """
+        self.logger = logging.getLogger("ControllerPool")
+        self.size = size
+        self.recycle = recycle
+        self.health_timeout = health_timeout
+        self.limit = limit
+        self.live = 0
+        self.cond = Condition()
+        self.idle = {}
+        self.booting = {}
+        self.spawners = {}
+        self.errors = {}
+        self.uses = {}
+        self.closed = False
+
+    def fill(self, key):
+        """
+        Boot containers in the background until the key has enough warm ones.
+        Must be called with the lock held.
+        """
+        while not self.closed and \
+                len(self.idle.setdefault(key, [])) + self.booting.get(key, 0) < self.size:
+            if self.limit and self.live >= self.limit:
+                self.logger.debug("Controller limit (%d) reached, delaying boot", self.limit)
+                break
+            self.booting[key] = self.booting.get(key, 0) + 1
+            self.live += 1
+            worker = Thread(target=self.boot, args=(key,))
+            worker.daemon = True
+            worker.start()
+
+    def boot(self, key):
+        """
+        Boot one container for the key and add it to the idle list.
+        """
+        spawn, _ = self.spawners[key]
+        container = None
+        try:
+            container = spawn()
+        except Exception as e:
+            self.logger.error("Failed to boot a controller for %s: %s", key, e)
+            with self.cond:
+                self.errors[key] = sys.exc_info()
+        with self.cond:
+            self.booting[key] -= 1
+            if container is None:
+                self.live -= 1
+            else:
+                if self.closed:
+                    self.retire(container)
+                else:
+                    self.uses[container.id] = 0
+                    self.idle[key].append(container)
+                    self.logger.debug("Controller %s for %s is warm", container.id, key)
+            self.cond.notify_all()
+
+    def acquire(self, key, spawn, reset):
+        """
+        Take a warm container for the key, waiting for one if necessary.
+
+        Args:
+            key (tuple): identifies interchangeable containers.
+            spawn (callable): boots a ready container for the key.
+            reset (callable): resets a used container, raises or returns
+                False when the container is unhealthy.
+
+        returns: a ready controller container
+        """
+        with self.cond:
+            if self.closed:
+                raise PoolException(key, "pool is closed")
+            self.spawners.setdefault(key, (spawn, reset))
+            self.fill(key)
+            while not self.idle[key]:
+                if self.closed:
+                    raise PoolException(key, "pool is closed")
+                if key in self.errors and not self.booting.get(key, 0):
+                    _, val, _ = self.errors.pop(key)
+                    raise PoolException(key, val)
+                if not self.booting.get(key, 0):
+                    self.make_room(key)
+                self.cond.wait(1)
+                self.fill(key)
+            container = self.idle[key].pop(0)
+            self.fill(key)
+            return container
+
+    def make_room(self, key):
+        """
+        Retire an idle container of another key when the container limit
+        prevents booting one for this key. Must be called with the lock held.
+        """
+        if not self.limit or self.live < self.limit:
+            return
+        for other, idle in self.idle.items():
+            if other != key and idle:
+                container = idle.pop(0)
+                self.logger.debug("Retiring idle controller %s to make room for %s",
+                                  container.id, key)
+                self.uses.pop(container.id, None)
+                self.retire(container)
+                return
+
+    def release(self, key, container):
+        """
+        Give a used container back to the pool. It is reset in the background
+        and becomes available again, or is retired if it is worn out or
+        fails the reset.
+        """
+        with self.cond:
+            self.uses[container.id] = self.uses.get(container.id, 0) + 1
+            worn = self.recycle and self.uses[container.id] >= self.recycle
+            self.booting[key] = self.booting.get(key, 0) + 1
+        worker = Thread(target=self.recover, args=(key, container, worn))
+        worker.daemon = True
+        worker.start()
+
+    def recover(self, key, container, worn):
+        """
+        Reset a released container, or retire it and boot a replacement.
+        """
+        healthy = False
+        if not worn:
+            _, reset = self.spawners[key]
+            try:
+                healthy = reset(container) is not False
+            except Exception as e:
+                self.logger.warning("Controller %s failed to reset: %s", container.id, e)
+        with self.cond:
+            self.booting[key] -= 1
+            if healthy and not self.closed:
+                self.idle[key].append(container)
+                self.logger.info(green(u"\u2714") + " Controller %s reset for reuse", container.id)
+            else:
+                if not worn:
+                    self.logger.info("Evicting unhealthy controller %s", container.id)
+                self.uses.pop(container.id, None)
+                self.retire(container)
+                self.fill(key)
+            self.cond.notify_all()
+
+    def discard(self, key, container):
+        """
+        Retire a container taken from the pool which must not be reused,
+        e.g. the controller of a failed job. Its slot is freed for a
+        replacement once it is removed.
+        """
+        with self.cond:
+            self.uses.pop(container.id, None)
+            self.logger.debug("Discarding controller %s of %s", container.id, key)
+            self.retire(container)
+            self.cond.notify_all()
+
+    def retire(self, container):
+        """
+        Stop and remove a container in the background.
+        """
+        Thread(target=self.remove, args=(container,)).start()
+
+    def remove(self, container):
+        """
+        Stop and remove a container.
+        """
+        try:
+            container.stop()
+            container.remove()
+            self.logger.debug("Controller %s removed", container.id)
+        except Exception as e:
+            self.logger.warning("Failed to remove controller %s: %s", container.id, e)
+        with self.cond:
+            self.live -= 1
+            for key in self.spawners:
+                self.fill(key)
+            self.cond.notify_all()
+
+    def shutdown(self):
+        """
+        Stop booting new containers and remove all the idle ones
+        concurrently.
+        """
+        with self.cond:
+            self.closed = True
+            containers = [c for idle in self.idle.values() for c in idle]
+            self.idle = dict((key, []) for key in self.idle)
+            self.cond.notify_all()
+        removers = [Thread(target=self.remove, args=(container,)) for container in containers]
+        for remover in removers:
+            remover.start()
+        for remover in removers:
+            remover.join()
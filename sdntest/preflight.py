@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+import sys
+import json
+import logging
+from time import time, sleep
+from threading import Thread, Event, Lock
+from docker.errors import ImageNotFound
+
+from sdntest.exception import ImageException
+from sdntest.utils import green
+
+IMAGES = {
+    'odl': 'opendaylight/odl',
+    'onos': 'onosproject/onos'
+}
+DEFAULT_RELEASES = {
+    'odl': '4.4.0',
+    'onos': 'latest'
+}
+MININET_IMAGE = 'ciena/mininet:latest'
+
+def controller_image(platform, release=''):
+    """
+    Get the vanilla docker image of a controller platform release.
+    """
+    return '%s:%s' % (IMAGES[platform], release or DEFAULT_RELEASES[platform])
+
+def required_images(configs):
+    """
+    Compute the set of docker images needed by a testcase configuration.
+
+    Args:
+        configs (dict): json object of testcase configuration file.
+
+    returns: set of image tags
+    """
+    images = set()
+    # controller platforms and releases may be swept
+    parameters = (configs.get('sweep') or {}).get('parameters', {})
+    platforms = parameters.get('platform', configs.get('platform', 'odl'))
+    releases = parameters.get('release', configs.get('release', ''))
+    for platform in platforms if isinstance(platforms, list) else [platforms]:
+        for release in releases if isinstance(releases, list) else [releases]:
+            if platform in IMAGES:
+                images.add(controller_image(platform, release))
+    if configs.get('workflow'):
+        images.add(MININET_IMAGE)
+    return images
+
+class ImagePreparer(object):
+    """
+    Pull the docker images of a testcase once, concurrently, before any
+    test suite needs them.
+
+    Test suites call wait() for the images they are about to use, so each
+    one is only blocked until its own images exist.
+    """
+
+    def __init__(self, client, report_interval=5):
+        """
+        Args:
+            client: docker client.
+            report_interval (float): seconds between two progress reports.
+        """
+        self.logger = logging.getLogger("ImagePreparer")
+        self.docker = client
+        self.report_interval = report_interval
+        self.lock = Lock()
+        self.ready = {}
+        self.errors = {}
+        self.progress = {}
+
+    def prepare(self, images):
+        """
+        Start pulling all missing images in the background.
+
+        Args:
+            images (iterable): image tags needed by the testcase.
+        """
+        pulls = []
+        for image in sorted(images):
+            with self.lock:
+                if image in self.ready:
+                    continue
+                self.ready[image] = Event()
+            try:
+                self.docker.images.get(image)
+                self.ready[image].set()
+                continue
+            except ImageNotFound:
+                self.logger.info("Image %s not found. Pulling it from dockerhub...", image)
+            worker = Thread(target=self.pull, args=(image,))
+            worker.daemon = True
+            worker.start()
+            pulls.append(image)
+        if pulls:
+            reporter = Thread(target=self.report, args=(pulls,))
+            reporter.daemon = True
+            reporter.start()
+
+    def pull(self, image):
+        """
+        Pull one image, recording the progress of each layer.
+        """
+        layers = self.progress.setdefault(image, {})
+        try:
+            for line in self.docker.api.pull(image, stream=True):
+                for chunk in line.decode('utf-8').splitlines() if isinstance(line, bytes) \
+                        else line.splitlines():
+                    status_info = json.loads(chunk)
+                    if 'error' in status_info:
+                        raise ImageException(image, status_info['error'])
+                    detail = status_info.get('progressDetail') or {}
+                    if 'id' in status_info and detail.get('total'):
+                        layers[status_info['id']] = (detail.get('current', 0), detail['total'])
+            self.docker.images.get(image)
+            self.logger.info(green(u"\u2714") + " Pulling image %s finished!", image)
+        except Exception:
+            self.errors[image] = sys.exc_info()[1]
+            self.logger.error("Failed to pull image %s: %s", image, self.errors[image])
+        finally:
+            self.ready[image].set()
+
+    def report(self, images):
+        """
+        Periodically log the aggregated progress of all running pulls.
+        """
+        started = time()
+        while not all(self.ready[image].is_set() for image in images):
+            sleep(self.report_interval)
+            status = []
+            for image in images:
+                if self.ready[image].is_set():
+                    status.append('%s done' % image)
+                    continue
+                layers = list(self.progress.get(image, {}).values())
+                current = sum(layer[0] for layer in layers) / 1024. / 1024.
+                total = sum(layer[1] for layer in layers) / 1024. / 1024.
+                status.append('%s %.0f/%.0f MB' % (image, current, total))
+            self.logger.info("Pulling images (%ds): %s", time() - started, ', '.join(status))
+
+    def wait(self, image):
+        """
+        Block until an image exists locally, pulling it if nobody did yet.
+
+        Args:
+            image (str): image tag.
+        """
+        if image not in self.ready:
+            self.prepare([image])
+        self.ready[image].wait()
+        if image in self.errors:
+            raise ImageException(image, self.errors[image])
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+import socket
+import logging
+from time import time, sleep
+
+from sdntest.exception import ReadinessException
+from sdntest.rest import RestClient, REST_PORT
+from sdntest.utils import exec_output
+
+OPENFLOW_PORTS = (6653, 6633)
+
+class ReadinessProbe(object):
+    """
+    Actively poll a freshly bootstrapped controller until it is able to
+    serve the testcase, instead of sleeping for a fixed amount of time.
+
+    The probe retries every check with exponential backoff until the
+    deadline expires. When the controller is not reachable from the runner
+    (e.g. it runs on a remote docker host), every check goes through the
+    container instead: open ports are read from /proc/net/tcp and apps or
+    features from the karaf client.
+    """
+
+    def __init__(self, platform, host, apps=(), container=None, timeout=120,
+                 interval=0.5, max_interval=5, backoff=2, rest_port=REST_PORT,
+                 openflow_ports=OPENFLOW_PORTS, started=None, reachable=True):
+        """
+        Args:
+            platform (str): 'odl' or 'onos'.
+            host (str): address the controller is reachable at.
+            apps (list): ONOS apps or ODL features which must be active.
+            container: docker container of the controller, used for karaf client checks.
+            timeout (float): deadline in seconds.
+            interval (float): initial delay between two polls.
+            max_interval (float): upper bound of the delay between two polls.
+            backoff (float): multiplier applied to the delay after each failed poll.
+            started (float): time the controller was started, defaults to now.
+            reachable (bool): the runner can connect to the controller address,
+                otherwise the container is required.
+        """
+        self.logger = logging.getLogger("ReadinessProbe")
+        self.platform = platform
+        self.host = host
+        self.apps = [app for app in apps if app]
+        self.container = container
+        self.timeout = timeout
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.rest = RestClient(platform, host, port=rest_port, timeout=max_interval, retries=0)
+        self.rest_port = rest_port
+        self.openflow_ports = openflow_ports
+        self.reachable = reachable
+        self.started = started if started is not None else time()
+
+    def listening_ports(self):
+        """
+        List the TCP ports listened on inside the controller container.
+
+        returns: set of port numbers
+        """
+        ports = set()
+        output = exec_output(self.container, 'cat /proc/net/tcp /proc/net/tcp6')
+        for line in output.split('\n'):
+            fields = line.split()
+            # local_address is <ip>:<port> in hex, state 0A is LISTEN
+            if len(fields) > 3 and fields[3] == '0A' and ':' in fields[1]:
+                ports.add(int(fields[1].rsplit(':', 1)[1], 16))
+        return ports
+
+    def check_openflow(self):
+        """
+        Check whether the controller is listening on an OpenFlow port.
+        """
+        if not self.reachable:
+            return bool(self.listening_ports() & set(self.openflow_ports))
+        for port in self.openflow_ports:
+            try:
+                sock = socket.create_connection((self.host, port), timeout=self.max_interval)
+            except (socket.error, socket.timeout):
+                continue
+            sock.close()
+            return True
+        return False
+
+    def onos_active_apps(self):
+        """
+        Fetch the names of active ONOS applications, using the REST API
+        and falling back to the karaf client of the container.
+
+        returns: set of application names, or None if ONOS is not answering
+        """
+        if self.reachable:
+            try:
+                apps = self.rest.get('/onos/v1/applications').get('applications', [])
+                return set(app['name'] for app in apps if app.get('state') == 'ACTIVE')
+            except Exception:
+                self.logger.debug("ONOS REST API not available yet on %s", self.host)
+        if self.container is None:
+            return None
+        raw_active_apps = exec_output(self.container, 'client "apps -a -s"')
+        active = set()
+        for token in raw_active_apps.replace(',', ' ').split():
+            if token.startswith('name='):
+                token = token[len('name='):]
+            if token.startswith('org.'):
+                active.add(token)
+        return active or None
+
+    def check_onos(self):
+        """
+        Check whether all requested ONOS apps are active and the OpenFlow
+        port is open.
+        """
+        active = self.onos_active_apps()
+        if active is None:
+            return False
+        for app in self.apps:
+            if app not in active and 'org.onosproject.' + app not in active:
+                self.logger.debug("ONOS app %s is not active yet", app)
+                return False
+        return self.check_openflow()
+
+    def karaf_features(self):
+        """
+        List installed karaf features of the ODL container.
+
+        returns: set of feature names, or None if the karaf client is not usable yet
+        """
+        output = exec_output(self.container,
+                             '/opt/opendaylight/bin/client -u karaf "feature:list -i"')
+        if '|' not in output:
+            return None
+        tokens = set()
+        for line in output.split('\n'):
+            tokens.update(line.replace('|', ' ').replace('[', ' ').replace(']', ' ').split())
+        return tokens
+
+    def check_karaf(self):
+        """
+        Check whether the karaf client of the ODL container accepts commands.
+        """
+        return self.karaf_features() is not None
+
+    def check_odl(self):
+        """
+        Check whether all requested ODL features are installed, RESTCONF
+        answers (if requested) and the OpenFlow port is open.
+        """
+        installed = self.karaf_features()
+        if installed is None:
+            return False
+        for feature in self.apps:
+            if feature not in installed:
+                self.logger.debug("ODL feature %s is not installed yet", feature)
+                return False
+        if any('restconf' in feature for feature in self.apps):
+            if not self.reachable:
+                if self.rest_port not in self.listening_ports():
+                    return False
+            else:
+                try:
+                    self.rest.get('/restconf/modules')
+                except Exception:
+                    return False
+        return self.check_openflow()
+
+    def wait_for(self, check, what):
+        """
+        Poll check() with backoff until it succeeds or the deadline expires.
+
+        Args:
+            check (callable): returns True when the condition holds.
+            what (str): description of the condition used in logs and errors.
+
+        returns: seconds elapsed since the probe was created
+        """
+        delay = self.interval
+        while True:
+            try:
+                if check():
+                    elapsed = time() - self.started
+                    self.logger.debug("%s ready after %.2fs", what, elapsed)
+                    return elapsed
+            except Exception:
+                self.logger.debug("Probe of %s failed", what, exc_info=True)
+            remaining = self.started + self.timeout - time()
+            if remaining <= 0:
+                raise ReadinessException(what, self.timeout)
+            sleep(min(delay, remaining))
+            delay = min(delay * self.backoff, self.max_interval)
+
+    def wait(self):
+        """
+        Block until the controller is ready.
+
+        returns: observed time-to-ready in seconds
+        """
+        if 'onos' == self.platform:
+            return self.wait_for(self.check_onos, "ONOS on %s" % self.host)
+        elif 'odl' == self.platform:
+            return self.wait_for(self.check_odl, "ODL on %s" % self.host)
+        return self.wait_for(self.check_openflow, "OpenFlow on %s" % self.host)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+import os
+import logging
+from array import array
+from time import time
+from threading import Thread, Event
+try:
+    from time import monotonic
+except ImportError:
+    # python 2 has no monotonic clock in the standard library
+    monotonic = time
+
+from sdntest.mesh import npy, raw, strings, save_npz
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# File the resource usage of a job is saved in, inside the output directory.
+STATS_FILE = 'stats.%s.npz'
+
+def read_counters(f):
+    """
+    Read a file kept open from its beginning.
+    """
+    f.seek(0)
+    return f.read()
+
+class CgroupReader(object):
+    """
+    Read the resource usage of a container from its cgroup and network
+    namespace, through files kept open between samples.
+    """
+
+    def __init__(self, pid):
+        """
+        Args:
+            pid (int): host pid of the init process of the container.
+
+        raises: IOError if the cgroup files are not reachable
+        """
+        paths = {}
+        with open('/proc/%d/cgroup' % pid) as f:
+            for line in f:
+                _, controllers, path = line.rstrip('\n').split(':', 2)
+                for controller in controllers.split(','):
+                    paths[controller] = path
+        if '' in paths and os.path.exists(os.path.join(CGROUP_ROOT, 'cgroup.controllers')):
+            # unified hierarchy
+            base = CGROUP_ROOT + paths['']
+            self.cpu_file = open(os.path.join(base, 'cpu.stat'))
+            self.memory_file = open(os.path.join(base, 'memory.current'))
+            self.unified = True
+        else:
+            self.cpu_file = open(os.path.join(CGROUP_ROOT, 'cpuacct') + paths['cpuacct'] +
+                                 '/cpuacct.usage')
+            self.memory_file = open(os.path.join(CGROUP_ROOT, 'memory') + paths['memory'] +
+                                    '/memory.usage_in_bytes')
+            self.unified = False
+        self.net_file = open('/proc/%d/net/dev' % pid)
+
+    def sample(self):
+        """
+        returns: (cpu seconds, memory bytes, received bytes, sent bytes),
+                 cpu and network counters are cumulative
+        """
+        content = read_counters(self.cpu_file)
+        if self.unified:
+            fields = dict(line.split() for line in content.splitlines() if line)
+            cpu = int(fields['usage_usec']) / 1e6
+        else:
+            cpu = int(content) / 1e9
+        memory = float(read_counters(self.memory_file))
+        rx = tx = 0.
+        for line in read_counters(self.net_file).splitlines()[2:]:
+            name, counters = line.split(':', 1)
+            if name.strip() == 'lo':
+                continue
+            counters = counters.split()
+            rx += int(counters[0])
+            tx += int(counters[8])
+        return cpu, memory, rx, tx
+
+    def close(self):
+        for f in (self.cpu_file, self.memory_file, self.net_file):
+            f.close()
+
+class DockerStatsReader(object):
+    """
+    Read the resource usage of a container from the docker stats stream,
+    when its cgroup is not reachable (e.g. sdntest runs in a container).
+    Docker emits one sample per second, so sampling is limited to 1 Hz.
+    """
+
+    def __init__(self, container):
+        self.stream = container.stats(stream=True, decode=True)
+
+    def sample(self):
+        stats = next(self.stream)
+        cpu = stats['cpu_stats']['cpu_usage']['total_usage'] / 1e9
+        memory = float(stats['memory_stats'].get('usage', 0))
+        networks = stats.get('networks', {}).values()
+        rx = float(sum(network['rx_bytes'] for network in networks))
+        tx = float(sum(network['tx_bytes'] for network in networks))
+        return cpu, memory, rx, tx
+
+    def close(self):
+        close = getattr(self.stream, 'close', None)
+        if close is not None:
+            close()
+
+def open_reader(container, local=True):
+    """
+    Get the cheapest available resource reader of a container.
+
+    Args:
+        container: docker container.
+        local (bool): the container runs on this machine.
+    """
+    if not local:
+        return DockerStatsReader(container)
+    container.reload()
+    try:
+        return CgroupReader(container.attrs['State']['Pid'])
+    except (IOError, OSError, KeyError, ValueError):
+        return DockerStatsReader(container)
+
+class ResourceSampler(Thread):
+    """
+    Sample CPU, memory and network usage of containers at a fixed
+    interval, and save the time series in a compressed NPZ archive.
+
+    The archive holds 'time' (wall-clock seconds of each sample, the clock
+    of the workflow output and timeline events), 'container' names, and
+    time x container 'cpu' (cumulative cpu seconds), 'memory' (bytes),
+    'rx' and 'tx' (cumulative bytes) arrays. Missing samples are NaN.
+    """
+
+    FIELDS = ('cpu', 'memory', 'rx', 'tx')
+
+    def __init__(self, containers, path, interval=1.0, local=True):
+        """
+        Args:
+            containers (dict): name to docker container.
+            path (str): destination NPZ archive.
+            interval (float): seconds between two samples.
+            local (bool): the containers run on this machine, their cgroup
+                may be read directly.
+        """
+        Thread.__init__(self)
+        self.daemon = True
+        self.logger = logging.getLogger("Resources")
+        self.names = sorted(containers)
+        self.containers = [containers[name] for name in self.names]
+        self.path = path
+        self.interval = interval
+        self.local = local
+        self.stopped = Event()
+        self.times = array('d')
+        self.series = dict((field, array('d')) for field in self.FIELDS)
+
+    def run(self):
+        readers = []
+        for container in self.containers:
+            try:
+                readers.append(open_reader(container, self.local))
+            except Exception as e:
+                self.logger.warning("Cannot sample %s: %s", container.name, e)
+                readers.append(None)
+        nan = float('nan')
+        tick = monotonic()
+        try:
+            while not self.stopped.is_set():
+                self.times.append(time())
+                for reader in readers:
+                    try:
+                        values = reader.sample() if reader is not None else (nan,) * 4
+                    except Exception:
+                        values = (nan,) * 4
+                    for field, value in zip(self.FIELDS, values):
+                        self.series[field].append(value)
+                # keep a fixed rate, skipping ticks if sampling fell behind
+                tick += self.interval
+                now = monotonic()
+                if tick < now:
+                    tick = now
+                self.stopped.wait(tick - now)
+        finally:
+            for reader in readers:
+                if reader is not None:
+                    reader.close()
+
+    def usage(self):
+        """
+        Summarize the samples of each container.
+
+        returns: dict mapping container name to (peak memory MB, mean cpu
+                 cores), NaN when the container has no samples
+        """
+        nan = float('nan')
+        usage = {}
+        count = len(self.names)
+        for i, name in enumerate(self.names):
+            samples = [(t, cpu, memory) for t, cpu, memory in
+                       zip(self.times, self.series['cpu'][i::count], self.series['memory'][i::count])
+                       if cpu == cpu]
+            if len(samples) < 2:
+                usage[name] = (nan, nan)
+                continue
+            span = samples[-1][0] - samples[0][0]
+            usage[name] = (max(memory for _, _, memory in samples) / 2 ** 20,
+                           (samples[-1][1] - samples[0][1]) / span if span > 0 else nan)
+        return usage
+
+    def stop(self):
+        """
+        Stop sampling and save the archive.
+
+        returns: number of samples
+        """
+        self.stopped.set()
+        self.join()
+        shape = (len(self.times), len(self.names))
+        arrays = dict((field, npy('<f8', shape, raw(values)))
+                      for field, values in self.series.items())
+        arrays['time'] = npy('<f8', (len(self.times),), raw(self.times))
+        arrays['container'] = strings(self.names)
+        save_npz(self.path, arrays)
+        return len(self.times)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+import sys
+import json
+import socket
+import base64
+from time import sleep
+if sys.version[0] == '2':
+    import Queue as queue
+    import httplib as client
+else:
+    import queue
+    import http.client as client
+
+from sdntest.exception import RestException
+
+REST_PORT = 8181
+CREDENTIALS = {
+    'odl': ('admin', 'admin'),
+    'onos': ('onos', 'rocks')
+}
+
+def decode(content):
+    """
+    Decode a json answer; answers which are not json are kept as text.
+    """
+    if not content.strip():
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content
+
+class RestClient(object):
+    """
+    JSON client for the northbound REST API of a controller.
+
+    Requests go through a small pool of keep-alive HTTP connections, so the
+    client can be shared by several threads without a TCP handshake per
+    request. Connection errors and 5xx answers are retried with backoff.
+    """
+
+    def __init__(self, platform, host, port=REST_PORT, timeout=5, credentials=None,
+                 connections=4, retries=2, backoff=0.2):
+        """
+        Args:
+            platform (str): 'odl' or 'onos', selects default credentials.
+            host (str): address of the controller.
+            port (int): port of the REST API.
+            timeout (float): socket timeout of a request.
+            credentials (tuple): (user, password), defaults to the platform ones.
+            connections (int): maximum number of keep-alive connections.
+            retries (int): number of retries of a failed request.
+            backoff (float): delay before the first retry, doubled after each one.
+        """
+        self.platform = platform
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connections = connections
+        self.retries = retries
+        self.backoff = backoff
+        auth = '%s:%s' % (credentials or CREDENTIALS.get(platform, ('admin', 'admin')))
+        self.auth = 'Basic ' + base64.b64encode(auth.encode('utf-8')).decode('ascii')
+        # the most recently used connection is reused first, so that
+        # sequential requests keep a single connection open
+        self.pool = queue.LifoQueue()
+        for _ in range(connections):
+            self.pool.put(None)
+
+    def connect(self):
+        """
+        Open a new HTTP connection to the controller.
+        """
+        return client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def send(self, method, path, body=None):
+        """
+        Send a request to the controller over a pooled connection.
+
+        Args:
+            method (str): HTTP method.
+            path (str): absolute path of the resource.
+            body (dict): json object sent as request body.
+
+        returns: (status code, decoded json object or None, dict of lower-cased headers)
+        """
+        data = json.dumps(body) if body is not None else None
+        headers = {
+            'Authorization': self.auth,
+            'Accept': 'application/json'
+        }
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        delay = self.backoff
+        attempt = 0
+        while True:
+            conn = self.pool.get()
+            try:
+                if conn is None:
+                    conn = self.connect()
+                conn.request(method, path, data, headers)
+                resp = conn.getresponse()
+                content = resp.read().decode('utf-8')
+                if resp.getheader('connection', '').lower() == 'close':
+                    conn.close()
+                    conn = None
+            except (socket.error, client.HTTPException):
+                if conn is not None:
+                    conn.close()
+                conn = None
+                if attempt >= self.retries:
+                    raise
+            else:
+                if resp.status < 500 or attempt >= self.retries:
+                    return (resp.status, decode(content),
+                            dict((k.lower(), v) for k, v in resp.getheaders()))
+            finally:
+                self.pool.put(conn)
+            attempt += 1
+            sleep(delay)
+            delay *= 2
+
+    def request(self, method, path, body=None):
+        """
+        Send a request to the controller.
+
+        returns: (status code, decoded json object or None)
+        """
+        status, content, _ = self.send(method, path, body)
+        return status, content
+
+    def get(self, path):
+        """
+        GET a resource, raising an error unless the controller answers 200.
+
+        returns: decoded json object
+        """
+        status, content = self.request('GET', path)
+        if status != 200:
+            raise RestException('GET', path, status)
+        return content
+
+    def delete(self, path):
+        """
+        DELETE a resource. A missing resource is considered as deleted.
+
+        returns: True if the resource does not exist anymore
+        """
+        status, _ = self.request('DELETE', path)
+        return status in (200, 202, 204, 404)
+
+    def close(self):
+        """
+        Close all idle keep-alive connections.
+        """
+        for _ in range(self.connections):
+            conn = self.pool.get()
+            if conn is not None:
+                conn.close()
+        for _ in range(self.connections):
+            self.pool.put(None)
@@ -0,0 +1,452 @@
+#!/usr/bin/env python
+
+import os
+import re
+import csv
+import json
+import logging
+from time import strptime
+from calendar import timegm
+from multiprocessing import Pool
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sdntest.output import read_lines, find_output
+from sdntest.scheduler import expand_jobs
+from sdntest.mesh import RECEIVED, NOT_PROBED
+
+# Columns of each table of the result store. 'job' refers to the row of
+# the 'jobs' table the measurement comes from.
+TABLES = {
+    'jobs': ('job', 'name', 'argindex', 'repeat', 'arguments', 'params'),
+    'ping': ('job', 'time', 'seq', 'rtt'),
+    'ping_summary': ('job', 'transmitted', 'received', 'loss',
+                     'rtt_min', 'rtt_avg', 'rtt_max', 'rtt_mdev'),
+    'iperf': ('job', 'time', 'start', 'end', 'bandwidth',
+              'jitter', 'lost', 'total', 'loss', 'report'),
+    'multiping': ('job', 'time', 'src', 'dst', 'transmitted', 'received', 'loss'),
+    'link': ('job', 'time', 'src', 'dst', 'action'),
+    'convergence': ('job', 'action', 'time', 'outage', 'lost', 'recovery'),
+    'intent': ('job', 'time', 'key', 'state', 'status', 'submit', 'install'),
+    'intent_summary': ('job', 'installed', 'total', 'elapsed'),
+    'discovery': ('job', 'discovered', 'total', 'elapsed'),
+    'reachability': ('job', 'reachable', 'total', 'elapsed'),
+    'mesh': ('job', 'src', 'dst', 'transmitted', 'received', 'loss', 'rtt'),
+    'event': ('job', 'time', 'action', 'target', 'state', 'late', 'took'),
+    'resources': ('job', 'container', 'samples', 'cpu_mean', 'cpu_max',
+                  'memory_mean', 'memory_max', 'rx_rate', 'tx_rate')
+}
+
+# Per-run metrics: (table, column, row filter). The value of a run is the
+# mean of the selected column over the rows of the run.
+METRICS = {
+    'throughput': ('iperf', 'bandwidth', lambda t: t['report'] == 0),
+    'jitter': ('iperf', 'jitter', lambda t: t['report'] == 1),
+    'iperf_loss': ('iperf', 'loss', lambda t: t['report'] == 1),
+    'rtt': ('ping', 'rtt', None),
+    'ping_loss': ('ping_summary', 'loss', None),
+    'multiping_loss': ('multiping', 'loss', None),
+    'failure_outage': ('convergence', 'outage', lambda t: t['action'] == 'down'),
+    'failure_lost': ('convergence', 'lost',
+                     lambda t: (t['action'] == 'down') & (t['lost'] >= 0)),
+    'failure_recovery': ('convergence', 'recovery', lambda t: t['action'] == 'down'),
+    'restore_outage': ('convergence', 'outage', lambda t: t['action'] == 'up'),
+    'restore_lost': ('convergence', 'lost',
+                     lambda t: (t['action'] == 'up') & (t['lost'] >= 0)),
+    'restore_recovery': ('convergence', 'recovery', lambda t: t['action'] == 'up'),
+    'intent_submit': ('intent', 'submit', None),
+    'intent_install': ('intent', 'install', None),
+    'intents_installed': ('intent_summary', 'elapsed', None),
+    'host_discovery': ('discovery', 'elapsed', None),
+    'reachable_pairs': ('reachability', 'reachable', None),
+    'mesh_loss': ('mesh', 'loss', None),
+    'mesh_rtt': ('mesh', 'rtt', None),
+    'controller_cpu': ('resources', 'cpu_mean', lambda t: t['container'] == 'controller'),
+    'controller_memory': ('resources', 'memory_max', lambda t: t['container'] == 'controller'),
+    'mininet_cpu': ('resources', 'cpu_mean', lambda t: t['container'] == 'mininet')
+}
+
+TIMESTAMP = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) \| ?(.*)$')
+PING_TIME = re.compile(r'^\[(\d+\.\d+)\]')
+LINK = re.compile(r'Config link \((\w+), (\w+)\) (UP|DOWN)(?: at ([\d.]+))?')
+PING_REPLY = re.compile(r'bytes from ([\d.]+): icmp_[rs]eq=(\d+) ttl=\d+ time=([\d.]+) ms')
+PING_STATS = re.compile(r'(\d+) packets transmitted, (\d+) received,.*?([\d.]+)% packet loss')
+PING_RTT = re.compile(r'rtt min/avg/max/mdev = ([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+) ms')
+MULTIPING = re.compile(r'([\d.]+) -> ([\d.]+)\s+' + PING_STATS.pattern)
+IPERF = re.compile(r'\[\s*\d+\]\s+([\d.]+)\s*-\s*([\d.]+) sec\s+[\d.]+ \w?Bytes\s+'
+                   r'([\d.]+) (\w?)bits/sec(?:\s+([\d.]+) ms\s+(\d+)/\s*(\d+) \(([\d.e+-]+)%\))?')
+INTENT = re.compile(r'Intent (\S+) (\w+): status (\w+), submitted in ([\d.]+) ms, '
+                    r'installed in ([\d.]+|nan) ms')
+INTENT_SUMMARY = re.compile(r'Installed (\d+)/(\d+) intents in ([\d.]+) s')
+DISCOVERY = re.compile(r'Discovered (\d+)/(\d+) hosts in ([\d.]+) s')
+REACHABILITY = re.compile(r'Reachable (\d+)/(\d+) host pairs in ([\d.]+) s')
+EVENT = re.compile(r'Event \d+: (\w+) (\(\w+, \w+\)|\S+) (\w+) at ([\d.]+) '
+                   r'\(late ([\d.]+) ms, took ([\d.]+) ms\)')
+UNITS = {'': 1e-6, 'K': 1e-3, 'M': 1., 'G': 1e3}
+
+# Two-sided 95% Student t critical values for 1..30 degrees of freedom.
+T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+def t95(dof):
+    """
+    Critical value of the two-sided 95% confidence interval.
+    """
+    if dof < 1:
+        return float('nan')
+    return T95[dof - 1] if dof <= len(T95) else 1.960
+
+def split_timestamp(line):
+    """
+    Split the timestamp added by the workflow logger from a line. Workflows
+    log it in UTC, so that it does not depend on the timezone of the
+    container nor of the runner parsing it.
+
+    returns: (epoch seconds or None, message)
+    """
+    match = TIMESTAMP.match(line)
+    if not match:
+        return None, line
+    stamp, millis, message = match.groups()
+    return timegm(strptime(stamp, '%Y-%m-%d %H:%M:%S')) + int(millis) / 1000., message
+
+def parse_lines(job, lines):
+    """
+    Parse the known workflow outputs from a stream of lines.
+
+    Args:
+        job (int): job id stored in the rows.
+        lines (iterable): lines of a workflow output.
+
+    returns: dict mapping table name to list of row tuples
+    """
+    rows = dict((table, []) for table in TABLES
+                if table not in ('jobs', 'convergence', 'mesh', 'resources'))
+    summary = None
+    report = 0
+    for line in lines:
+        now, message = split_timestamp(line)
+        if now is None:
+            now = float('nan')
+        match = PING_REPLY.search(message)
+        if match:
+            stamp = PING_TIME.match(message)
+            if stamp:
+                now = float(stamp.group(1))
+            rows['ping'].append((job, now, int(match.group(2)), float(match.group(3))))
+            continue
+        match = EVENT.search(message)
+        if match:
+            action, target, state, stamp, late, took = match.groups()
+            rows['event'].append((job, float(stamp), action, target, state.lower(),
+                                  float(late), float(took)))
+            if action == 'link':
+                # link events also feed the convergence analysis
+                src, dst = target.strip('()').split(', ')
+                rows['link'].append((job, float(stamp), src, dst, state.lower()))
+            continue
+        match = LINK.search(message)
+        if match:
+            src, dst, action, stamp = match.groups()
+            rows['link'].append((job, float(stamp) if stamp else now, src, dst, action.lower()))
+            continue
+        match = IPERF.search(message)
+        if match:
+            start, end, rate, unit, jitter, lost, total, loss = match.groups()
+            rows['iperf'].append((job, now, float(start), float(end),
+                                  float(rate) * UNITS.get(unit, 1.),
+                                  float(jitter) if jitter else float('nan'),
+                                  int(lost) if lost else -1,
+                                  int(total) if total else -1,
+                                  float(loss) if loss else float('nan'),
+                                  report))
+            report = 0
+            continue
+        if 'Server Report' in message:
+            report = 1
+            continue
+        match = INTENT.search(message)
+        if match:
+            key, state, status, submit, install = match.groups()
+            rows['intent'].append((job, now, key, state,
+                                   int(status) if status.isdigit() else -1,
+                                   float(submit), float(install)))
+            continue
+        match = INTENT_SUMMARY.search(message)
+        if match:
+            installed, total, elapsed = match.groups()
+            rows['intent_summary'].append((job, int(installed), int(total), float(elapsed)))
+            continue
+        match = DISCOVERY.search(message)
+        if match:
+            discovered, total, elapsed = match.groups()
+            rows['discovery'].append((job, int(discovered), int(total), float(elapsed)))
+            continue
+        match = REACHABILITY.search(message)
+        if match:
+            reachable, total, elapsed = match.groups()
+            rows['reachability'].append((job, int(reachable), int(total), float(elapsed)))
+            continue
+        match = MULTIPING.search(message)
+        if match:
+            src, dst, transmitted, received, loss = match.groups()
+            rows['multiping'].append((job, now, src, dst, int(transmitted),
+                                      int(received), float(loss)))
+            continue
+        match = PING_STATS.search(message)
+        if match:
+            transmitted, received, loss = match.groups()
+            nan = float('nan')
+            summary = [job, int(transmitted), int(received), float(loss), nan, nan, nan, nan]
+            rows['ping_summary'].append(summary)
+            continue
+        match = PING_RTT.search(message)
+        if match and summary is not None:
+            summary[4:] = [float(value) for value in match.groups()]
+            summary = None
+    rows['ping_summary'] = [tuple(row) for row in rows['ping_summary']]
+    return rows
+
+def parse_mesh(job, path):
+    """
+    Summarize a ping mesh archive per (src, dst) pair.
+
+    Args:
+        job (int): job id stored in the rows.
+        path (str): NPZ archive saved by sdntest.mesh.PingMesh.
+
+    returns: list of 'mesh' rows
+    """
+    with np.load(path) as mesh:
+        loss, rtt = mesh['loss'], mesh['rtt']
+        src, dst = mesh['src'], mesh['dst']
+    probed = loss != NOT_PROBED
+    transmitted = probed.sum(axis=0)
+    received = (loss == RECEIVED).sum(axis=0)
+    sums = np.where(loss == RECEIVED, rtt, 0).sum(axis=0, dtype=float)
+    rows = []
+    for i, j in zip(*np.nonzero(transmitted)):
+        rows.append((job, str(src[i]), str(dst[j]), int(transmitted[i, j]), int(received[i, j]),
+                     float(100. * (1 - float(received[i, j]) / transmitted[i, j])),
+                     float(sums[i, j] / received[i, j]) if received[i, j] else float('nan')))
+    return rows
+
+def parse_stats(job, path):
+    """
+    Summarize the resource usage of each container of a run.
+
+    Args:
+        job (int): job id stored in the rows.
+        path (str): NPZ archive saved by sdntest.resources.ResourceSampler.
+
+    returns: list of 'resources' rows, cpu in cores, memory in MB and
+             network rates in Mbits/sec
+    """
+    with np.load(path) as stats:
+        times = stats['time']
+        series = dict((field, stats[field]) for field in ('cpu', 'memory', 'rx', 'tx'))
+        containers = stats['container']
+    rows = []
+    if len(times) < 2:
+        return rows
+    elapsed = np.diff(times)[:, None]
+    cpu = np.diff(series['cpu'], axis=0) / elapsed
+    span = times[-1] - times[0]
+    for i, container in enumerate(containers):
+        memory = series['memory'][:, i] / 2 ** 20
+        rates = [(series[field][-1, i] - series[field][0, i]) * 8e-6 / span
+                 for field in ('rx', 'tx')]
+        rows.append((job, str(container), len(times),
+                     float(np.nanmean(cpu[:, i])), float(np.nanmax(cpu[:, i])),
+                     float(np.nanmean(memory)), float(np.nanmax(memory)),
+                     float(rates[0]), float(rates[1])))
+    return rows
+
+def parse_file(args):
+    """
+    Parse one output file, and the ping mesh and resource archives of the
+    job if any. Runs in a worker process.
+
+    Args:
+        args (tuple): (job id, path of the output file, path of the mesh
+            archive, path of the resource archive).
+
+    returns: (job id, dict of table rows)
+    """
+    job, path, meshpath, statspath = args
+    rows = parse_lines(job, read_lines(path))
+    if np is not None and os.path.isfile(meshpath):
+        rows['mesh'] = parse_mesh(job, meshpath)
+    if np is not None and os.path.isfile(statspath):
+        rows['resources'] = parse_stats(job, statspath)
+    return job, rows
+
+class ResultStore(object):
+    """
+    Columnar store of parsed measurements, one table per kind of output.
+    """
+
+    def __init__(self):
+        self.columns = dict((table, dict((column, []) for column in columns))
+                            for table, columns in TABLES.items())
+
+    def add(self, table, rows):
+        """
+        Append rows (tuples in the column order of the table).
+        """
+        names = TABLES[table]
+        for row in rows:
+            for name, value in zip(names, row):
+                self.columns[table][name].append(value)
+
+    def __len__(self):
+        return len(self.columns['jobs']['job'])
+
+    def table(self, name):
+        """
+        Get a table as a dict of NumPy arrays.
+        """
+        if np is None:
+            raise ImportError("NumPy is required to analyze results: pip install numpy")
+        return dict((column, np.asarray(values))
+                    for column, values in self.columns[name].items())
+
+    def to_csv(self, directory):
+        """
+        Write one CSV file per table.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for table, columns in TABLES.items():
+            with open(os.path.join(directory, table + '.csv'), 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(zip(*[self.columns[table][column] for column in columns]))
+
+    def to_npz(self, path):
+        """
+        Write all tables into one compressed NumPy archive, as <table>.<column> arrays.
+        """
+        arrays = {}
+        for table in TABLES:
+            for column, values in self.table(table).items():
+                arrays['%s.%s' % (table, column)] = values
+        np.savez_compressed(path, **arrays)
+
+    def run_values(self, metric):
+        """
+        Compute the value of a metric for every run.
+
+        returns: (job ids, values) arrays, runs without data are skipped
+        """
+        table_name, column, select = METRICS[metric]
+        table = self.table(table_name)
+        values = table[column].astype(float)
+        jobs = table['job'].astype(int)
+        keep = ~np.isnan(values)
+        if select is not None and len(values):
+            keep &= select(table)
+        size = len(self)
+        sums = np.bincount(jobs[keep], weights=values[keep], minlength=size)
+        counts = np.bincount(jobs[keep], minlength=size)
+        ids = np.nonzero(counts)[0]
+        return ids, sums[ids] / counts[ids]
+
+    def summarize(self, metric):
+        """
+        Aggregate a metric across repeats, per argument.
+
+        returns: list of dicts with argument, params, n, mean, std, p5, p50, p95 and
+                 ci95 (half width of the 95% confidence interval of the mean)
+        """
+        ids, values = self.run_values(metric)
+        jobs = self.table('jobs')
+        argindex = jobs['argindex'][ids] if len(ids) else np.array([], dtype=int)
+        summary = []
+        for index in np.unique(argindex):
+            samples = values[argindex == index]
+            n = len(samples)
+            std = samples.std(ddof=1) if n > 1 else float('nan')
+            p5, p50, p95 = np.percentile(samples, [5, 50, 95])
+            summary.append({
+                'metric': metric,
+                'argindex': int(index),
+                'arguments': jobs['arguments'][jobs['argindex'] == index][0],
+                'params': jobs['params'][jobs['argindex'] == index][0],
+                'n': n,
+                'mean': samples.mean(),
+                'std': std,
+                'p5': p5,
+                'p50': p50,
+                'p95': p95,
+                'ci95': t95(n - 1) * std / np.sqrt(n) if n > 1 else float('nan')
+            })
+        return summary
+
+def job_row(jobid, job):
+    """
+    Row of the 'jobs' table describing a job, its sweep parameters as json.
+    """
+    params = json.dumps(job.params, sort_keys=True) if job.params else ''
+    return (jobid, job.name, job.argindex, job.repeat, job.arguments, params)
+
+def extract(configs, processes=None):
+    """
+    Parse the output files of a testcase into a result store, using a
+    process pool across files.
+
+    Args:
+        configs (dict): json object of testcase configuration file.
+        processes (int): number of worker processes, defaults to the CPU count.
+
+    returns: ResultStore
+    """
+    logger = logging.getLogger("Results")
+    outputdir = os.path.join(configs['workspace'], 'output')
+    store = ResultStore()
+    tasks = []
+    for job in expand_jobs(configs):
+        path = find_output(os.path.join(outputdir, job.outputfile))
+        if path is None:
+            continue
+        jobid = len(store)
+        store.add('jobs', [job_row(jobid, job)])
+        tasks.append((jobid, path, os.path.join(outputdir, job.meshfile),
+                      os.path.join(outputdir, job.statsfile)))
+    logger.info("Parsing %d output files...", len(tasks))
+    pool = Pool(processes)
+    try:
+        for _, rows in pool.imap_unordered(parse_file, tasks):
+            for table, table_rows in rows.items():
+                store.add(table, table_rows)
+    finally:
+        pool.close()
+        pool.join()
+    return store
+
+def report(store, directory):
+    """
+    Save the store and the summary of every metric with data.
+
+    Args:
+        store (ResultStore): parsed results.
+        directory (str): destination directory.
+
+    returns: list of summary rows
+    """
+    store.to_csv(directory)
+    summary = []
+    if np is not None:
+        store.to_npz(os.path.join(directory, 'results.npz'))
+        for metric in sorted(METRICS):
+            summary.extend(store.summarize(metric))
+        columns = ('metric', 'argindex', 'arguments', 'params', 'n', 'mean', 'std',
+                   'p5', 'p50', 'p95', 'ci95')
+        with open(os.path.join(directory, 'summary.csv'), 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows([[row[column] for column in columns] for row in summary])
+    return summary
@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+
+import os
+import re
+import json
+import heapq
+import random
+import hashlib
+import itertools
+from time import time
+from collections import deque
+from threading import Lock, Condition
+
+from sdntest.mesh import MESH_FILE
+from sdntest.resources import STATS_FILE
+
+# Events posted by test suite workers on the runner event channel,
+# as (event, testcase, job, exc_info) tuples.
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+WORKER_EXIT = 'exit'
+
+# Sweep parameters which select the controller of a job instead of being
+# passed to the workflow only.
+CONTROLLER_PARAMS = ('platform', 'release', 'apps')
+
+class Job(object):
+    """
+    One unit of work: a single repeat of the workflow with one argument.
+    """
+
+    def __init__(self, arguments, argindex=0, repeat=1, total=1, params=None, label=None):
+        """
+        Args:
+            arguments (str): arguments passed to the workflow.
+            argindex (int): 1-based index in the arguments list or in the
+                sweep grid, 0 if the testcase has a single argument string.
+            repeat (int): 1-based repeat index of this argument.
+            total (int): number of repeats of this argument.
+            params (dict): sweep parameters of the job.
+            label (str): names the sweep point in output files.
+        """
+        self.arguments = arguments
+        self.argindex = argindex
+        self.repeat = repeat
+        self.total = total
+        self.params = params or {}
+        self.label = label
+
+    @property
+    def name(self):
+        """
+        Identifier of the job, unique inside a testcase.
+        """
+        if self.label:
+            return '%s-%d' % (self.label, self.repeat)
+        if self.argindex:
+            return '%d-%d' % (self.argindex, self.repeat)
+        return '%d' % self.repeat
+
+    @property
+    def outputfile(self):
+        """
+        Name of the file the workflow output of the job is saved in.
+        """
+        return 'output.%s.log' % self.name
+
+    @property
+    def meshfile(self):
+        """
+        Name of the file a ping mesh workflow saves its results in.
+        """
+        return MESH_FILE % self.name
+
+    @property
+    def statsfile(self):
+        """
+        Name of the file the resource usage of the job is saved in.
+        """
+        return STATS_FILE % self.name
+
+    def __repr__(self):
+        return 'Job(%s: %s)' % (self.name, self.arguments)
+
+def repeats(configs):
+    """
+    Get the number of repeats of each argument, the maximum one with an
+    adaptive repeat.
+    """
+    repeat = configs.get('repeat', 0)
+    if isinstance(repeat, dict):
+        repeat = repeat['max']
+    return repeat
+
+def sweep_values(spec):
+    """
+    Expand the values of a sweep parameter: a list, an inclusive range
+    {"from": 100, "to": 1000, "step": 100}, or a single value.
+    """
+    if isinstance(spec, list):
+        return spec
+    if isinstance(spec, dict):
+        start, stop, step = spec['from'], spec['to'], spec.get('step', 1)
+        if not step or (stop - start) * step < 0:
+            raise ValueError("Invalid sweep range: %s" % json.dumps(spec, sort_keys=True))
+        count = int((stop - start) / float(step) + 1e-9) + 1
+        return [start + i * step for i in range(count)]
+    return [spec]
+
+class Sweep(object):
+    """
+    Jobs of a parameter grid, expanded lazily. Configured by a "sweep"
+    object, the "arguments" of the testcase being a template of them:
+
+        "arguments": "{branch} {hop} {seconds} {intentNum} {method} {platform} {rate}",
+        "sweep": {
+            "parameters": {
+                "branch": [4, 8],
+                "rate": {"from": 100, "to": 1000, "step": 100},
+                "release": ["1.8", "1.9"]
+            },
+            "sample": 50,
+            "seed": 0
+        }
+
+    The grid is the cartesian product of the parameters, in name order.
+    With "sample", only that many points drawn at random (reproducibly,
+    from "seed") are run. The platform, release and apps of the testcase
+    are parameters too, so that they can be used in the template or swept.
+    Each job carries its parameters, and the parameters which vary name
+    its output files.
+    """
+
+    def __init__(self, configs):
+        """
+        Args:
+            configs (dict): json object of testcase configuration file.
+        """
+        options = configs['sweep']
+        spec = dict(options.get('parameters', {}))
+        for name in CONTROLLER_PARAMS:
+            if name not in spec:
+                spec[name] = configs.get(name, 'odl' if 'platform' == name else '')
+        self.template = configs.get('arguments', '')
+        if isinstance(self.template, list):
+            raise ValueError("The arguments of a sweep must be a template string")
+        self.names = sorted(spec)
+        self.values = [sweep_values(spec[name]) for name in self.names]
+        # parameters naming the jobs
+        self.varying = [name for name, values in zip(self.names, self.values)
+                        if len(values) > 1]
+        self.repeat = repeats(configs)
+        self.points = 1
+        for values in self.values:
+            self.points *= len(values)
+        self.indexes = None
+        if options.get('sample') and options['sample'] < self.points:
+            rng = random.Random(options.get('seed', 0))
+            self.indexes = sorted(rng.sample(range(self.points), int(options['sample'])))
+        self.predicate = None
+        self.size = None
+
+    def params(self, index):
+        """
+        Get the parameters of a point of the grid.
+
+        Args:
+            index (int): 0-based index of the point.
+        """
+        params = {}
+        for name, values in reversed(list(zip(self.names, self.values))):
+            index, position = divmod(index, len(values))
+            params[name] = values[position]
+        return params
+
+    def grid(self):
+        """
+        Generate (index, parameters) of the points to run.
+        """
+        if self.indexes is not None:
+            for index in self.indexes:
+                yield index, self.params(index)
+            return
+        for index, values in enumerate(itertools.product(*self.values)):
+            yield index, dict(zip(self.names, values))
+
+    def label(self, params):
+        """
+        Name a point of the grid after its varying parameters.
+        """
+        return '_'.join('%s=%s' % (name, re.sub(r'[^\w.+-]', '-', str(params[name])))
+                        for name in self.varying)
+
+    def __iter__(self):
+        for index, params in self.grid():
+            arguments = self.template.format(**params)
+            label = self.label(params)
+            for i in range(self.repeat):
+                job = Job(arguments, index + 1, i + 1, self.repeat, params, label)
+                if self.predicate is None or self.predicate(job):
+                    yield job
+
+    def __len__(self):
+        if self.size is None:
+            if self.predicate is None:
+                points = len(self.indexes) if self.indexes is not None else self.points
+                self.size = points * self.repeat
+            else:
+                self.size = sum(1 for _ in self)
+        return self.size
+
+    def filter(self, predicate):
+        """
+        Get the jobs of the sweep accepted by a predicate, still lazily.
+        """
+        sweep = Sweep.__new__(Sweep)
+        sweep.__dict__.update(self.__dict__)
+        sweep.predicate = predicate if self.predicate is None else \
+            lambda job: self.predicate(job) and predicate(job)
+        sweep.size = None
+        return sweep
+
+def expand_jobs(configs):
+    """
+    Expand a testcase configuration into its jobs. With an adaptive
+    repeat, these are all the jobs which may be run.
+
+    Args:
+        configs (dict): json object of testcase configuration file.
+
+    returns: list of Job, or Sweep for a parameter grid
+    """
+    if configs.get('sweep'):
+        return Sweep(configs)
+    arguments = configs.get('arguments', '')
+    repeat = repeats(configs)
+    if type(arguments) == list:
+        arglist = list(enumerate(arguments, 1))
+    else:
+        arglist = [(0, arguments)]
+    return [Job(args, argindex, i + 1, repeat)
+            for argindex, args in arglist
+            for i in range(repeat)]
+
+def mean(values):
+    return sum(values) / float(len(values))
+
+class DurationHistory(object):
+    """
+    Durations of previous jobs, recorded in the output directory, used to
+    order the job queue and to estimate the duration of a sweep.
+
+    Durations are recorded per platform, release, workflow and argument.
+    A job never run before is estimated from the other arguments of the
+    same platform, release and workflow, then from the durations recorded
+    per argument only, and finally from the configured waiting time plus
+    the expected length of the workflow ("workflow_seconds").
+    """
+
+    FILENAME = 'durations.json'
+    # length of a workflow when nothing has been recorded yet
+    WORKFLOW_SECONDS = 60
+
+    def __init__(self, outputdir, configs=None):
+        """
+        Args:
+            outputdir (str): output directory of the testcase.
+            configs (dict): json object of testcase configuration file, the
+                durations are only keyed by argument without it.
+        """
+        self.path = os.path.join(outputdir, self.FILENAME)
+        self.lock = Lock()
+        self.durations = {}
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                self.durations = json.load(f)
+        configs = configs or {}
+        self.base = [configs.get('platform', 'odl'), configs.get('release', ''),
+                     configs.get('workflow') or ''] if configs else None
+        self.default = configs.get('waiting', 15) + \
+            configs.get('workflow_seconds', self.WORKFLOW_SECONDS)
+
+    def base_of(self, job):
+        """
+        Get the platform, release and workflow of a job.
+        """
+        platform, release, workflow = self.base
+        return [job.params.get('platform', platform), job.params.get('release', release),
+                workflow]
+
+    def key(self, job):
+        """
+        Get the key the durations of a job are recorded under.
+        """
+        if self.base is None:
+            return job.arguments
+        return json.dumps(self.base_of(job) + [job.arguments])
+
+    def expected(self, job):
+        """
+        Get the mean recorded duration of the argument of a job, or None
+        if unknown.
+        """
+        with self.lock:
+            durations = self.durations.get(self.key(job)) or \
+                self.durations.get(job.arguments)
+            if not durations:
+                return None
+            return mean(durations)
+
+    def similar(self, job):
+        """
+        Get the mean recorded duration of all arguments of the platform,
+        release and workflow of a job, or None if unknown.
+        """
+        if self.base is None:
+            return None
+        base = self.base_of(job)
+        durations = []
+        with self.lock:
+            for key, values in self.durations.items():
+                try:
+                    fields = json.loads(key)
+                except ValueError:
+                    continue
+                if isinstance(fields, list) and fields[:-1] == base:
+                    durations.extend(values)
+        return mean(durations) if durations else None
+
+    def estimate(self, job):
+        """
+        Estimate the duration of a job.
+
+        returns: (seconds, source), source is 'history', 'similar' or 'default'
+        """
+        expected = self.expected(job)
+        if expected is not None:
+            return expected, 'history'
+        similar = self.similar(job)
+        if similar is not None:
+            return similar, 'similar'
+        return float(self.default), 'default'
+
+    def record(self, job, seconds):
+        """
+        Record the duration of a job.
+        """
+        with self.lock:
+            self.durations.setdefault(self.key(job), []).append(seconds)
+
+    def save(self):
+        """
+        Atomically write the recorded durations back to the output directory.
+        """
+        with self.lock:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            tmpfile = self.path + '.tmp'
+            with open(tmpfile, 'w') as f:
+                json.dump(self.durations, f, indent=2, sort_keys=True)
+            os.rename(tmpfile, self.path)
+
+class RunManifest(object):
+    """
+    Completed jobs of a testcase, recorded in the output directory so that
+    an interrupted or extended sweep only runs the missing jobs.
+
+    A job is keyed by a hash of everything its result depends on: platform,
+    release, apps, contents of the workflow file, fault timeline, argument
+    and repeat index. Changing any of them makes the job pending again.
+    """
+
+    FILENAME = 'manifest.json'
+
+    def __init__(self, configs):
+        """
+        Args:
+            configs (dict): json object of testcase configuration file.
+        """
+        self.path = os.path.join(configs['workspace'], 'output', self.FILENAME)
+        self.lock = Lock()
+        self.jobs = {}
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                self.jobs = json.load(f)
+        workflow = os.path.join(configs['workspace'], configs.get('workflow') or '')
+        digest = None
+        if os.path.isfile(workflow):
+            with open(workflow, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        self.base = [configs.get('platform', 'odl'), configs.get('release', ''),
+                     configs.get('apps', ''), digest, configs.get('timeline')]
+
+    def key(self, job):
+        """
+        Get the hash identifying the result of a job.
+        """
+        fields = self.base + [job.arguments, job.repeat]
+        if job.params:
+            fields.append(job.params)
+        content = json.dumps(fields, sort_keys=True)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def completed(self, job):
+        return self.key(job) in self.jobs
+
+    def pending(self, jobs):
+        """
+        Filter out the completed jobs, lazily for a sweep.
+        """
+        if isinstance(jobs, Sweep):
+            return jobs.filter(lambda job: not self.completed(job))
+        return [job for job in jobs if not self.completed(job)]
+
+    def complete(self, job, seconds):
+        """
+        Record a completed job and atomically save the manifest.
+        """
+        with self.lock:
+            self.jobs[self.key(job)] = {
+                'job': job.name,
+                'arguments': job.arguments,
+                'repeat': job.repeat,
+                'duration': seconds,
+                'finished': time()
+            }
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            tmpfile = self.path + '.tmp'
+            with open(tmpfile, 'w') as f:
+                json.dump(self.jobs, f, indent=2, sort_keys=True)
+            os.rename(tmpfile, self.path)
+
+def order_jobs(jobs, history=None, order='fifo'):
+    """
+    Order jobs for the job queue.
+
+    Args:
+        jobs (list): jobs to order.
+        history (DurationHistory): duration model of the jobs.
+        order (str): 'fifo', or 'longest-first' to start the jobs with
+            the longest expected duration first.
+
+    returns: list of Job, or the jobs unchanged when they keep their order
+    """
+    if 'longest-first' != order or history is None:
+        return jobs
+    expected = [history.estimate(job)[0] for job in jobs]
+    return [job for _, _, job in
+            sorted(zip(expected, range(len(jobs)), jobs), key=lambda k: (-k[0], k[1]))]
+
+def plan(jobs, history, parallel=1, order='fifo'):
+    """
+    Predict the wall time of a sweep, by replaying the job queue on
+    `parallel` workers with the estimated job durations.
+
+    Args:
+        jobs (list): jobs of the sweep.
+        history (DurationHistory): duration model of the jobs.
+        parallel (int): number of workers.
+        order (str): order of the job queue.
+
+    returns: (makespan seconds, list of (job, estimated seconds, source,
+             worker, start seconds) in queue order)
+    """
+    workers = [(0., worker) for worker in range(max(parallel, 1))]
+    schedule = []
+    makespan = 0.
+    for job in order_jobs(jobs, history, order):
+        seconds, source = history.estimate(job)
+        start, worker = heapq.heappop(workers)
+        heapq.heappush(workers, (start + seconds, worker))
+        makespan = max(makespan, start + seconds)
+        schedule.append((job, seconds, source, worker + 1, start))
+    return makespan, schedule
+
+class JobQueue(object):
+    """
+    Shared queue of jobs from which test suite workers pull their work.
+    Jobs of a sweep are expanded as workers pull them, unless they are
+    ordered longest-first.
+
+    With a repeat policy, finished jobs may add new jobs to the queue, so
+    workers wait for running jobs before concluding the queue is exhausted.
+    """
+
+    def __init__(self, jobs, history=None, order='fifo', manifest=None, policy=None):
+        """
+        Args:
+            jobs (list): jobs to execute.
+            history (DurationHistory): recorded durations of previous runs.
+            order (str): 'fifo', or 'longest-first' to start the jobs with
+                the longest expected duration first.
+            manifest (RunManifest): where completed jobs are recorded.
+            policy (AdaptiveRepeat): decides the repeats added when a job ends.
+        """
+        self.history = history
+        self.manifest = manifest
+        self.policy = policy
+        self.order = order
+        # iterators over the queued jobs
+        self.pending = deque()
+        self.taken = 0
+        self.running = 0
+        self.closed = False
+        self.cond = Condition()
+        self.size = 0
+        self.add(jobs)
+
+    def add(self, jobs):
+        """
+        Queue jobs, ordered as configured.
+        """
+        jobs = order_jobs(jobs, self.history, self.order)
+        with self.cond:
+            if self.closed:
+                return
+            self.pending.append(iter(jobs))
+            self.size += len(jobs)
+            self.cond.notify_all()
+
+    def get(self):
+        """
+        Take the next job, waiting for running jobs which may add repeats.
+
+        returns: Job, or None when the queue is exhausted
+        """
+        with self.cond:
+            while True:
+                while self.pending:
+                    job = next(self.pending[0], None)
+                    if job is not None:
+                        self.taken += 1
+                        self.running += 1
+                        return job
+                    self.pending.popleft()
+                if self.closed or self.policy is None or not self.running:
+                    return None
+                self.cond.wait()
+
+    def close(self):
+        """
+        Drop all pending jobs, so that workers stop after their current job.
+
+        returns: number of dropped jobs
+        """
+        with self.cond:
+            dropped = self.size - self.taken
+            self.pending.clear()
+            self.closed = True
+            self.cond.notify_all()
+        return dropped
+
+    def finish(self, job, value):
+        """
+        Release a running job and queue the repeats the policy asks for.
+        """
+        jobs = self.policy.next(job, value) if self.policy is not None else []
+        self.add(jobs)
+        with self.cond:
+            self.running -= 1
+            self.cond.notify_all()
+
+    def done(self, job, seconds):
+        """
+        Record the duration of a finished job.
+        """
+        if self.history is not None:
+            self.history.record(job, seconds)
+        if self.manifest is not None:
+            self.manifest.complete(job, seconds)
+        self.finish(job, self.policy.measure(job) if self.policy is not None else None)
+
+    def failed(self, job):
+        """
+        Record a failed job.
+        """
+        self.finish(job, None)
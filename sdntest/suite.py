@@ -2,42 +2,81 @@
 
 import os
 import sys
+import json
 import docker
 import logging
-import json
 if sys.version[0] == '2':
     import Queue as queue
 else:
     import queue
-from time import sleep
-from threading import Thread
-from docker.errors import ImageNotFound
-from sdntest.exception import PlatformException, WorkspaceException, REASON
-from sdntest.utils import green, cyan
+from copy import copy
+from time import time, sleep
+from threading import Thread, current_thread
+from sdntest.exception import PlatformException, WorkspaceException, WorkflowException, \
+    AbortException, REASON
+from sdntest.readiness import ReadinessProbe
+from sdntest.pool import reset_onos, reset_odl
+from sdntest.imagecache import ImageCache
+from sdntest.preflight import controller_image, MININET_IMAGE
+from sdntest.output import OutputWriter
+from sdntest.scheduler import JobQueue, expand_jobs, JOB_DONE, JOB_FAILED, WORKER_EXIT
+from sdntest.timeline import validate, ENVIRONMENT as TIMELINE
+from sdntest.timing import PhaseTimer, timed, untimed
+from sdntest.resources import ResourceSampler
+from sdntest.hosts import DockerHost, archive_workspace, collect_outputs
+from sdntest.utils import green, cyan, exec_output, exec_stream
+
+# sdntest package, mounted alone into mininet containers so that their
+# python does not see the other packages installed next to it
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 class TestSuite(Thread):
 
-    def __init__(self, configs):
+    def __init__(self, configs, pool=None, images=None, jobs=None, events=None, timings=None,
+                 admission=None, host=None):
         Thread.__init__(self)
-        self.exc_pool = queue.Queue()
-        self.docker = docker.from_env()
+        self.daemon = True
+        self.events = events if events is not None else queue.Queue()
+        # docker host running both the controller and the mininet of jobs
+        self.host = host if host is not None else DockerHost('local', docker.from_env())
+        self.docker = self.host.client
+        self.images = images if images is not None else self.host.images
         self.logger = logging.getLogger("TestSuite")
         # container instance
         self.controller = None
-        # self.mininet = None
+        self.pool = pool if pool is not None else self.host.pool
+        self.image_cache = None
+        self.mininet = None
         # testcase options
         self.workspace = ""
         self.outputdir = ""
-        self.outputcnt = 0
-        self.repeat = 0
         self.platform = "odl"
         self.release_tag = ""
         self.apps = ""
+        # controller options of the testcase, which jobs of a sweep may override
+        self.configured = {}
         self.waiting_time = 15
+        self.readiness = {}
+        self.output_opts = {}
+        self.ready_times = []
+        self.boot_times = {}
         self.net_workflow = None
-        self.arguments = ""
-        self.arglist = False
-        self.argcnt = 0
+        self.timeline = None
+        self.resources = None
+        self.reuse_mininet = False
+        # workspace copied into mininet containers of remote hosts
+        self.archive = None
+        self.jobs = jobs
+        self.job = None
+        # set when the testcase is interrupted
+        self.stopped = False
+        # run phase timing
+        self.timings = timings
+        self.phases = None
+        # host capacity admission
+        self.admission = admission if admission is not None else self.host.admission
+        self.slot = None
+        self.continue_on_error = False
         # parallel options
         self.parallel = 0
         self.group = 0
@@ -48,149 +87,501 @@ class TestSuite(Thread):
         ])
         self.default_onos_apps = "openflow,proxyarp"
         self.setup(configs)
+        if self.jobs is None:
+            self.jobs = JobQueue(expand_jobs(configs))
+
+    def phase(self, name):
+        """
+        Time a phase of the current run.
+
+        returns: context manager
+        """
+        if self.phases is None:
+            return untimed()
+        return self.phases.phase(name)
+
+    def record_phases(self, job, status):
+        """
+        Record the phase timings of a finished run.
+        """
+        phases, self.phases = self.phases, None
+        if self.timings is None or phases is None:
+            return
+        self.timings.add(phases.record(job=job.name, arguments=job.arguments,
+                                       repeat=job.repeat, group=self.group,
+                                       status=status))
 
+    @timed('prepare_image')
     def prepare_image(self, image):
         """
-        Pull docker image from dockerhub.
+        Wait until a docker image exists locally. Missing images are pulled
+        from dockerhub once, shared by all test suites of the runner.
+        """
+        self.images.wait(image)
+
+    def limits(self, kind):
+        """
+        Get the docker run options limiting a container of the current job.
+        Containers booted for the controller pool by other threads are not
+        limited, as they are not bound to a job yet.
+
+        Args:
+            kind (str): 'controller' or 'mininet'.
+        """
+        if self.slot is None or current_thread() is not self:
+            return {}
+        return self.slot[kind]
+
+    def admit(self):
+        """
+        Wait until the host has room for the controller and mininet of a job.
         """
-        for line in self.docker.api.pull(image, stream=True):
-            status_info = json.loads(line)
-            status = status_info['status']
-            progress = status_info.get('progress', '')
-            sys.stdout.write('\r\033[K%s %s' % (status, progress))
-        self.logger.info('Pulling image %s finished!', image)
+        if self.admission is None:
+            return
+        with self.phase('admission'):
+            self.slot = self.admission.acquire()
+        self.logger.debug("Admitted with limits %s", self.slot)
 
-    def bootstrap_odl(self, release_tag="4.4.0"):
+    def release_slot(self):
+        """
+        Give back the host resources of the current job.
+        """
+        slot, self.slot = self.slot, None
+        if slot is not None:
+            self.admission.release(slot)
+
+    def platform_apps(self):
+        """
+        Get the list of ONOS apps or ODL features requested by the testcase.
+        """
+        if "odl" == self.platform:
+            return (self.apps if self.apps else self.default_odl_features).split()
+        return (self.apps if self.apps else self.default_onos_apps).split(',')
+
+    def probe(self, container):
+        """
+        Create a readiness probe for a controller container.
+
+        Args:
+            container: the docker container of the controller.
+        """
+        container.reload()
+        controller_ip = container.attrs['NetworkSettings']['IPAddress']
+        return ReadinessProbe(self.platform, controller_ip,
+                              apps=self.platform_apps(),
+                              container=container,
+                              started=self.boot_times.get(container.id),
+                              reachable=self.host.local,
+                              **(self.readiness or {}))
+
+    def bootstrap_odl(self, release_tag="4.4.0", use_cache=True):
         """
         Bootstrap a container for a specified OpenDaylight release distribution.
 
         Args:
             release_tag (str): the release version of the distribution.
+            use_cache (bool): start from a cached image with features pre-installed.
+
+        returns: the controller container
         """
-        image_tag = "opendaylight/odl:" + release_tag
+        image_tag = controller_image('odl', release_tag)
+        self.prepare_image(image_tag)
 
-        try:
-            self.docker.images.get(image_tag)
-        except ImageNotFound:
-            self.logger.info("Image %s not found. Try to pull the image from dockerhub...", image_tag)
-            self.prepare_image(image_tag)
+        cached_tag = self.cached_image(release_tag) if use_cache else None
+        if cached_tag:
+            image_tag = cached_tag
 
         self.logger.info("Starting container from image %s", image_tag)
-        self.controller = self.docker.containers.run(image_tag,
-                                                     command="/opt/opendaylight/bin/karaf",
-                                                     tty=True,
-                                                     detach=True)
-        sleep(5)
+        boot_time = time()
+        controller = self.docker.containers.run(image_tag,
+                                                command="/opt/opendaylight/bin/karaf",
+                                                tty=True,
+                                                detach=True,
+                                                **self.limits('controller'))
+        self.boot_times[controller.id] = boot_time
+        if cached_tag:
+            return controller
 
-        odl_features = self.apps if self.apps else self.default_odl_features
+        if self.readiness is None:
+            sleep(5)
+        else:
+            probe = self.probe(controller)
+            probe.wait_for(probe.check_karaf, "Karaf client")
+
+        self.install_features(controller)
+        return controller
+
+    def install_features(self, controller):
+        """
+        Install the requested karaf features into an ODL container.
+        """
+        odl_features = ' '.join(self.platform_apps())
         self.logger.info("Installing the following features: %s", odl_features)
-        self.controller.exec_run('/opt/opendaylight/bin/client -u karaf "feature:install %s"' % odl_features)
+        controller.exec_run('/opt/opendaylight/bin/client -u karaf "feature:install %s"' % odl_features)
 
-    def bootstrap_onos(self, release_tag="latest"):
+    def bootstrap_onos(self, release_tag="latest", use_cache=True):
         """
         Bootstrap a container for a specified ONOS release distribution.
 
         Args:
             release_tag (str): the release version of the distribution.
+            use_cache (bool): start from a cached image with apps pre-activated.
+
+        returns: the controller container
         """
-        image_tag = "onosproject/onos:" + release_tag
-        onos_apps = self.apps if self.apps else self.default_onos_apps
+        image_tag = controller_image('onos', release_tag)
+        self.prepare_image(image_tag)
+        onos_apps = ','.join(self.platform_apps())
+
+        cached_tag = self.cached_image(release_tag) if use_cache else None
+        if cached_tag:
+            image_tag = cached_tag
 
         self.logger.info("Starting container from image %s", image_tag)
-        self.controller = self.docker.containers.run(image_tag,
-                                                     tty=True,
-                                                     detach=True,
-                                                     environment={
-                                                         'ONOS_APPS': onos_apps
-                                                     })
-        raw_active_apps = self.controller.exec_run('client "apps -a -s"')
-        active_apps = '\n'.join(raw_active_apps.split('\n')[1:])
-        self.logger.info("Following apps have been installed:\n%s", active_apps)
-
-    def bootstrap_platform(self):
+        boot_time = time()
+        controller = self.docker.containers.run(image_tag,
+                                                tty=True,
+                                                detach=True,
+                                                environment={
+                                                    'ONOS_APPS': onos_apps
+                                                },
+                                                **self.limits('controller'))
+        self.boot_times[controller.id] = boot_time
+        return controller
+
+    def cached_image(self, release_tag):
+        """
+        Get the cached image of the testcase platform, provisioning it on
+        first use.
+
+        Args:
+            release_tag (str): the release version of the distribution.
+
+        returns: the cached image tag, or None when the image cache is disabled
+        """
+        if self.image_cache is None:
+            return None
+        return self.image_cache.ensure(self.platform, release_tag, self.platform_apps(),
+                                       lambda repository, tag, changes:
+                                       self.provision_image(release_tag, repository, tag, changes))
+
+    def provision_image(self, release_tag, repository, tag, changes):
+        """
+        Boot a vanilla controller, install the requested apps/features and
+        commit it as a cached image.
+        """
+        controller = self.bootstrap_platform(release_tag, use_cache=False)
+        try:
+            self.wait_platform(controller, record=False)
+            controller.stop()
+            controller.commit(repository=repository, tag=tag, changes=changes)
+        finally:
+            self.kill_platform(controller)
+
+    @timed('bootstrap_platform')
+    def bootstrap_platform(self, release_tag=None, use_cache=True):
         """
         Bootstrap a container for a given SDN controller platform.
+
+        Args:
+            release_tag (str): the release version, defaults to the testcase one.
+            use_cache (bool): start from a cached image when the cache is enabled.
+
+        returns: the controller container
         """
+        release_tag = release_tag or self.release_tag
         if "odl" == self.platform:
-            if self.release_tag:
-                self.bootstrap_odl(self.release_tag)
+            if release_tag:
+                return self.bootstrap_odl(release_tag, use_cache)
             else:
-                self.bootstrap_odl()
+                return self.bootstrap_odl(use_cache=use_cache)
         elif "onos" == self.platform:
-            if self.release_tag:
-                self.bootstrap_onos(self.release_tag)
+            if release_tag:
+                return self.bootstrap_onos(release_tag, use_cache)
             else:
-                self.bootstrap_onos()
+                return self.bootstrap_onos(use_cache=use_cache)
         else:
             self.logger.error("Unknown or unsupported SDN controller platform: %s",
                               self.platform)
             raise PlatformException(self.platform)
 
-    def bootstrap_mininet(self):
+    @timed('wait_platform')
+    def wait_platform(self, controller, record=True):
+        """
+        Wait until the SDN controller platform is ready to serve the testcase.
+
+        When readiness probing is disabled, fall back to sleeping for the
+        configured waiting time.
+
+        Args:
+            controller: the docker container of the controller.
+            record (bool): record the observed time-to-ready of the run.
+        """
+        if self.readiness is None:
+            sleep(self.waiting_time)
+            return self.waiting_time
+        elapsed = self.probe(controller).wait()
+        if record:
+            self.ready_times.append(elapsed)
+        self.logger.info(green(u"\u2714") + " SDN platform ready after %.2f seconds", elapsed)
+        if "onos" == self.platform:
+            raw_active_apps = exec_output(controller, 'client "apps -a -s"')
+            active_apps = '\n'.join(raw_active_apps.split('\n')[1:])
+            self.logger.info("Following apps have been installed:\n%s", active_apps)
+        return elapsed
+
+    def launch_platform(self):
+        """
+        Bootstrap a controller container and wait until it is ready.
+        Used by the controller pool to boot warm containers.
+
+        returns: the ready controller container
+        """
+        controller = self.bootstrap_platform()
+        try:
+            self.wait_platform(controller)
+        except Exception:
+            self.kill_platform(controller)
+            raise
+        return controller
+
+    def reset_platform(self, controller):
+        """
+        Reset a used controller container to a clean state, and check that
+        it is still healthy.
+
+        returns: True if the controller can be reused
+        """
+        probe = self.probe(controller)
+        if "onos" == self.platform:
+            clean = reset_onos(probe.rest, self.platform_apps())
+        else:
+            clean = reset_odl(probe.rest, self.pool.health_timeout)
+            self.install_features(controller)
+        if not clean:
+            return False
+        probe.started = time()
+        probe.timeout = self.pool.health_timeout
+        probe.wait()
+        return True
+
+    def platform_key(self):
+        """
+        Key identifying interchangeable controller containers.
+        """
+        return (self.platform, self.release_tag, ','.join(self.platform_apps()))
+
+    @timed('bootstrap_mininet')
+    def bootstrap_mininet(self, job):
         """
         Bootstrap a container for mininet and execute a given script
         to emulate network workflow.
+
+        Args:
+            job (Job): the job providing workflow arguments and output name.
         """
         self.controller.reload()
         controller_ip = self.controller.attrs['NetworkSettings']['IPAddress']
-        mininet_image = "ciena/mininet:latest"
+        mininet_image = MININET_IMAGE
+        self.prepare_image(mininet_image)
 
+        environment = {
+            # where workflows save result files of the job
+            'SDNTEST_OUTPUT': '/data/output',
+            'SDNTEST_JOB': job.name
+        }
+        if job.params:
+            environment['SDNTEST_PARAMS'] = json.dumps(job.params, sort_keys=True)
+        if self.timeline is not None:
+            environment[TIMELINE] = json.dumps(self.timeline)
+        net_workflow_command = '%s %s' % (os.path.join('/data', self.net_workflow),
+                                          controller_ip + ' ' + job.arguments)
+        self.logger.info("Executing testcase by using workflow command: %s", net_workflow_command)
+        if self.reuse_mininet:
+            output, exit_code = self.exec_mininet(mininet_image, net_workflow_command, environment)
+        else:
+            output, exit_code = self.run_mininet(mininet_image, net_workflow_command, environment)
+        outputfile = os.path.join(self.outputdir, job.outputfile)
+        sampler = None
         try:
-            self.docker.images.get(mininet_image)
-        except ImageNotFound:
-            self.logger.info("Image %s not found. Try to pull the image from dockerhub...", mininet_image)
-            self.prepare_image(mininet_image)
+            if self.resources is not None:
+                sampler = ResourceSampler({'controller': self.controller, 'mininet': self.mininet},
+                                          os.path.join(self.outputdir, job.statsfile),
+                                          local=self.host.local, **self.resources)
+                sampler.start()
+            writer = OutputWriter(outputfile, **self.output_opts)
+            try:
+                for chunk in output:
+                    writer.write(chunk)
+            finally:
+                writer.close()
+            status = exit_code()
+            if not self.host.local:
+                with self.phase('collect_outputs'):
+                    collect_outputs(self.mininet, self.outputdir)
+        finally:
+            if sampler is not None:
+                self.logger.debug("Saved %d resource samples", sampler.stop())
+                if self.admission is not None:
+                    self.admission.record(sampler.usage())
+            if self.reuse_mininet:
+                self.clean_mininet()
+            else:
+                self.remove_mininet()
+        self.logger.info("Workflow finished: (%d/%d)", job.repeat, job.total)
+        self.logger.info("Result saved in %s", writer.path)
 
+        if status:
+            raise WorkflowException(net_workflow_command, status)
+
+    def mininet_options(self, environment):
+        """
+        Get the docker run options of a mininet container.
+
+        Args:
+            environment (dict): extra environment variables.
+        """
+        environment = dict(environment)
+        # workflows import the shared helpers of sdntest
+        environment['PYTHONPATH'] = '/opt/sdntest'
         opts = {
             'cap_add': ['NET_ADMIN', 'SYS_MODULE'],
             'volumes': {
                 '/lib/modules': {
                     'bind': '/lib/modules',
                     'mode': 'rw'
-                },
-                self.workspace: {
-                    'bind': '/data',
-                    'mode': 'rw'
                 }
             },
+            'environment': environment,
             'privileged': True,
-            'remove': True,
+            'detach': True,
             'tty': True
         }
-        net_workflow_command = '%s %s' % (os.path.join('/data', self.net_workflow),
-                                          controller_ip + ' ' + self.arguments)
-        self.logger.info("Executing testcase by using workflow command: %s", net_workflow_command)
-        workflow_output = self.docker.containers.run(mininet_image,
-                                                     command=net_workflow_command,
-                                                     **opts)
-        self.outputcnt += 1
-        self.logger.info("Workflow finished: (%d/%d)", self.outputcnt, self.repeat)
-        if self.parallel > 1:
-            if self.arglist:
-                outputfile = 'output.%d.%d-%d.log' % (self.group, self.argcnt, self.outputcnt)
-            else:
-                outputfile = 'output.%d.%d.log' % (self.group, self.outputcnt)
+        if self.host.local:
+            opts['volumes'][self.workspace] = {
+                'bind': '/data',
+                'mode': 'rw'
+            }
+            opts['volumes'][PACKAGE_DIR] = {
+                'bind': '/opt/sdntest/sdntest',
+                'mode': 'ro'
+            }
+        opts.update(self.limits('mininet'))
+        return opts
+
+    def start_mininet(self, image, command, environment):
+        """
+        Start a mininet container. On a remote host, the workspace is
+        copied into the container before it starts.
+
+        returns: the mininet container
+        """
+        opts = self.mininet_options(environment)
+        if self.host.local:
+            return self.docker.containers.run(image, command=command, **opts)
+        opts.pop('detach')
+        container = self.docker.containers.create(image, command=command, **opts)
+        try:
+            with self.phase('stage_workspace'):
+                if self.archive is None:
+                    self.archive = archive_workspace(self.workspace, PACKAGE_DIR)
+                container.put_archive('/', self.archive)
+            container.start()
+        except Exception:
+            container.remove(force=True)
+            raise
+        return container
+
+    def run_mininet(self, image, command, environment):
+        """
+        Run a workflow in a new mininet container.
+
+        returns: (generator of output chunks, function returning the exit code)
+        """
+        self.mininet = self.start_mininet(image, command, environment)
+
+        def exit_code():
+            status = self.mininet.wait()
+            return status.get('StatusCode', 0) if isinstance(status, dict) else status
+
+        return self.mininet.logs(stream=True, follow=True), exit_code
+
+    def exec_mininet(self, image, command, environment):
+        """
+        Run a workflow in the long-lived mininet container of this worker,
+        starting the container first if needed.
+
+        returns: (generator of output chunks, function returning the exit code)
+        """
+        if self.mininet is None:
+            self.logger.info("Starting long-lived mininet container...")
+            self.mininet = self.start_mininet(image, 'sleep infinity', {})
         else:
-            if self.arglist:
-                outputfile = 'output.%d-%d.log' % (self.argcnt, self.outputcnt)
-            else:
-                outputfile = 'output.%d.log' % self.outputcnt
+            limits = self.limits('mininet')
+            if limits:
+                self.mininet.update(**limits)
+        return exec_stream(self.docker, self.mininet, command, environment)
+
+    def clean_mininet(self):
+        """
+        Clean up the long-lived mininet container after a workflow, and
+        remove it if the cleanup fails so that the next job starts afresh.
+        """
+        if self.mininet is None:
+            return
+        # result files of remote hosts have been collected already
+        command = 'mn -c' if self.host.local else 'sh -c "mn -c && rm -rf /data/output/*"'
+        try:
+            output, exit_code = exec_stream(self.docker, self.mininet, command)
+            for _ in output:
+                pass
+            status = exit_code()
+        except Exception as e:
+            self.logger.warning("Failed to clean up mininet container: %s", e)
+            status = -1
+        if status:
+            self.logger.warning("Mininet cleanup exited with %s, recreating the container", status)
+            self.remove_mininet()
 
-        outputfile = os.path.join(self.outputdir, outputfile)
-        with open(outputfile, 'w') as f:
-            f.write(workflow_output)
-            self.logger.info("Result saved in %s", outputfile)
+    def remove_mininet(self):
+        """
+        Remove the mininet container, killing it if it is still running.
+        """
+        mininet, self.mininet = self.mininet, None
+        if mininet is not None:
+            mininet.remove(force=True)
 
-    def kill_platform(self):
+    @timed('kill_platform')
+    def kill_platform(self, controller=None):
         """
         Stop and remove the platform container.
+
+        Args:
+            controller: the container to remove, defaults to the current one.
         """
+        if controller is None:
+            controller = self.controller
+            self.controller = None
+        if controller is None:
+            return
         self.logger.info("Stopping SDN platform container...")
-        self.controller.stop()
-        self.logger.info(green(u"\u2714") + " Container %s is stopped!", self.controller.id)
+        controller.stop()
+        self.logger.info(green(u"\u2714") + " Container %s is stopped!", controller.id)
         self.logger.info("Removing SDN platform container...")
-        self.controller.remove()
-        self.logger.info(green(u"\u2714") + " Container %s is removed!", self.controller.id)
+        controller.remove()
+        self.logger.info(green(u"\u2714") + " Container %s is removed!", controller.id)
+        self.boot_times.pop(controller.id, None)
+
+    def release_platform(self):
+        """
+        Hand the current controller back to the pool, or remove it when
+        the testcase does not use a pool.
+        """
+        if self.pool is None:
+            self.kill_platform()
+        elif self.controller is not None:
+            self.pool.release(self.platform_key(), self.controller)
+            self.controller = None
 
     def setup(self, configs):
         """
@@ -215,59 +606,175 @@ class TestSuite(Thread):
             self.logger.error("'output' has been existing, but not a directory.")
             raise WorkspaceException(self.workspace, reason=REASON['OUTDIR'])
 
-        if 'repeat' in configs.keys():
-            self.repeat = configs['repeat']
         if 'platform' in configs.keys():
             self.platform = configs['platform']
         if 'release' in configs.keys():
             self.release_tag = configs['release']
         if 'apps' in configs.keys():
             self.apps = configs['apps']
+        self.configured = {
+            'platform': self.platform,
+            'release': self.release_tag,
+            'apps': self.apps
+        }
         if 'waiting' in configs.keys():
             self.waiting_time = configs['waiting']
+        if 'readiness' in configs.keys():
+            if configs['readiness'] is False:
+                self.readiness = None
+            elif isinstance(configs['readiness'], dict):
+                self.readiness = configs['readiness']
+        if configs.get('image_cache'):
+            cache_configs = configs['image_cache'] if isinstance(configs['image_cache'], dict) else {}
+            self.image_cache = ImageCache(self.docker, **cache_configs)
         if 'workflow' in configs.keys():
             self.net_workflow = configs['workflow']
-        if 'arguments' in configs.keys():
-            self.arguments = configs['arguments']
+        if 'timeline' in configs.keys():
+            try:
+                validate(configs['timeline'])
+            except ValueError as e:
+                self.logger.error("Invalid timeline: %s", e)
+                raise
+            self.timeline = configs['timeline']
+
+        if configs.get('resources'):
+            self.resources = configs['resources'] if isinstance(configs['resources'], dict) else {}
+        elif self.admission is not None:
+            # footprints are learned from sampled usage
+            self.resources = {}
+        if 'reuse_mininet' in configs.keys():
+            self.reuse_mininet = configs['reuse_mininet']
+        if 'output' in configs.keys():
+            self.output_opts = configs['output']
+        if 'on_error' in configs.keys():
+            self.continue_on_error = 'continue' == configs['on_error']
 
         if 'parallel' in configs.keys():
             self.parallel = configs['parallel']
         if 'group' in configs.keys():
             self.group = configs['group']
 
-    def run(self):
+    def apply_params(self, job):
         """
-        Repeatedly execute test case.
+        Select the controller platform, release and apps of a job, which
+        may be parameters of a sweep.
         """
-        try:
-            self.logger.info("Starting execution...")
+        self.platform = job.params.get('platform', self.configured['platform'])
+        self.release_tag = job.params.get('release', self.configured['release'])
+        self.apps = job.params.get('apps', self.configured['apps'])
+
+    def run_job(self, job):
+        """
+        Execute one repeat of the workflow on a fresh or pooled controller.
+
+        Args:
+            job (Job): the job to execute.
+        """
+        self.job = job
+        self.phases = PhaseTimer()
+        started = time()
+        self.apply_params(job)
+        self.admit()
+        self.logger.info(cyan(">>> Arguments: %s"), job.arguments)
+        if job.params:
+            self.logger.info("Parameters: %s", json.dumps(job.params, sort_keys=True))
+        self.logger.info("Repeat counter: %d", job.repeat)
+        self.check_stopped()
+        if self.pool is None:
+            self.logger.info("Bootstrapping SDN platform...")
+            self.controller = self.bootstrap_platform()
+            self.logger.info(green(u"\u2714") + " Bootstrapped SDN platform")
+            self.logger.info("Waiting for mandatory components loaded...")
+            self.wait_platform(self.controller)
+        else:
+            self.logger.info("Acquiring SDN platform from pool...")
+            # the pool boots replacements later on, with the controller
+            # options of this job even if the next job sweeps other ones
+            spawner = copy(self) if job.params else self
+            with self.phase('acquire_platform'):
+                self.controller = self.pool.acquire(self.platform_key(),
+                                                    spawner.launch_platform,
+                                                    spawner.reset_platform)
+            self.logger.info(green(u"\u2714") + " Acquired SDN platform %s", self.controller.id)
+        self.check_stopped()
+        self.logger.info("Bootstrapping Mininet...")
+        self.bootstrap_mininet(job)
+        self.logger.info(green(u"\u2714") + " Mininet test finished")
+        self.logger.info("Cleaning up SDN platform...")
+        with self.phase('release_platform'):
+            self.release_platform()
+        self.release_slot()
+        self.logger.info(green(u"\u2714") + " Environment is clean")
+        self.jobs.done(job, time() - started)
+        self.job = None
+
+    def check_stopped(self):
+        """
+        Refuse to start the next step of a job once the testcase is interrupted.
+        """
+        if self.stopped:
+            raise AbortException(self.job)
 
-            if type(self.arguments) == list:
-                argumentsList = self.arguments
-                self.arglist = True
+    def stop(self):
+        """
+        Interrupt the worker: abort its running job and prevent it from
+        starting new containers. The job queue must be closed first.
+        """
+        self.stopped = True
+        self.abort_job()
+
+    def abort_job(self):
+        """
+        Remove the containers of a failed job instead of reusing them.
+        """
+        try:
+            self.remove_mininet()
+        except Exception as e:
+            self.logger.warning("Failed to remove mininet container: %s", e)
+        try:
+            if self.pool is not None and self.controller is not None:
+                # the pool accounts for the containers it booted
+                controller, self.controller = self.controller, None
+                self.pool.discard(self.platform_key(), controller)
             else:
-                argumentsList = [ self.arguments ]
-
-            for arguments in argumentsList:
-                self.arguments = arguments
-                self.argcnt += 1
-                self.logger.info(cyan(">>> Arguments: %s"), self.arguments)
-                self.outputcnt = 0
-                for i in range(self.repeat):
-                    self.logger.info("Repeat counter: %d", i+1)
-                    self.logger.info("Bootstrapping SDN platform...")
-                    self.bootstrap_platform()
-                    self.logger.info(green(u"\u2714") + " Bootstrapped SDN platform")
-                    self.logger.info("Waiting for mandatory components loaded...")
-                    sleep(self.waiting_time)
-                    self.logger.info("Bootstrapping Mininet...")
-                    self.bootstrap_mininet()
-                    self.logger.info(green(u"\u2714") + " Mininet test finished")
-                    self.logger.info("Cleaning up SDN platform...")
-                    self.kill_platform()
-                    self.logger.info(green(u"\u2714") + " Environment is clean")
-        except Exception:
-            self.exc_pool.put(sys.exc_info())
-            import traceback
-            stackTrace = traceback.format_exc()
-            self.logger.debug(stackTrace + "\n")
+                self.kill_platform()
+        except Exception as e:
+            self.logger.warning("Failed to remove SDN platform container: %s", e)
+        self.release_slot()
+        self.job = None
+
+    def run(self):
+        """
+        Execute jobs pulled from the job queue until it is exhausted, and
+        report every job completion or failure on the event channel.
+        """
+        self.logger.info("Starting execution...")
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None or self.stopped:
+                    break
+                try:
+                    self.run_job(job)
+                except Exception:
+                    exc = sys.exc_info()
+                    import traceback
+                    stackTrace = traceback.format_exc()
+                    self.logger.debug(stackTrace + "\n")
+                    self.abort_job()
+                    self.jobs.failed(job)
+                    self.record_phases(job, JOB_FAILED)
+                    self.events.put((JOB_FAILED, self, job, exc))
+                    if not self.continue_on_error:
+                        break
+                else:
+                    self.record_phases(job, JOB_DONE)
+                    self.events.put((JOB_DONE, self, job, None))
+        finally:
+            if self.mininet is not None:
+                # long-lived mininet container of this worker
+                try:
+                    self.remove_mininet()
+                except Exception as e:
+                    self.logger.warning("Failed to remove mininet container: %s", e)
+            self.events.put((WORKER_EXIT, self, None, None))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+"""
+Fault-injection timeline shared by network workflows.
+
+This module only depends on the standard library, so that workflows can
+import it from inside the mininet container. The timeline comes from the
+"timeline" list of the testcase configuration, passed to the workflow in
+the SDNTEST_TIMELINE environment variable, e.g.
+
+    "timeline": [
+        {"at": 3.0, "action": "link", "src": "s1", "dst": "s2", "state": "down"},
+        {"at": 4.0, "action": "switch", "name": "s3", "state": "stop"},
+        {"at": 5.0, "action": "controller", "state": "pause"},
+        {"at": 6.0, "action": "controller", "state": "resume"}
+    ]
+
+where "at" is in seconds from the start of the timeline.
+"""
+
+import os
+import json
+import subprocess
+from time import time, sleep
+from threading import Thread
+try:
+    from time import monotonic
+except ImportError:
+    # python 2 has no monotonic clock in the standard library
+    monotonic = time
+
+ENVIRONMENT = 'SDNTEST_TIMELINE'
+
+# Valid states of each kind of event.
+STATES = {
+    'link': ('down', 'up'),
+    'switch': ('stop', 'start'),
+    'controller': ('pause', 'resume')
+}
+
+# Sleep until this many seconds before an event, then spin.
+SPIN = 0.002
+
+def load_timeline(default=None):
+    """
+    Load the timeline passed by the test suite.
+
+    Args:
+        default (list): events used when the testcase defines no timeline.
+
+    returns: list of events sorted by time
+    """
+    events = json.loads(os.environ[ENVIRONMENT]) if os.environ.get(ENVIRONMENT) else default
+    return sorted(events or [], key=lambda event: float(event['at']))
+
+def validate(events):
+    """
+    Check every event of a timeline before running it.
+
+    raises: ValueError on the first invalid event
+    """
+    for event in events:
+        action = event.get('action')
+        if action not in STATES:
+            raise ValueError("Unknown timeline action: %s" % action)
+        if event.get('state') not in STATES[action]:
+            raise ValueError("Invalid state of %s event: %s" % (action, event.get('state')))
+        if 'at' not in event:
+            raise ValueError("Missing time of %s event" % action)
+        if action == 'link' and not (event.get('src') and event.get('dst')):
+            raise ValueError("Missing src or dst of link event")
+        if action == 'switch' and not event.get('name'):
+            raise ValueError("Missing name of switch event")
+
+def describe(event):
+    """
+    Short description of the target of an event.
+    """
+    if event['action'] == 'link':
+        return '(%s, %s)' % (event['src'], event['dst'])
+    if event['action'] == 'switch':
+        return event['name']
+    return 'controller'
+
+class Timeline(Thread):
+    """
+    Execute a timeline of fault events from a single event loop.
+
+    Events are scheduled on a monotonic clock relative to start(), and
+    each one reports the wall-clock time it was executed at, its lateness
+    and the time the action took.
+    """
+
+    def __init__(self, net, events, controller, log):
+        """
+        Args:
+            net (Mininet): the emulated network.
+            events (list): timeline events.
+            controller (str): ip address of the controller.
+            log (function): called with one line per executed event.
+        """
+        Thread.__init__(self)
+        self.daemon = True
+        validate(events)
+        self.net = net
+        self.events = sorted(events, key=lambda event: float(event['at']))
+        self.controller = controller
+        self.log = log
+        self.paused = False
+
+    def link(self, event):
+        self.net.configLinkStatus(event['src'], event['dst'], event['state'])
+
+    def switch(self, event):
+        switch = self.net.get(event['name'])
+        if event['state'] == 'stop':
+            switch.stop(deleteIntfs=False)
+        else:
+            switch.start(self.net.controllers)
+
+    def iptables(self, flag):
+        for chain, direction in (('OUTPUT', '-d'), ('INPUT', '-s')):
+            subprocess.call(['iptables', flag, chain, '-p', 'tcp',
+                             direction, self.controller, '-j', 'DROP'])
+
+    def pause(self, event):
+        """
+        Cut the control channel of all switches to the controller.
+        """
+        if event['state'] == 'pause' and not self.paused:
+            self.iptables('-I')
+            self.paused = True
+        elif event['state'] == 'resume' and self.paused:
+            self.iptables('-D')
+            self.paused = False
+
+    def run(self):
+        actions = {
+            'link': self.link,
+            'switch': self.switch,
+            'controller': self.pause
+        }
+        base = monotonic()
+        try:
+            for index, event in enumerate(self.events, 1):
+                deadline = base + float(event['at'])
+                while True:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    if remaining > SPIN:
+                        sleep(remaining - SPIN)
+                late = monotonic() - deadline
+                executed = time()
+                actions[event['action']](event)
+                took = monotonic() - deadline - late
+                self.log('*** Event %d: %s %s %s at %.6f (late %.3f ms, took %.3f ms)\n' %
+                         (index, event['action'], describe(event), event['state'].upper(),
+                          executed, late * 1000, took * 1000))
+        finally:
+            # never leave the control channel cut
+            if self.paused:
+                self.iptables('-D')
+                self.paused = False
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+import os
+import json
+from time import time
+from functools import wraps
+from threading import Lock, current_thread
+from contextlib import contextmanager
+try:
+    from time import monotonic
+except ImportError:
+    # python 2 has no monotonic clock in the standard library
+    monotonic = time
+
+def percentile(values, q):
+    """
+    Percentile of a list of values, interpolated between closest ranks.
+    """
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100.
+    lo = int(rank)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (rank - lo)
+
+@contextmanager
+def untimed():
+    """
+    Context manager used when no run is being timed.
+    """
+    yield
+
+def timed(name):
+    """
+    Decorate a method to time it as a phase, through the phase(name)
+    context manager of its object.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class PhaseTimer(object):
+    """
+    Time the phases of one run with a monotonic clock.
+
+    Phases may nest: the time of a phase excludes the time of the phases
+    run inside it, so that the phases of a run add up to its duration.
+    Only the thread which created the timer is timed; phases entered from
+    other threads (e.g. controller pool workers) are ignored.
+    """
+
+    def __init__(self):
+        self.owner = current_thread()
+        self.started = monotonic()
+        self.wall = time()
+        self.phases = {}
+        self.stack = []
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager timing a phase.
+        """
+        if current_thread() is not self.owner:
+            yield
+            return
+        frame = [monotonic(), 0.]
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            elapsed = monotonic() - frame[0]
+            self.phases[name] = self.phases.get(name, 0.) + elapsed - frame[1]
+            if self.stack:
+                self.stack[-1][1] += elapsed
+
+    def record(self, **fields):
+        """
+        Build the record of the run.
+
+        Args:
+            fields: extra fields of the record.
+
+        returns: dict with start time, total and per-phase seconds; time
+                 outside any phase is reported as the 'other' phase
+        """
+        total = monotonic() - self.started
+        phases = dict(self.phases)
+        phases['other'] = max(total - sum(self.phases.values()), 0.)
+        record = dict(fields)
+        record.update({
+            'started': self.wall,
+            'total': total,
+            'phases': phases
+        })
+        return record
+
+class PhaseLog(object):
+    """
+    Append run records to a JSONL file and summarize the current sweep.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): JSONL file, records are appended to it.
+        """
+        self.path = path
+        self.sweep = time()
+        self.records = []
+        self.lock = Lock()
+
+    def add(self, record):
+        """
+        Append the record of one run. Thread safe.
+        """
+        record = dict(record, sweep=self.sweep)
+        with self.lock:
+            self.records.append(record)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, sort_keys=True) + '\n')
+
+    def summary(self):
+        """
+        Summarize the runs of the sweep per phase.
+
+        returns: dict mapping phase name ('run' for whole runs) to a dict
+                 of n, total, mean, p50, p95 and max seconds
+        """
+        with self.lock:
+            records = list(self.records)
+        samples = {'run': [record['total'] for record in records]}
+        for record in records:
+            for phase, seconds in record['phases'].items():
+                samples.setdefault(phase, []).append(seconds)
+        summary = {}
+        for phase, values in samples.items():
+            summary[phase] = {
+                'n': len(values),
+                'total': sum(values),
+                'mean': sum(values) / len(values) if values else float('nan'),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'max': max(values) if values else float('nan')
+            }
+        return summary
+
+    def status(self):
+        """
+        returns: dict mapping run status to number of runs
+        """
+        counts = {}
+        with self.lock:
+            for record in self.records:
+                counts[record.get('status')] = counts.get(record.get('status'), 0) + 1
+        return counts
+
+    def save_summary(self, path):
+        """
+        Write the sweep summary as json.
+        """
+        with open(path, 'w') as f:
+            json.dump({'sweep': self.sweep, 'runs': self.status(),
+                       'phases': self.summary()}, f, indent=2, sort_keys=True)
+
+    def to_prometheus(self, path, labels=None):
+        """
+        Export the sweep summary in the Prometheus textfile format. The
+        file is replaced atomically, as expected by the textfile collector.
+
+        Args:
+            path (str): destination .prom file.
+            labels (dict): labels added to every sample.
+        """
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        def series(name, extra, value):
+            pairs = sorted((labels or {}).items()) + extra
+            label = ','.join('%s="%s"' % (key, escape(val)) for key, val in pairs)
+            return '%s%s %r\n' % (name, '{%s}' % label if label else '', float(value))
+
+        lines = ['# HELP sdntest_phase_seconds Seconds spent in each phase of a run.\n',
+                 '# TYPE sdntest_phase_seconds summary\n']
+        for phase, stats in sorted(self.summary().items()):
+            for quantile in ('p50', 'p95'):
+                lines.append(series('sdntest_phase_seconds',
+                                    [('phase', phase), ('quantile', '0.%s' % quantile[1:])],
+                                    stats[quantile]))
+            lines.append(series('sdntest_phase_seconds_sum', [('phase', phase)], stats['total']))
+            lines.append(series('sdntest_phase_seconds_count', [('phase', phase)], stats['n']))
+        lines.extend(['# HELP sdntest_runs Number of runs of the sweep by status.\n',
+                      '# TYPE sdntest_runs gauge\n'])
+        for status, count in sorted(self.status().items()):
+            lines.append(series('sdntest_runs', [('status', status)], count))
+        lines.extend(['# HELP sdntest_sweep_start_seconds Start time of the sweep.\n',
+                      '# TYPE sdntest_sweep_start_seconds gauge\n',
+                      series('sdntest_sweep_start_seconds', [], self.sweep)])
+
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.writelines(lines)
+        os.rename(tmp, path)
@@ -9,3 +9,32 @@ purple = lambda s: "\033[0;35m" + s + "\033[0m"
 cyan   = lambda s: "\033[0;36m" + s + "\033[0m"
 yellow = lambda s: "\033[1;33m" + s + "\033[0m"
 white  = lambda s: "\033[1;37m" + s + "\033[0m"
+
+def exec_output(container, cmd):
+    """
+    Execute a command in a container and return its output as text,
+    whatever the version of docker-py in use.
+    """
+    result = container.exec_run(cmd)
+    output = getattr(result, 'output', result)
+    if isinstance(output, bytes):
+        output = output.decode('utf-8', 'replace')
+    return output
+
+def exec_stream(client, container, cmd, environment=None):
+    """
+    Execute a command in a container, streaming its output.
+
+    Args:
+        client: docker client.
+        container: the container to execute the command in.
+        cmd (str): the command.
+        environment (dict): environment variables of the command.
+
+    returns: (generator of output chunks, function returning the exit code
+             once the output is exhausted)
+    """
+    api = client.api
+    exec_id = api.exec_create(container.id, cmd, tty=True, environment=environment)['Id']
+    output = api.exec_start(exec_id, tty=True, stream=True)
+    return output, lambda: api.exec_inspect(exec_id)['ExitCode']
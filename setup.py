@@ -28,5 +28,8 @@ setup(name='sdntest',
           'setuptools',
           'docker'
       ],
+      extras_require={
+          'results': ['numpy']
+      },
       scripts=scripts,
       zip_safe=False)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""
+A stub controller REST API served on the loopback interface, for the tests
+of the components talking to controllers.
+"""
+
+import sys
+import json
+import threading
+if sys.version[0] == '2':
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+else:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def answer(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        answer = self.server.stub.answer(self.command, self.path, self.headers,
+                                         body, self.client_address)
+        status, content = answer[:2]
+        data = b'' if content is None else json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (answer[2] if len(answer) > 2 else {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = answer
+
+    def log_message(self, format, *args):
+        pass
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class StubServer(object):
+    """
+    HTTP server answering requests from scripted routes.
+
+    A route maps (method, path) to a list of answers: each request consumes
+    the first one, the last one is repeated. An answer is a (status, json
+    object) or (status, json object, headers) tuple, or a callable of the
+    decoded json body (or None) returning one. Unknown routes answer 404.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingServer(('127.0.0.1', 0), StubHandler)
+        self.server.stub = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.daemon = True
+
+    def route(self, method, path, *answers):
+        with self.lock:
+            self.routes[(method, path)] = list(answers)
+
+    def answer(self, method, path, headers, body, client=None):
+        with self.lock:
+            self.requests.append((method, path, dict(headers.items()), body, client))
+            answers = self.routes.get((method, path))
+            if not answers:
+                return 404, None
+            answer = answers.pop(0) if len(answers) > 1 else answers[0]
+        if callable(answer):
+            return answer(json.loads(body.decode('utf-8')) if body else None)
+        return answer
+
+    def count(self, method, path):
+        with self.lock:
+            return len([r for r in self.requests if r[:2] == (method, path)])
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
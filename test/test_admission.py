@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import shutil
+import tempfile
+import unittest
+
+from sdntest import admission
+from sdntest.admission import AdmissionController, FootprintHistory
+
+class FakeClient(object):
+    """
+    Docker client of a host with 8 cpus and 16 GB of memory.
+    """
+
+    def info(self):
+        return {'NCPU': 8, 'MemTotal': 16 * 2 ** 30}
+
+class AdmissionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.history = FootprintHistory(self.tmpdir)
+        self.available = admission.available_memory
+        admission.available_memory = lambda: self.free
+
+    def tearDown(self):
+        admission.available_memory = self.available
+        shutil.rmtree(self.tmpdir)
+
+    def controller(self, **kwargs):
+        kwargs.setdefault('poll', 0.01)
+        return AdmissionController(FakeClient(), self.history, 'onos', **kwargs)
+
+    def test_capacity(self):
+        self.free = 16384
+        controller = self.controller()
+        self.assertEqual((controller.memory, controller.capacity_cpus), (15360, 7))
+        # a pair needs 2 + 1 cpus and 2048 + 1024 MB
+        self.assertEqual(controller.auto_parallel(), 2)
+        # (15360 - 2 * 1024) MB left for 2048 MB controllers
+        self.assertEqual(controller.pool_limit(2), 6)
+
+    def test_pins_cpus(self):
+        self.free = 16384
+        controller = self.controller()
+        first, second = controller.acquire(), controller.acquire()
+        self.assertEqual(first['controller']['cpuset_cpus'], '1,2')
+        self.assertEqual(first['mininet']['cpuset_cpus'], '3')
+        self.assertEqual(second['controller']['cpuset_cpus'], '4,5')
+        self.assertEqual(first['controller']['mem_limit'], '3072m')
+        self.assertFalse(controller.fits(3072, 3))
+        controller.release(first)
+        self.assertTrue(controller.fits(3072, 3))
+        self.assertEqual(controller.used_memory, 3072)
+
+    def test_local_available_memory(self):
+        self.free = 1024
+        controller = self.controller()
+        controller.acquire()
+        self.assertFalse(controller.fits(3072, 3))
+        self.free = 4096
+        self.assertTrue(controller.fits(3072, 3))
+
+    def test_remote_ignores_local_memory(self):
+        self.free = 0
+        controller = self.controller(local=False)
+        controller.acquire()
+        self.assertTrue(controller.fits(3072, 3))
+        controller.acquire()
+        # bounded by the capacity of the remote host
+        self.assertFalse(controller.fits(3072 * 3, 3))
+
+    def test_learned_footprint(self):
+        self.free = 16384
+        self.history.record('onos', 4096, 1.5)
+        self.history.record('mininet', float('nan'), 1)
+        self.history.save()
+        history = FootprintHistory(self.tmpdir, margin=1.)
+        self.assertEqual(history.estimate('onos'), (4096, 1.5))
+        self.assertEqual(history.estimate('mininet'), (1024, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sdntest.convergence import ping_outage, iperf_outage, analyze
+from sdntest.results import ResultStore
+
+def ping_stream(lost=()):
+    """
+    Replies of a 10 ms ping over one second, without the given sequence numbers.
+    """
+    seqs = np.array([seq for seq in range(1, 101) if seq not in lost])
+    return (seqs - 1) * 0.01, seqs
+
+def iperf_stream(down=()):
+    """
+    One second iperf reports of 100 Mbits/sec, 0 in the intervals ending at `down`.
+    """
+    ends = np.arange(1., 11.)
+    bandwidth = np.array([0. if end in down else 100. for end in ends])
+    return ends, np.ones(len(ends)), bandwidth
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class PingOutageTest(unittest.TestCase):
+
+    def test_gap(self):
+        # replies 52 to 80 (sent at 0.51 to 0.79 s) are lost
+        times, seqs = ping_stream(range(52, 81))
+        outage, lost, recovery = ping_outage(times, seqs, 0.505, np.inf)
+        self.assertAlmostEqual(outage, 0.3)
+        self.assertEqual(lost, 29)
+        self.assertAlmostEqual(recovery, 0.295)
+
+    def test_gap_before_event(self):
+        times, seqs = ping_stream(range(12, 41))
+        self.assertEqual(ping_outage(times, seqs, 0.505, np.inf), (0., 0, 0.))
+
+    def test_small_gap(self):
+        # a gap below factor times the median gap is jitter, not an outage
+        times, seqs = ping_stream([52, 53])
+        self.assertEqual(ping_outage(times, seqs, 0.505, np.inf), (0., 0, 0.))
+        outage, lost, _ = ping_outage(times, seqs, 0.505, np.inf, factor=2.)
+        self.assertAlmostEqual(outage, 0.03)
+        self.assertEqual(lost, 2)
+
+    def test_until_next_event(self):
+        # the outage after the second event is not accounted to the first one
+        times, seqs = ping_stream(list(range(22, 31)) + list(range(62, 91)))
+        outage, lost, _ = ping_outage(times, seqs, 0.205, 0.5)
+        self.assertAlmostEqual(outage, 0.1)
+        self.assertEqual(lost, 9)
+
+    def test_no_replies(self):
+        times, seqs = ping_stream(range(2, 101))
+        outage, lost, recovery = ping_outage(times, seqs, 0.5, 2.)
+        self.assertEqual((outage, lost), (1.5, -1))
+        self.assertNotEqual(recovery, recovery)
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class IperfOutageTest(unittest.TestCase):
+
+    def test_degraded_intervals(self):
+        ends, lengths, bandwidth = iperf_stream([6., 7.])
+        self.assertEqual(iperf_outage(ends, lengths, bandwidth, 5., np.inf), (2., -1, 2.))
+
+    def test_threshold(self):
+        ends, lengths, bandwidth = iperf_stream()
+        bandwidth[6] = 60.
+        self.assertEqual(iperf_outage(ends, lengths, bandwidth, 5., np.inf), (0., -1, 0.))
+        self.assertEqual(iperf_outage(ends, lengths, bandwidth, 5., np.inf, threshold=.8),
+                         (1., -1, 2.))
+
+    def test_no_degradation(self):
+        ends, lengths, bandwidth = iperf_stream([2.])
+        self.assertEqual(iperf_outage(ends, lengths, bandwidth, 5., np.inf), (0., -1, 0.))
+
+    def test_no_baseline(self):
+        ends, lengths, bandwidth = iperf_stream([6.])
+        outage, lost, recovery = iperf_outage(ends, lengths, bandwidth, 0.5, np.inf)
+        self.assertEqual(lost, -1)
+        self.assertNotEqual(outage, outage)
+        self.assertNotEqual(recovery, recovery)
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class AnalyzeTest(unittest.TestCase):
+
+    def test_events_of_each_run(self):
+        store = ResultStore()
+        for job, lost in ((1, range(52, 81)), (2, ())):
+            times, seqs = ping_stream(lost)
+            store.add('ping', [(job, time, int(seq), 1.) for time, seq in zip(times, seqs)])
+        store.add('link', [(2, 0.505, 's1', 's2', 'down'),
+                           (1, 0.905, 's1', 's2', 'up'),
+                           (1, 0.505, 's1', 's2', 'down'),
+                           (3, 0.5, 's1', 's2', 'down')])
+        self.assertEqual(analyze(store), 3)
+        table = store.table('convergence')
+        self.assertEqual([(job, action) for job, action in zip(table['job'], table['action'])],
+                         [(1, 'down'), (1, 'up'), (2, 'down')])
+        self.assertAlmostEqual(table['outage'][0], 0.3)
+        self.assertEqual(list(table['lost']), [29, 0, 0])
+        self.assertEqual(list(table['outage'][1:]), [0., 0.])
+
+    def test_no_events(self):
+        self.assertEqual(analyze(ResultStore()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+try:
+    import docker
+except ImportError:
+    docker = None
+if docker is not None:
+    from sdntest import hosts
+
+class FakeClient(object):
+    """
+    Docker client of a host entry, never connected.
+    """
+
+    def __init__(self, entry):
+        self.entry = entry
+
+class FakeContainer(object):
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def get_archive(self, path):
+        return iter([self.archive[:10], self.archive[10:]]), {'name': os.path.basename(path)}
+
+@unittest.skipIf(docker is None, "docker-py is not installed")
+class LoadHostsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.from_env = hosts.docker.from_env
+        hosts.docker.from_env = lambda: FakeClient(None)
+
+    def tearDown(self):
+        hosts.docker.from_env = self.from_env
+
+    def test_local_daemon_by_default(self):
+        loaded = hosts.load_hosts({'parallel': 3}, connect=FakeClient)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual((loaded[0].name, loaded[0].parallel, loaded[0].local),
+                         ('local', 3, True))
+        self.assertIsNone(loaded[0].client.entry)
+        self.assertIs(loaded[0].images.docker, loaded[0].client)
+
+    def test_host_entries(self):
+        configs = {'hosts': [
+            {'url': 'unix:///var/run/docker.sock', 'parallel': 2},
+            {'url': 'tcp://10.0.0.2:2376', 'parallel': 4, 'name': 'rack2',
+             'tls': {'ca_cert': 'ca.pem'}},
+            'tcp://10.0.0.3:2375',
+            {'url': 'tcp://127.0.0.1:2375', 'local': True},
+            {'parallel': 'auto'}
+        ]}
+        loaded = hosts.load_hosts(configs, connect=FakeClient)
+        self.assertEqual([host.name for host in loaded],
+                         ['unix:///var/run/docker.sock', 'rack2', 'tcp://10.0.0.3:2375',
+                          'tcp://127.0.0.1:2375', 'host5'])
+        self.assertEqual([host.parallel for host in loaded], [2, 4, 1, 1, 'auto'])
+        self.assertEqual([host.local for host in loaded], [True, False, False, True, True])
+        self.assertEqual(loaded[1].client.entry['tls'], {'ca_cert': 'ca.pem'})
+        self.assertEqual(loaded[2].client.entry, {'url': 'tcp://10.0.0.3:2375'})
+        self.assertIsNone(loaded[4].client.entry)
+        self.assertTrue(all(host.pool is None and host.admission is None for host in loaded))
+
+@unittest.skipIf(docker is None, "docker-py is not installed")
+class WorkspaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, *path):
+        path = os.path.join(self.tmpdir, *path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(path)
+
+    def test_archive_workspace(self):
+        self.write('workspace', 'testcase.json')
+        self.write('workspace', 'output', 'old.log')
+        self.write('package', 'suite.py')
+        self.write('package', '__pycache__', 'suite.cpython-36.pyc')
+        data = hosts.archive_workspace(os.path.join(self.tmpdir, 'workspace'),
+                                       os.path.join(self.tmpdir, 'package'))
+        tar = tarfile.open(fileobj=io.BytesIO(data))
+        names = set(tar.getnames())
+        tar.close()
+        self.assertEqual(names, set(['data', 'data/testcase.json', 'data/output',
+                                     'opt/sdntest/sdntest', 'opt/sdntest/sdntest/suite.py']))
+
+    def test_collect_outputs(self):
+        buf = io.BytesIO()
+        tar = tarfile.open(fileobj=buf, mode='w')
+        for name, content in (('output/result.json', b'{}'), ('output/run.log', b'log')):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        tar.close()
+        names = hosts.collect_outputs(FakeContainer(buf.getvalue()), self.tmpdir)
+        self.assertEqual(sorted(names), ['result.json', 'run.log'])
+        with open(os.path.join(self.tmpdir, 'run.log'), 'rb') as f:
+            self.assertEqual(f.read(), b'log')
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, 'run.log.tmp')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import unittest
+from time import time
+
+from sdntest.intents import Intent, watch_intents
+from sdntest.rest import RestClient
+from stubserver import StubServer
+
+ONOS_INTENTS = '/onos/v1/intents'
+ODL_INTENTS = '/restconf/operational/intent:intents'
+
+def submitted(key, status=201):
+    intent = Intent(key, 'POST', ONOS_INTENTS, {})
+    intent.status = status
+    intent.submitted = time()
+    return intent
+
+def onos(**states):
+    return 200, {'intents': [{'id': key, 'key': key, 'state': state}
+                             for key, state in states.items()]}
+
+def odl(*keys):
+    return 200, {'intents': {'intent': [{'id': key} for key in keys]}}
+
+class WatchIntentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubServer().start()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def client(self, platform):
+        return RestClient(platform, '127.0.0.1', port=self.stub.port, retries=0)
+
+    def test_onos_installed(self):
+        self.stub.route('GET', ONOS_INTENTS,
+                        onos(a='INSTALL_REQ', b='COMPILING'),
+                        onos(a='INSTALLED', b='COMPILING'),
+                        onos(a='INSTALLED', b='INSTALLED'))
+        intents = [submitted('a'), submitted('b')]
+        self.assertTrue(watch_intents(self.client('onos'), intents, timeout=5, interval=0.01))
+        self.assertEqual(self.stub.count('GET', ONOS_INTENTS), 3)
+        self.assertLess(intents[0].installed, intents[1].installed)
+        self.assertTrue(all(intent.install_latency >= 0 for intent in intents))
+
+    def test_onos_failed_settles(self):
+        self.stub.route('GET', ONOS_INTENTS, onos(a='INSTALLED', b='FAILED'))
+        intents = [submitted('a'), submitted('b')]
+        started = time()
+        self.assertFalse(watch_intents(self.client('onos'), intents, timeout=5,
+                                       interval=0.01, settle=0.2))
+        self.assertLess(time() - started, 2)
+        self.assertEqual(intents[1].state, 'FAILED')
+        self.assertIsNone(intents[1].install_latency)
+
+    def test_onos_failed_recompiled(self):
+        self.stub.route('GET', ONOS_INTENTS,
+                        onos(a='FAILED'), onos(a='FAILED'), onos(a='INSTALLED'))
+        intents = [submitted('a')]
+        self.assertTrue(watch_intents(self.client('onos'), intents, timeout=5,
+                                      interval=0.01, settle=1))
+
+    def test_timeout(self):
+        self.stub.route('GET', ONOS_INTENTS, onos(a='INSTALLING'))
+        started = time()
+        self.assertFalse(watch_intents(self.client('onos'), [submitted('a')],
+                                       timeout=0.2, interval=0.01))
+        self.assertLess(time() - started, 2)
+
+    def test_controller_errors_are_polled_again(self):
+        self.stub.route('GET', ONOS_INTENTS, (500, None), onos(a='INSTALLED'))
+        self.assertTrue(watch_intents(self.client('onos'), [submitted('a')],
+                                      timeout=5, interval=0.01))
+
+    def test_rejected_intents(self):
+        self.stub.route('GET', ONOS_INTENTS, onos(a='INSTALLED'))
+        intents = [submitted('a'), submitted('b', status=400)]
+        self.assertFalse(watch_intents(self.client('onos'), intents, timeout=5, interval=0.01))
+        self.assertEqual(intents[0].state, 'INSTALLED')
+
+    def test_odl_operational_datastore(self):
+        self.stub.route('GET', ODL_INTENTS, (404, None), odl('a'), odl('a', 'b'))
+        intents = [submitted('a'), submitted('b')]
+        self.assertTrue(watch_intents(self.client('odl'), intents, timeout=5, interval=0.01))
+        self.assertEqual(self.stub.count('GET', ODL_INTENTS), 3)
+
+if __name__ == '__main__':
+    unittest.main()
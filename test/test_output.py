@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from sdntest.output import OutputWriter, load_index, read_chunks, read_lines, find_output
+
+def sample_lines(count):
+    return ['%06d 64 bytes from 10.0.0.2: icmp_seq=%d ttl=64 time=0.%03d ms' % (i, i, i % 1000)
+            for i in range(count)]
+
+def pieces(data, size):
+    """
+    Split a stream the way a docker log stream may deliver it.
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class OutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'output.1.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, lines, close=True, **kwargs):
+        writer = OutputWriter(self.path, **kwargs)
+        for data in pieces(('\n'.join(lines) + '\n').encode('utf-8'), 333):
+            writer.write(data)
+        if close:
+            writer.close()
+        return writer
+
+    def test_text(self):
+        lines = sample_lines(100)
+        self.write(lines)
+        self.assertEqual(find_output(self.path), self.path)
+        self.assertEqual(list(read_lines(self.path)), lines)
+
+    def test_rotation(self):
+        lines = sample_lines(1000)
+        self.write(lines, max_size=0.01, rotate=2)
+        rotated = [self.path + '.2', self.path + '.1', self.path]
+        self.assertTrue(all(os.path.isfile(path) for path in rotated))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+        # files are rotated between two writes of the stream
+        tail = ''.join(open(path).read() for path in rotated)
+        self.assertTrue(('\n'.join(lines) + '\n').endswith(tail))
+        self.assertLess(len(tail), 3 * (0.01 * 2 ** 20 + 333))
+
+    def test_chunked_round_trip(self):
+        lines = sample_lines(2000)
+        self.write(lines, format='chunked', chunk_size=4)
+        path = find_output(self.path)
+        self.assertEqual(path, self.path + '.gz')
+        self.assertEqual(list(read_lines(path)), lines)
+        # a valid gzip file as a whole
+        with gzip.open(path, 'rb') as f:
+            self.assertEqual(f.read().decode('utf-8').splitlines(), lines)
+        chunks = load_index(path)
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(sum(chunk['size'] for chunk in chunks), os.path.getsize(path))
+        for chunk in chunks:
+            self.assertTrue(chunk['start'] <= chunk['end'])
+        # every chunk holds complete lines
+        for data in read_chunks(path):
+            self.assertTrue(data.endswith(b'\n'))
+
+    def test_chunked_time_window(self):
+        lines = sample_lines(1000)
+        self.write(lines, format='chunked', chunk_size=4)
+        path = self.path + '.gz'
+        with open(path + '.idx') as f:
+            index = json.load(f)
+        for i, chunk in enumerate(index['chunks']):
+            chunk['start'], chunk['end'] = 10. * i, 10. * i + 9
+        with open(path + '.idx', 'w') as f:
+            json.dump(index, f)
+        chunks = list(read_chunks(path))
+        window = list(read_lines(path, 15, 25))
+        expected = b''.join(chunks[1:3]).decode('utf-8').splitlines()
+        self.assertEqual(window, expected)
+
+    def test_chunked_interrupted_writer(self):
+        lines = sample_lines(1000)
+        writer = self.write(lines, close=False, format='chunked', chunk_size=4)
+        writer.flush()
+        path = self.path + '.gz'
+        # indexed chunks and the synced tail of the current one
+        self.assertEqual(list(read_lines(path)), lines)
+        os.remove(path + '.idx')
+        self.assertIsNone(load_index(path))
+        self.assertEqual(list(read_lines(path)), lines)
+        writer.close()
+
+    def test_chunked_max_size(self):
+        lines = sample_lines(1000)
+        self.write(lines, format='chunked', max_size=0.01)
+        # output is dropped from the first write over the limit
+        head = '\n'.join(read_lines(self.path + '.gz'))
+        self.assertTrue('\n'.join(lines).startswith(head))
+        self.assertEqual(len(head) // 333, int(0.01 * 2 ** 20) // 333)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+import unittest
+from time import time, sleep
+from threading import Thread
+
+from sdntest.exception import PoolException
+from sdntest.pool import ControllerPool, reset_odl, reset_onos
+from sdntest.rest import RestClient
+from stubserver import StubServer
+
+INVENTORY = '/restconf/operational/opendaylight-inventory:nodes'
+TOPOLOGY = '/restconf/operational/network-topology:network-topology/topology/flow:1'
+
+def inventory(*nodes):
+    return 200, {'nodes': {'node': [{'id': node, 'flow-node-inventory:table': []}
+                                    for node in nodes]}}
+
+def topology(*nodes):
+    return 200, {'topology': [{'topology-id': 'flow:1',
+                               'node': [{'node-id': node} for node in nodes]}]}
+
+class FakeContainer(object):
+    """
+    Controller container taking some time to stop.
+    """
+
+    count = 0
+
+    def __init__(self):
+        FakeContainer.count += 1
+        self.id = 'c%d' % FakeContainer.count
+        self.removed = False
+
+    def stop(self):
+        sleep(0.2)
+
+    def remove(self):
+        self.removed = True
+
+class ControllerPoolTest(unittest.TestCase):
+
+    def wait_idle(self, pool, key, count):
+        deadline = time() + 5
+        while len(pool.idle.get(key, [])) < count and time() < deadline:
+            sleep(0.01)
+
+    def test_concurrent_shutdown(self):
+        pool = ControllerPool(size=8)
+        containers = []
+
+        def spawn():
+            containers.append(FakeContainer())
+            return containers[-1]
+
+        pool.acquire('odl', spawn, None)
+        self.wait_idle(pool, 'odl', 8)
+        started = time()
+        pool.shutdown()
+        self.assertLess(time() - started, 1)
+        self.assertEqual(sum(1 for c in containers if c.removed), 8)
+        self.assertRaises(PoolException, pool.acquire, 'odl', spawn, None)
+
+    def test_shutdown_wakes_waiting_workers(self):
+        pool = ControllerPool(size=1, limit=1)
+        pool.acquire('odl', FakeContainer, None)
+        errors = []
+
+        def worker():
+            try:
+                pool.acquire('odl', FakeContainer, None)
+            except PoolException as e:
+                errors.append(e)
+
+        waiting = Thread(target=worker)
+        waiting.start()
+        sleep(0.1)
+        pool.shutdown()
+        waiting.join(5)
+        self.assertFalse(waiting.is_alive())
+        self.assertEqual(len(errors), 1)
+
+class ResetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubServer().start()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def client(self, platform):
+        return RestClient(platform, '127.0.0.1', port=self.stub.port, retries=0)
+
+    def route_odl_config(self, status=200):
+        for path in ('/restconf/config/intent:intents',
+                     '/restconf/config/opendaylight-inventory:nodes',
+                     '/restconf/config/network-topology:network-topology'):
+            self.stub.route('DELETE', path, (status, None))
+
+    def test_odl_waits_for_operational_state(self):
+        self.route_odl_config()
+        self.stub.route('GET', INVENTORY, inventory('openflow:1'), (404, None))
+        self.stub.route('GET', TOPOLOGY,
+                        topology('openflow:1', 'host:00:00:00:00:00:01'),
+                        topology('host:00:00:00:00:00:01'),
+                        topology())
+        self.assertTrue(reset_odl(self.client('odl'), timeout=5, interval=0.01))
+        self.assertEqual(self.stub.count('GET', TOPOLOGY), 3)
+        self.assertEqual(self.stub.count('DELETE', '/restconf/config/intent:intents'), 1)
+
+    def test_odl_stale_hosts(self):
+        self.route_odl_config()
+        self.stub.route('GET', INVENTORY, (200, {'nodes': {}}))
+        self.stub.route('GET', TOPOLOGY, topology('host:00:00:00:00:00:01'))
+        self.assertFalse(reset_odl(self.client('odl'), timeout=0.1, interval=0.01))
+
+    def test_odl_failed_delete(self):
+        self.route_odl_config(status=500)
+        self.assertFalse(reset_odl(self.client('odl'), timeout=5, interval=0.01))
+        self.assertEqual(self.stub.count('GET', INVENTORY), 0)
+
+    def test_onos(self):
+        self.stub.route('GET', '/onos/v1/intents',
+                        (200, {'intents': [{'appId': 'org.onosproject.cli', 'key': '0x1'}]}),
+                        (200, {'intents': []}))
+        self.stub.route('GET', '/onos/v1/flows', (200, {'flows': [
+            {'appId': 'org.onosproject.core', 'deviceId': 'of:1', 'id': 1},
+            {'appId': 'org.onosproject.fwd', 'deviceId': 'of:1', 'id': 2}]}))
+        self.stub.route('GET', '/onos/v1/devices', (200, {'devices': [{'id': 'of:1'}]}))
+        self.stub.route('GET', '/onos/v1/hosts',
+                        (200, {'hosts': [{'mac': '00:00:00:00:00:01', 'vlan': -1}]}))
+        for path in ('/onos/v1/intents/org.onosproject.cli/0x1', '/onos/v1/flows/of%3A1/2',
+                     '/onos/v1/devices/of%3A1', '/onos/v1/hosts/00%3A00%3A00%3A00%3A00%3A01/-1'):
+            self.stub.route('DELETE', path, (204, None))
+        self.stub.route('POST', '/onos/v1/applications/org.onosproject.fwd/active', (200, None))
+        self.assertTrue(reset_onos(self.client('onos'), ['fwd']))
+        deleted = [request[1] for request in self.stub.requests if request[0] == 'DELETE']
+        self.assertEqual(len(deleted), 4)
+        self.assertNotIn('/onos/v1/flows/of%3A1/1', deleted)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+import socket
+import unittest
+
+from sdntest.exception import ReadinessException
+from sdntest.readiness import ReadinessProbe
+from stubserver import StubServer
+
+ONOS_APPS = '/onos/v1/applications'
+
+def closed_port():
+    """
+    A local TCP port nothing listens on.
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def apps(*names, **kwargs):
+    state = kwargs.get('state', 'ACTIVE')
+    return 200, {'applications': [{'name': name, 'state': state} for name in names]}
+
+class FakeContainer(object):
+    """
+    Controller container answering karaf client and /proc/net/tcp commands.
+    """
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+
+    def exec_run(self, cmd):
+        self.commands.append(cmd)
+        for prefix, output in self.outputs.items():
+            if cmd.startswith(prefix):
+                return output.encode('utf-8')
+        return b''
+
+def proc_net_tcp(*ports):
+    lines = ['  sl  local_address rem_address   st tx_queue rx_queue']
+    for i, port in enumerate(ports):
+        lines.append('   %d: 00000000:%04X 00000000:0000 0A 00000000:00000000' % (i, port))
+    lines.append('   9: 0100007F:A0C2 0100007F:1F90 01 00000000:00000000')
+    return '\n'.join(lines)
+
+class ReadinessProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubServer().start()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def probe(self, platform, **kwargs):
+        kwargs.setdefault('timeout', 5)
+        kwargs.setdefault('openflow_ports', (self.stub.port,))
+        return ReadinessProbe(platform, '127.0.0.1', rest_port=self.stub.port,
+                              interval=0.01, max_interval=0.05, **kwargs)
+
+    def test_onos_waits_for_apps(self):
+        self.stub.route('GET', ONOS_APPS,
+                        (503, None),
+                        apps('org.onosproject.fwd', state='INSTALLED'),
+                        apps('org.onosproject.fwd', 'org.onosproject.openflow'))
+        elapsed = self.probe('onos', apps=['fwd', 'org.onosproject.openflow']).wait()
+        self.assertGreaterEqual(elapsed, 0)
+        self.assertEqual(self.stub.count('GET', ONOS_APPS), 3)
+
+    def test_onos_sends_credentials(self):
+        self.stub.route('GET', ONOS_APPS, apps('org.onosproject.fwd'))
+        self.probe('onos', apps=['fwd']).wait()
+        headers = self.stub.requests[0][2]
+        auth = dict((k.lower(), v) for k, v in headers.items())['authorization']
+        self.assertEqual(auth, 'Basic b25vczpyb2Nrcw==')
+
+    def test_onos_timeout(self):
+        self.stub.route('GET', ONOS_APPS, apps('org.onosproject.openflow'))
+        probe = self.probe('onos', apps=['fwd'], timeout=0.3)
+        self.assertRaises(ReadinessException, probe.wait)
+        self.assertGreater(self.stub.count('GET', ONOS_APPS), 1)
+
+    def test_onos_requires_openflow(self):
+        self.stub.route('GET', ONOS_APPS, apps('org.onosproject.fwd'))
+        probe = self.probe('onos', apps=['fwd'], openflow_ports=(closed_port(),),
+                           timeout=0.3)
+        self.assertRaises(ReadinessException, probe.wait)
+
+    def test_onos_falls_back_to_karaf_client(self):
+        container = FakeContainer({'client': 'name=org.onosproject.fwd, version=1.13'})
+        probe = self.probe('onos', apps=['fwd'], container=container)
+        self.assertEqual(probe.onos_active_apps(), set(['org.onosproject.fwd']))
+        self.assertTrue(probe.check_onos())
+
+    def test_unreachable_onos_is_probed_through_container(self):
+        port = closed_port()
+        container = FakeContainer({
+            'client': 'name=org.onosproject.fwd, version=1.13',
+            'cat /proc/net/tcp': proc_net_tcp(8181, port)
+        })
+        probe = self.probe('onos', apps=['fwd'], container=container,
+                           openflow_ports=(port,), reachable=False)
+        self.assertEqual(probe.listening_ports(), set([8181, port]))
+        self.assertTrue(probe.check_onos())
+        self.assertEqual(self.stub.requests, [])
+
+    def test_odl_waits_for_restconf(self):
+        container = FakeContainer({
+            '/opt/opendaylight/bin/client':
+                'odl-restconf | 1.6 | x | odl-restconf-1.6 | [ OK ]\n'
+                'odl-l2switch-switch | 0.6 | x | l2switch | [ OK ]'
+        })
+        self.stub.route('GET', '/restconf/modules', (404, None), (200, {'modules': {}}))
+        probe = self.probe('odl', apps=['odl-restconf', 'odl-l2switch-switch'],
+                           container=container)
+        probe.wait()
+        self.assertEqual(self.stub.count('GET', '/restconf/modules'), 2)
+
+    def test_odl_missing_feature(self):
+        container = FakeContainer({
+            '/opt/opendaylight/bin/client': 'odl-restconf | 1.6 | x | odl-restconf-1.6'
+        })
+        probe = self.probe('odl', apps=['odl-l2switch-switch'], container=container)
+        self.assertFalse(probe.check_odl())
+
+    def test_openflow_only(self):
+        self.assertTrue(self.probe('ryu').check_openflow())
+        self.assertFalse(self.probe('ryu', openflow_ports=(closed_port(),)).check_openflow())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+import json
+import socket
+import unittest
+from time import time
+
+from sdntest.exception import RestException
+from sdntest.intents import Intent, submit_intents, onos_h2h_intent, odl_h2h_intent
+from sdntest.rest import RestClient
+from stubserver import StubServer
+from test_readiness import closed_port
+
+CONFIG_INTENTS = '/restconf/config/intent:intents'
+
+class ConfigIntents(object):
+    """
+    Intents container of the ODL config datastore.
+    """
+
+    def __init__(self, stub):
+        self.intents = {}
+        stub.route('POST', CONFIG_INTENTS, self.post)
+
+    def post(self, body):
+        intents = body['intent:intent']
+        if any(intent['intent:id'] in self.intents for intent in intents):
+            return 409, {'errors': {'error': [{'error-tag': 'data-exists'}]}}
+        for intent in intents:
+            self.intents[intent['intent:id']] = intent
+        return 204, None
+
+    def put(self, body):
+        intent = body['intent:intent']
+        status = 200 if intent['intent:id'] in self.intents else 201
+        self.intents[intent['intent:id']] = intent
+        return status, None
+
+class RestClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubServer().start()
+        self.client = RestClient('onos', '127.0.0.1', port=self.stub.port, backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+        self.stub.stop()
+
+    def test_decodes_json(self):
+        self.stub.route('GET', '/onos/v1/devices', (200, {'devices': [{'id': 'of:1'}]}))
+        self.assertEqual(self.client.get('/onos/v1/devices'), {'devices': [{'id': 'of:1'}]})
+
+    def test_empty_answer(self):
+        self.stub.route('DELETE', '/onos/v1/intents/app/1', (204, None))
+        self.assertEqual(self.client.request('DELETE', '/onos/v1/intents/app/1'), (204, None))
+
+    def test_sends_json_body(self):
+        self.stub.route('POST', '/onos/v1/intents', (201, None, {'Location': '/x/12'}))
+        status, content, headers = self.client.send('POST', '/onos/v1/intents', {'a': 1})
+        self.assertEqual((status, content, headers['location']), (201, None, '/x/12'))
+        _, _, sent, body, _ = self.stub.requests[0]
+        sent = dict((k.lower(), v) for k, v in sent.items())
+        self.assertEqual(sent['content-type'], 'application/json')
+        self.assertEqual(json.loads(body.decode('utf-8')), {'a': 1})
+
+    def test_platform_credentials(self):
+        self.stub.route('GET', '/restconf/modules', (200, {}))
+        for client, auth in ((self.client, 'Basic b25vczpyb2Nrcw=='),
+                             (RestClient('odl', '127.0.0.1', port=self.stub.port),
+                              'Basic YWRtaW46YWRtaW4=')):
+            client.request('GET', '/restconf/modules')
+            sent = dict((k.lower(), v) for k, v in self.stub.requests[-1][2].items())
+            self.assertEqual(sent['authorization'], auth)
+
+    def test_retries_server_errors(self):
+        self.stub.route('GET', '/onos/v1/hosts', (503, None), (500, None), (200, {'hosts': []}))
+        self.assertEqual(self.client.get('/onos/v1/hosts'), {'hosts': []})
+        self.assertEqual(self.stub.count('GET', '/onos/v1/hosts'), 3)
+
+    def test_gives_up_after_retries(self):
+        self.stub.route('GET', '/onos/v1/hosts', (503, None))
+        self.assertEqual(self.client.request('GET', '/onos/v1/hosts'), (503, None))
+        self.assertEqual(self.stub.count('GET', '/onos/v1/hosts'), 3)
+        self.assertRaises(RestException, self.client.get, '/onos/v1/hosts')
+
+    def test_client_errors_are_not_retried(self):
+        self.stub.route('GET', '/onos/v1/hosts', (401, None))
+        with self.assertRaises(RestException) as raised:
+            self.client.get('/onos/v1/hosts')
+        self.assertEqual(raised.exception.status, 401)
+        self.assertEqual(self.stub.count('GET', '/onos/v1/hosts'), 1)
+
+    def test_delete_missing_resource(self):
+        self.stub.route('DELETE', '/onos/v1/intents/app/1', (404, None))
+        self.assertTrue(self.client.delete('/onos/v1/intents/app/1'))
+        self.stub.route('DELETE', '/onos/v1/intents/app/1', (409, None))
+        self.assertFalse(self.client.delete('/onos/v1/intents/app/1'))
+
+    def test_connection_errors_are_retried(self):
+        client = RestClient('onos', '127.0.0.1', port=closed_port(), retries=2, backoff=0.05)
+        started = time()
+        self.assertRaises(socket.error, client.get, '/onos/v1/hosts')
+        # two retries after 0.05 and 0.1 seconds
+        self.assertGreaterEqual(time() - started, 0.15)
+
+    def test_reuses_connections(self):
+        self.stub.route('GET', '/onos/v1/hosts', (200, {'hosts': []}))
+        for _ in range(5):
+            self.client.get('/onos/v1/hosts')
+        self.assertEqual(len(set(request[4] for request in self.stub.requests)), 1)
+
+class SubmitIntentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubServer().start()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def test_onos_intents(self):
+        answers = [(201, None, {'Location': '/onos/v1/intents/org.onosproject.cli/%d' % i})
+                   for i in range(10, 20)]
+        self.stub.route('POST', '/onos/v1/intents', *answers)
+        client = RestClient('onos', '127.0.0.1', port=self.stub.port, connections=3)
+        intents = [onos_h2h_intent('00:00:00:00:00:01', '00:00:00:00:00:%02x' % i)
+                   for i in range(2, 12)]
+        submit_intents(client, intents)
+        client.close()
+        self.assertTrue(all(intent.ok for intent in intents))
+        self.assertEqual(sorted(intent.key for intent in intents),
+                         sorted('0x%x' % i for i in range(10, 20)))
+        self.assertEqual(self.stub.count('POST', '/onos/v1/intents'), 10)
+        self.assertLessEqual(len(set(request[4] for request in self.stub.requests)), 3)
+
+    def odl_intents(self, *hosts):
+        return [odl_h2h_intent('00:00:00:00:00:01', '00:00:00:00:00:%02x' % i,
+                               '10.0.0.1', '10.0.0.%d' % i) for i in hosts]
+
+    def test_odl_batches_are_merged(self):
+        datastore = ConfigIntents(self.stub)
+        client = RestClient('odl', '127.0.0.1', port=self.stub.port)
+        first, second = self.odl_intents(2, 3, 4), self.odl_intents(5, 6)
+        submit_intents(client, first)
+        submit_intents(client, second)
+        self.assertEqual(self.stub.count('POST', CONFIG_INTENTS), 2)
+        self.assertEqual(sorted(datastore.intents),
+                         sorted(intent.key for intent in first + second))
+        self.assertTrue(all(intent.ok for intent in first + second))
+
+    def test_odl_existing_intents(self):
+        datastore = ConfigIntents(self.stub)
+        client = RestClient('odl', '127.0.0.1', port=self.stub.port)
+        submit_intents(client, self.odl_intents(2, 3))
+        intents = self.odl_intents(3, 4)
+        for intent in intents:
+            self.stub.route('PUT', intent.path, datastore.put)
+        submit_intents(client, intents)
+        # the batch conflicts with an existing intent, intents are put one by one
+        self.assertEqual([intent.status for intent in intents], [200, 201])
+        self.assertEqual(len(datastore.intents), 3)
+
+    def test_failed_submission(self):
+        client = RestClient('onos', '127.0.0.1', port=closed_port(), retries=0)
+        intents = submit_intents(client, [Intent(None, 'POST', '/onos/v1/intents', {})])
+        self.assertFalse(intents[0].ok)
+        self.assertIsNotNone(intents[0].error)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sdntest.output import OutputWriter
+from sdntest.results import extract, report, parse_lines, split_timestamp
+from sdntest.convergence import analyze
+
+START = 1700000000.
+
+def logged(stamp, message):
+    """
+    A line as logged by the workflow logger at epoch time `stamp`.
+    """
+    return '%s,%03d | %s' % (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(stamp)),
+                             int(round(stamp % 1 * 1000)), message)
+
+def iperf_report(start, end, mbits):
+    return '[  3] %4.1f-%4.1f sec  %.1f MBytes  %.1f Mbits/sec' % (start, end, mbits / 8., mbits)
+
+class Workspace(object):
+    """
+    Temporary testcase workspace with workflow output files.
+    """
+
+    def __init__(self, arguments=''):
+        self.path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.path, 'output'))
+        self.configs = {'workspace': self.path, 'arguments': arguments, 'repeat': 1}
+
+    def write(self, name, lines):
+        with open(os.path.join(self.path, 'output', name), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def remove(self):
+        shutil.rmtree(self.path)
+
+class TimestampTest(unittest.TestCase):
+
+    def test_split_timestamp(self):
+        self.assertEqual(split_timestamp(logged(START + 1.25, 'hello')), (START + 1.25, 'hello'))
+        self.assertEqual(split_timestamp('no stamp'), (None, 'no stamp'))
+
+PING = [
+    'PING 10.0.0.2 (10.0.0.2) 56(84) bytes of data.',
+    '[1700000001.250000] 64 bytes from 10.0.0.2: icmp_seq=1 ttl=64 time=0.512 ms',
+    '[1700000001.251000] 64 bytes from 10.0.0.2: icmp_seq=2 ttl=64 time=1.5 ms',
+    '--- 10.0.0.2 ping statistics ---',
+    '2 packets transmitted, 2 received, 0% packet loss, time 1001ms',
+    'rtt min/avg/max/mdev = 0.512/1.006/1.500/0.494 ms'
+]
+
+IPERF = [
+    '[  3] local 10.0.0.1 port 5001 connected with 10.0.0.5 port 43121',
+    '[  3]  0.0- 1.0 sec   128 KBytes  1.05 Mbits/sec',
+    '[  3]  1.0- 2.0 sec   122 KBytes   999 Kbits/sec',
+    '[  3] Server Report:',
+    '[  3]  0.0- 2.0 sec   250 KBytes  1.02 Mbits/sec   0.025 ms    3/  178 (1.7%)'
+]
+
+class ParseLinesTest(unittest.TestCase):
+
+    def parse(self, lines, stamp=START):
+        return parse_lines(7, [logged(stamp + i, line) for i, line in enumerate(lines)])
+
+    def test_ping(self):
+        rows = self.parse(PING)
+        self.assertEqual(rows['ping'], [(7, 1700000001.25, 1, 0.512), (7, 1700000001.251, 2, 1.5)])
+        self.assertEqual(rows['ping_summary'], [(7, 2, 2, 0., 0.512, 1.006, 1.5, 0.494)])
+
+    def test_iperf(self):
+        rows = self.parse(IPERF)
+        self.assertEqual([row[1:5] + row[-1:] for row in rows['iperf']], [
+            (START + 1, 0., 1., 1.05, 0),
+            (START + 2, 1., 2., 0.999, 0),
+            (START + 4, 0., 2., 1.02, 1)
+        ])
+        self.assertEqual(rows['iperf'][2][5:9], (0.025, 3, 178, 1.7))
+        self.assertTrue(all(row[6] == -1 for row in rows['iperf'][:2]))
+
+    def test_multiping(self):
+        rows = self.parse(['h1: 10.0.0.1 -> 10.0.0.200 1 packets transmitted, 0 received, '
+                           '+1 errors, 100% packet loss, time 0ms'])
+        self.assertEqual(rows['multiping'], [(7, START, '10.0.0.1', '10.0.0.200', 1, 0, 100.)])
+        self.assertEqual(rows['ping_summary'], [])
+
+    def test_link_events(self):
+        rows = self.parse([
+            '*** Config link (s1, s2) DOWN at 1700000003.5',
+            '*** Config link (s1, s2) UP',
+            '*** Event 1: link (s1, s3) down at 1700000005.000000 (late 0.100 ms, took 2.000 ms)',
+            '*** Event 2: controller c0 stop at 1700000006.000000 (late 0.200 ms, took 3.000 ms)'
+        ])
+        self.assertEqual(rows['link'], [(7, 1700000003.5, 's1', 's2', 'down'),
+                                        (7, START + 1, 's1', 's2', 'up'),
+                                        (7, 1700000005., 's1', 's3', 'down')])
+        self.assertEqual(rows['event'], [
+            (7, 1700000005., 'link', '(s1, s3)', 'down', 0.1, 2.),
+            (7, 1700000006., 'controller', 'c0', 'stop', 0.2, 3.)])
+
+    def test_intents_and_discovery(self):
+        rows = self.parse([
+            '*** Submitted 2 intents in 0.020 s, 0 failed',
+            '*** Discovered 9/10 hosts in 1.500 s',
+            '*** Intent 0x1 INSTALLED: status 201, submitted in 12.500 ms, installed in 250.000 ms',
+            '*** Intent 0x2 FAILED: status 201, submitted in 13.000 ms, installed in nan ms',
+            '*** Installed 1/2 intents in 0.250 s',
+            '*** Reachable 90/100 host pairs in 3.000 s'
+        ])
+        self.assertEqual(rows['discovery'], [(7, 9, 10, 1.5)])
+        self.assertEqual(rows['intent'][0], (7, START + 2, '0x1', 'INSTALLED', 201, 12.5, 250.))
+        self.assertEqual(rows['intent'][1][:6], (7, START + 3, '0x2', 'FAILED', 201, 13.))
+        self.assertNotEqual(rows['intent'][1][6], rows['intent'][1][6])
+        self.assertEqual(rows['intent_summary'], [(7, 1, 2, 0.25)])
+        self.assertEqual(rows['reachability'], [(7, 90, 100, 3.)])
+
+    def test_unknown_lines(self):
+        rows = parse_lines(0, ['*** Starting controller', '', 'no stamp | at all'])
+        self.assertTrue(all(not table for table in rows.values()))
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class ExtractTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workspace = Workspace(['10.0.0.2', '10.0.0.3'])
+        self.workspace.configs['repeat'] = 2
+        rtts = {'1-1': 1., '1-2': 3., '2-1': 10., '2-2': 20.}
+        for name, rtt in sorted(rtts.items()):
+            lines = [logged(START, '64 bytes from 10.0.0.2: icmp_seq=1 ttl=64 time=%.3f ms' % rtt),
+                     logged(START, '1 packets transmitted, 1 received, 0% packet loss, time 0ms')]
+            if name == '2-2':
+                # chunked output is found and read as well
+                writer = OutputWriter(os.path.join(self.workspace.path, 'output',
+                                                   'output.%s.log' % name), format='chunked')
+                writer.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                writer.close()
+            else:
+                self.workspace.write('output.%s.log' % name, lines)
+
+    def tearDown(self):
+        self.workspace.remove()
+
+    def test_extract(self):
+        store = extract(self.workspace.configs, processes=2)
+        self.assertEqual(len(store), 4)
+        jobs = store.table('jobs')
+        self.assertEqual(sorted(jobs['name']), ['1-1', '1-2', '2-1', '2-2'])
+        ids, values = store.run_values('rtt')
+        names = dict(zip(jobs['job'], jobs['name']))
+        self.assertEqual(dict((names[i], v) for i, v in zip(ids, values)),
+                         {'1-1': 1., '1-2': 3., '2-1': 10., '2-2': 20.})
+        summary = dict((row['argindex'], row) for row in store.summarize('rtt'))
+        self.assertEqual((summary[1]['n'], summary[1]['mean']), (2, 2.))
+        self.assertEqual(summary[2]['arguments'], '10.0.0.3')
+        self.assertAlmostEqual(summary[2]['std'], 50 ** .5)
+        # t95(1) * std / sqrt(2)
+        self.assertAlmostEqual(summary[2]['ci95'], 12.706 * 5)
+
+    def test_missing_outputs(self):
+        os.remove(os.path.join(self.workspace.path, 'output', 'output.1-2.log'))
+        store = extract(self.workspace.configs, processes=1)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.summarize('rtt')[0]['n'], 1)
+
+    def test_report(self):
+        store = extract(self.workspace.configs, processes=1)
+        directory = os.path.join(self.workspace.path, 'output', 'results')
+        summary = report(store, directory)
+        self.assertEqual(sorted(set(row['metric'] for row in summary)), ['ping_loss', 'rtt'])
+        for name in ('jobs.csv', 'ping.csv', 'summary.csv', 'results.npz'):
+            self.assertTrue(os.path.isfile(os.path.join(directory, name)))
+        with np.load(os.path.join(directory, 'results.npz')) as arrays:
+            self.assertEqual(sorted(arrays['ping.rtt']), [1., 3., 10., 20.])
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class ExtractTimezoneTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tz = os.environ.get('TZ')
+        self.workspace = Workspace()
+        # 100 Mbits/sec, no throughput for 2 seconds after the link goes down
+        lines = []
+        for second in range(10):
+            mbits = 0. if second in (5, 6) else 100.
+            lines.append(logged(START + second + 1, iperf_report(second, second + 1, mbits)))
+            if second == 4:
+                lines.append(logged(START + 5.001, '*** Event 1: link (s1, s2) down at %.6f '
+                                    '(late 0.100 ms, took 1.000 ms)' % (START + 5)))
+        self.workspace.write('output.1.log', lines)
+
+    def tearDown(self):
+        self.settz(self.tz)
+        self.workspace.remove()
+
+    def settz(self, tz):
+        if tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = tz
+        time.tzset()
+
+    def convergence(self, tz):
+        self.settz(tz)
+        store = extract(self.workspace.configs, processes=1)
+        self.assertEqual(analyze(store), 1)
+        return store.table('convergence')
+
+    def test_independent_of_timezone(self):
+        for tz in ('UTC', 'Asia/Shanghai', 'America/New_York'):
+            table = self.convergence(tz)
+            self.assertEqual(list(table['action']), ['down'])
+            self.assertEqual(list(table['time']), [START + 5])
+            self.assertEqual(list(table['outage']), [2.])
+            self.assertEqual(list(table['recovery']), [2.])
+
+if __name__ == '__main__':
+    unittest.main()
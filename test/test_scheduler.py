@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sdntest.scheduler import Job, Sweep, JobQueue, DurationHistory, RunManifest, \
+    expand_jobs, sweep_values, order_jobs, plan
+
+class ExpandJobsTest(unittest.TestCase):
+
+    def test_single_argument(self):
+        jobs = expand_jobs({'arguments': '4 4 10', 'repeat': 3})
+        self.assertEqual([job.name for job in jobs], ['1', '2', '3'])
+        self.assertEqual(set(job.arguments for job in jobs), set(['4 4 10']))
+        self.assertEqual(jobs[0].outputfile, 'output.1.log')
+
+    def test_argument_list(self):
+        jobs = expand_jobs({'arguments': ['a', 'b'], 'repeat': 2})
+        self.assertEqual([(job.name, job.arguments) for job in jobs],
+                         [('1-1', 'a'), ('1-2', 'a'), ('2-1', 'b'), ('2-2', 'b')])
+
+    def test_adaptive_repeat_bound(self):
+        jobs = expand_jobs({'arguments': 'a', 'repeat': {'min': 3, 'max': 5}})
+        self.assertEqual(len(jobs), 5)
+
+class SweepTest(unittest.TestCase):
+
+    def configs(self, **sweep):
+        sweep.setdefault('parameters', {
+            'branch': [4, 8],
+            'rate': {'from': 100, 'to': 300, 'step': 100}
+        })
+        return {'platform': 'onos', 'release': '1.13', 'repeat': 2,
+                'arguments': '{branch} {rate} {platform}', 'sweep': sweep}
+
+    def test_sweep_values(self):
+        self.assertEqual(sweep_values([1, 2]), [1, 2])
+        self.assertEqual(sweep_values(7), [7])
+        self.assertEqual(sweep_values({'from': 0.1, 'to': 0.3, 'step': 0.1}),
+                         [0.1, 0.1 + 0.1, 0.1 + 2 * 0.1])
+        self.assertEqual(sweep_values({'from': 5, 'to': 1, 'step': -2}), [5, 3, 1])
+        self.assertRaises(ValueError, sweep_values, {'from': 10, 'to': 1})
+        self.assertRaises(ValueError, sweep_values, {'from': 1, 'to': 5, 'step': -1})
+        self.assertRaises(ValueError, sweep_values, {'from': 1, 'to': 5, 'step': 0})
+
+    def test_grid(self):
+        sweep = expand_jobs(self.configs())
+        self.assertIsInstance(sweep, Sweep)
+        jobs = list(sweep)
+        self.assertEqual(len(sweep), 12)
+        self.assertEqual(len(jobs), 12)
+        # parameters in name order, the last one varying fastest
+        self.assertEqual([job.arguments for job in jobs[::2]],
+                         ['4 100 onos', '4 200 onos', '4 300 onos',
+                          '8 100 onos', '8 200 onos', '8 300 onos'])
+        self.assertEqual([job.name for job in jobs[:3]],
+                         ['branch=4_rate=100-1', 'branch=4_rate=100-2', 'branch=4_rate=200-1'])
+        self.assertEqual([job.argindex for job in jobs[::2]], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(jobs[0].params, {'branch': 4, 'rate': 100, 'platform': 'onos',
+                                          'release': '1.13', 'apps': ''})
+        self.assertEqual(jobs[-1].outputfile, 'output.branch=8_rate=300-2.log')
+
+    def test_params_of_index(self):
+        sweep = Sweep(self.configs())
+        for index, params in sweep.grid():
+            self.assertEqual(sweep.params(index), params)
+
+    def test_sample(self):
+        sweep = Sweep(self.configs(sample=4, seed=1))
+        self.assertEqual(len(sweep), 8)
+        points = [job.params for job in sweep][::2]
+        self.assertEqual(points, [job.params for job in Sweep(self.configs(sample=4, seed=1))][::2])
+        grid = [params for _, params in Sweep(self.configs()).grid()]
+        self.assertTrue(all(params in grid for params in points))
+        self.assertEqual(len(set(job.name for job in sweep)), 8)
+
+    def test_controller_params(self):
+        configs = self.configs(parameters={'release': ['1.12', '1.13'], 'branch': 4})
+        configs['arguments'] = '{branch} {platform} {release}'
+        jobs = list(expand_jobs(configs))
+        self.assertEqual([job.name for job in jobs], ['release=1.12-1', 'release=1.12-2',
+                                                      'release=1.13-1', 'release=1.13-2'])
+        self.assertEqual(jobs[-1].arguments, '4 onos 1.13')
+
+    def test_filter(self):
+        sweep = Sweep(self.configs())
+        second = sweep.filter(lambda job: job.repeat == 2)
+        self.assertEqual(len(second), 6)
+        odd = second.filter(lambda job: job.argindex % 2)
+        self.assertEqual([job.argindex for job in odd], [1, 3, 5])
+        self.assertEqual(len(sweep), 12)
+
+    def test_template_list(self):
+        configs = self.configs()
+        configs['arguments'] = ['{branch}']
+        self.assertRaises(ValueError, Sweep, configs)
+
+class Workspace(unittest.TestCase):
+
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.outputdir = os.path.join(self.workspace, 'output')
+        with open(os.path.join(self.workspace, 'main.py'), 'w') as f:
+            f.write('print("workflow")\n')
+        self.configs = {'workspace': self.workspace, 'workflow': 'main.py',
+                        'platform': 'odl', 'release': '0.8', 'arguments': ['a', 'b'],
+                        'repeat': 2, 'waiting': 15}
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+class RunManifestTest(Workspace):
+
+    def test_resume(self):
+        jobs = expand_jobs(self.configs)
+        manifest = RunManifest(self.configs)
+        manifest.complete(jobs[0], 10.)
+        manifest.complete(jobs[3], 12.)
+        # an interrupted run is resumed from the saved manifest
+        pending = RunManifest(self.configs).pending(expand_jobs(self.configs))
+        self.assertEqual([job.name for job in pending], ['1-2', '2-1'])
+
+    def test_changed_inputs(self):
+        jobs = expand_jobs(self.configs)
+        RunManifest(self.configs).complete(jobs[0], 10.)
+        self.assertTrue(RunManifest(self.configs).completed(jobs[0]))
+        with open(os.path.join(self.workspace, 'main.py'), 'a') as f:
+            f.write('print("changed")\n')
+        self.assertFalse(RunManifest(self.configs).completed(jobs[0]))
+        configs = dict(self.configs, release='0.9')
+        self.assertFalse(RunManifest(configs).completed(jobs[0]))
+
+    def test_sweep(self):
+        configs = dict(self.configs, arguments='{rate}',
+                       sweep={'parameters': {'rate': [1, 2, 3]}})
+        sweep = expand_jobs(configs)
+        manifest = RunManifest(configs)
+        for job in list(sweep)[:4]:
+            manifest.complete(job, 1.)
+        pending = RunManifest(configs).pending(expand_jobs(configs))
+        self.assertIsInstance(pending, Sweep)
+        self.assertEqual([job.name for job in pending], ['rate=3-1', 'rate=3-2'])
+
+class DurationHistoryTest(Workspace):
+
+    def test_estimates(self):
+        jobs = expand_jobs(self.configs)
+        history = DurationHistory(self.outputdir, self.configs)
+        self.assertEqual(history.estimate(jobs[0]), (75., 'default'))
+        history.record(jobs[0], 10.)
+        history.record(jobs[1], 20.)
+        history.save()
+        history = DurationHistory(self.outputdir, self.configs)
+        self.assertEqual(history.estimate(jobs[1]), (15., 'history'))
+        # another argument of the same platform, release and workflow
+        self.assertEqual(history.estimate(jobs[2]), (15., 'similar'))
+        other = DurationHistory(self.outputdir, dict(self.configs, release='0.9'))
+        self.assertEqual(other.estimate(jobs[2]), (75., 'default'))
+
+    def test_sweep_platform(self):
+        configs = dict(self.configs, arguments='{platform}',
+                       sweep={'parameters': {'platform': ['odl', 'onos']}})
+        odl, _, onos, _ = list(expand_jobs(configs))
+        history = DurationHistory(self.outputdir, configs)
+        history.record(odl, 30.)
+        self.assertEqual(history.estimate(odl), (30., 'history'))
+        self.assertEqual(history.estimate(onos)[1], 'default')
+
+    def test_arguments_only(self):
+        jobs = expand_jobs(self.configs)
+        history = DurationHistory(self.outputdir)
+        history.record(jobs[0], 8.)
+        self.assertEqual(history.estimate(jobs[1]), (8., 'history'))
+        self.assertEqual(history.estimate(jobs[2])[1], 'default')
+
+class PlanTest(Workspace):
+
+    def history(self, durations):
+        history = DurationHistory(self.outputdir, self.configs)
+        jobs = [Job(arguments) for arguments in sorted(durations)]
+        for job in jobs:
+            history.record(job, durations[job.arguments])
+        return history, jobs
+
+    def test_order(self):
+        history, jobs = self.history({'a': 10., 'b': 30., 'c': 20., 'd': 30.})
+        self.assertIs(order_jobs(jobs, history), jobs)
+        ordered = order_jobs(jobs, history, 'longest-first')
+        # ties keep the queue order
+        self.assertEqual([job.arguments for job in ordered], ['b', 'd', 'c', 'a'])
+
+    def test_makespan(self):
+        history, jobs = self.history({'a': 10., 'b': 10., 'c': 10., 'd': 30.})
+        makespan, schedule = plan(jobs, history, parallel=2)
+        self.assertEqual(makespan, 40.)
+        self.assertEqual([(job.arguments, worker, start) for job, _, _, worker, start in schedule],
+                         [('a', 1, 0.), ('b', 2, 0.), ('c', 1, 10.), ('d', 2, 10.)])
+        makespan, _ = plan(jobs, history, parallel=2, order='longest-first')
+        self.assertEqual(makespan, 30.)
+        self.assertEqual(plan(jobs, history, parallel=8)[0], 30.)
+
+class JobQueueTest(unittest.TestCase):
+
+    def test_queue(self):
+        queue = JobQueue(expand_jobs({'arguments': ['a', 'b'], 'repeat': 2}))
+        first = queue.get()
+        self.assertEqual(first.name, '1-1')
+        queue.done(first, 1.)
+        self.assertEqual(queue.get().name, '1-2')
+        self.assertEqual(queue.close(), 2)
+        self.assertIsNone(queue.get())
+        queue.add([Job('c')])
+        self.assertIsNone(queue.get())
+
+    def test_lazy_sweep(self):
+        configs = {'arguments': '{rate}', 'repeat': 1,
+                   'sweep': {'parameters': {'rate': {'from': 1, 'to': 100000}}}}
+        queue = JobQueue(expand_jobs(configs))
+        self.assertEqual(queue.size, 100000)
+        self.assertEqual([queue.get().arguments for _ in range(3)], ['1', '2', '3'])
+
+if __name__ == '__main__':
+    unittest.main()